@@ -1,26 +1,40 @@
 """Prezzi PUN del mese."""
 
+import cProfile
 from datetime import datetime, timedelta
+import io
 import logging
+import pstats
 
 from awesomeversion.awesomeversion import AwesomeVersion
 from holidays import country_holidays
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import __version__ as HA_VERSION
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.event import async_call_later, async_track_point_in_time
+from homeassistant.core import HomeAssistant, ServiceCall
 import homeassistant.util.dt as dt_util
 
 from .const import (
     CONF_ACTUAL_DATA_ONLY,
+    CONF_CHEAPEST_HOURS,
+    CONF_DATA_PATH,
+    CONF_ENERGY_SENSOR,
+    CONF_MEMORY_BUDGET,
+    CONF_MIRROR_SERVER,
+    CONF_MIRROR_URL,
+    CONF_PRICE_ATTRIBUTES,
+    CONF_PRICE_THRESHOLDS,
     CONF_SCAN_HOUR,
     CONF_ZONA,
+    COORD_EVENT,
     DOMAIN,
-    WEB_RETRIES_MINUTES,
+    EVENT_UPDATE_PUN,
+    SERVICE_PROFILE_UPDATE,
 )
 from .coordinator import PUNDataUpdateCoordinator
 from .interfaces import DEFAULT_ZONA, Zona
+from .mirror import PUNSnapshotView
+from .websocket_api import async_register_websocket_commands
 
 if AwesomeVersion(HA_VERSION) >= AwesomeVersion("2024.5.0"):
     from homeassistant.setup import SetupPhases, async_pause_setup
@@ -29,7 +43,10 @@ if AwesomeVersion(HA_VERSION) >= AwesomeVersion("2024.5.0"):
 _LOGGER = logging.getLogger(__name__)
 
 # Definisce i tipi di entità
-PLATFORMS: list[str] = ["sensor"]
+PLATFORMS: list[str] = ["calendar", "sensor"]
+
+# Chiave per la registrazione della vista di condivisione dei prezzi
+MIRROR_VIEW_REGISTERED: str = f"{DOMAIN}_mirror_view"
 
 
 async def async_setup_entry(hass: HomeAssistant, config: ConfigEntry) -> bool:
@@ -44,6 +61,10 @@ async def async_setup_entry(hass: HomeAssistant, config: ConfigEntry) -> bool:
     coordinator: PUNDataUpdateCoordinator = PUNDataUpdateCoordinator(hass, config)
     hass.data.setdefault(DOMAIN, {})[config.entry_id] = coordinator
 
+    # Annulla tutti i timer del coordinator alla rimozione dell'integrazione
+    # (anche se l'impostazione non termina, dato che i timer partono subito)
+    config.async_on_unload(coordinator.cancel_timers)
+
     # Aggiorna immediatamente la fascia oraria corrente
     await coordinator.update_fascia()
 
@@ -53,19 +74,55 @@ async def async_setup_entry(hass: HomeAssistant, config: ConfigEntry) -> bool:
     # Aggiorna immediatamente il prezzo zonale a 15 minuti corrente
     await coordinator.update_prezzo_zonale_15min()
 
+    # Registra la vista per la condivisione dei prezzi (una sola volta)
+    if not hass.data.get(MIRROR_VIEW_REGISTERED, False):
+        hass.http.register_view(PUNSnapshotView(hass))
+        hass.data[MIRROR_VIEW_REGISTERED] = True
+
+    # Registra i comandi websocket per la lettura dei prezzi (una sola volta)
+    async_register_websocket_commands(hass)
+
     # Crea i sensori con la configurazione specificata
     await hass.config_entries.async_forward_entry_setups(config, PLATFORMS)
 
     # Schedula l'aggiornamento via web 10 secondi dopo l'avvio
-    coordinator.schedule_token = async_call_later(
-        hass, timedelta(seconds=10), coordinator.update_pun
-    )
+    coordinator.schedule_timer("pun", coordinator.update_pun, timedelta(seconds=10))
+
+    # Schedula il recupero dei prezzi di domani nella finestra di pubblicazione
+    coordinator.schedule_update_pun_domani(retry=True)
+
+    # Registra il servizio di profilazione dell'aggiornamento
+    async def async_profile_update(call: ServiceCall) -> None:
+        """Esegue un aggiornamento dei prezzi registrando il profilo (cProfile)."""
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await coordinator.update_pun()
+        finally:
+            profiler.disable()
+
+        # Salva il profilo su file e ne mostra il riepilogo nel log
+        path: str = hass.config.path(
+            f"{DOMAIN}_profile_{dt_util.now().strftime('%Y%m%d_%H%M%S')}.prof"
+        )
+        summary: str = await hass.async_add_executor_job(save_profile, profiler, path)
+        _LOGGER.info("Profilo dell'aggiornamento salvato in %s\n%s", path, summary)
+
+    hass.services.async_register(DOMAIN, SERVICE_PROFILE_UPDATE, async_profile_update)
 
     # Registra il callback di modifica opzioni
     config.async_on_unload(config.add_update_listener(update_listener))
     return True
 
 
+def save_profile(profiler: cProfile.Profile, path: str) -> str:
+    """Salva il profilo su file e restituisce le 20 funzioni più onerose."""
+    profiler.dump_stats(path)
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(20)
+    return stream.getvalue()
+
+
 async def async_unload_entry(hass: HomeAssistant, config: ConfigEntry) -> bool:
     """Rimozione dell'integrazione da Home Assistant."""
 
@@ -75,6 +132,7 @@ async def async_unload_entry(hass: HomeAssistant, config: ConfigEntry) -> bool:
     )
     if unload_ok:
         hass.data[DOMAIN].pop(config.entry_id)
+        hass.services.async_remove(DOMAIN, SERVICE_PROFILE_UPDATE)
 
     return unload_ok
 
@@ -85,6 +143,17 @@ async def update_listener(hass: HomeAssistant, config: ConfigEntry) -> None:
     # Recupera il coordinator
     coordinator: PUNDataUpdateCoordinator = hass.data[DOMAIN][config.entry_id]
 
+    if config.options and (
+        config.options.get(CONF_ENERGY_SENSOR, "") != coordinator.energy_sensor
+    ):
+        # Modificato il sensore di energia (il campo vuoto non è salvato nelle opzioni):
+        # ricarica l'integrazione per creare o rimuovere il sensore del costo del mese
+        _LOGGER.debug(
+            "Nuovo sensore di energia: %s.", config.options.get(CONF_ENERGY_SENSOR)
+        )
+        hass.async_create_task(hass.config_entries.async_reload(config.entry_id))
+        return
+
     # Aggiorna le impostazioni del coordinator dalle opzioni
     if (CONF_SCAN_HOUR in config.options) and (
         config.options[CONF_SCAN_HOUR] != coordinator.scan_hour
@@ -109,16 +178,9 @@ async def update_listener(hass: HomeAssistant, config: ConfigEntry) -> None:
             # Se l'evento è già trascorso, passa a domani alla stessa ora
             next_update_pun = next_update_pun + timedelta(days=1)
 
-        # Annulla eventuali schedulazioni attive
-        if coordinator.schedule_token is not None:
-            coordinator.schedule_token()
-            coordinator.schedule_token = None
-
-        # Schedula la prossima esecuzione
-        coordinator.web_retries = WEB_RETRIES_MINUTES.copy()
-        coordinator.schedule_token = async_track_point_in_time(
-            coordinator.hass, coordinator.update_pun, next_update_pun
-        )
+        # Schedula la prossima esecuzione (annullando quella attiva)
+        coordinator.web_retry_count = 0
+        coordinator.schedule_timer("pun", coordinator.update_pun, next_update_pun)
         _LOGGER.debug(
             "Prossimo aggiornamento web: %s",
             next_update_pun.strftime("%d/%m/%Y %H:%M:%S %z"),
@@ -133,16 +195,87 @@ async def update_listener(hass: HomeAssistant, config: ConfigEntry) -> None:
             "Nuovo valore 'usa dati reali': %s.", coordinator.actual_data_only
         )
 
-        # Annulla eventuali schedulazioni attive
-        if coordinator.schedule_token is not None:
-            coordinator.schedule_token()
-            coordinator.schedule_token = None
+        # Ricalcola i prezzi con i giorni già scaricati, altrimenti esegue
+        # un nuovo aggiornamento immediatamente (annullando eventuali schedulazioni attive)
+        if not coordinator.rebuild_pun_data():
+            coordinator.web_retry_count = 0
+            coordinator.schedule_timer(
+                "pun", coordinator.update_pun, timedelta(seconds=5)
+            )
+
+    if (CONF_MEMORY_BUDGET in config.options) and (
+        config.options[CONF_MEMORY_BUDGET] != coordinator.memory_budget
+    ):
+        # Modificata la modalità a basso consumo di memoria
+        coordinator.memory_budget = config.options[CONF_MEMORY_BUDGET]
+        _LOGGER.debug(
+            "Nuovo valore 'risparmio memoria': %s.", coordinator.memory_budget
+        )
+
+        # Esegue un nuovo aggiornamento immediatamente, annullando eventuali
+        # schedulazioni attive (per liberare o ricaricare lo storico)
+        coordinator.web_retry_count = 0
+        coordinator.schedule_timer("pun", coordinator.update_pun, timedelta(seconds=5))
+
+    if (CONF_PRICE_ATTRIBUTES in config.options) and (
+        config.options[CONF_PRICE_ATTRIBUTES] != coordinator.price_attributes
+    ):
+        # Modificata la presenza dei prezzi negli attributi dei sensori:
+        # aggiorna lo stato dei sensori con i prezzi già disponibili
+        coordinator.price_attributes = config.options[CONF_PRICE_ATTRIBUTES]
+        _LOGGER.debug(
+            "Nuovo valore 'prezzi negli attributi': %s.", coordinator.price_attributes
+        )
+        coordinator.async_set_updated_data({COORD_EVENT: EVENT_UPDATE_PUN})
+
+    if (
+        config.options.get(CONF_DATA_PATH, coordinator.data_path),
+        config.options.get(CONF_MIRROR_URL, coordinator.mirror_url),
+    ) != (coordinator.data_path, coordinator.mirror_url):
+        # Modificata la sorgente dei dati
+        coordinator.set_data_source(
+            config.options.get(CONF_DATA_PATH, coordinator.data_path),
+            config.options.get(CONF_MIRROR_URL, coordinator.mirror_url),
+        )
+        _LOGGER.debug(
+            "Nuova sorgente dati: %s.",
+            coordinator.mirror_url or coordinator.data_path or "sito GME",
+        )
 
         # Esegue un nuovo aggiornamento immediatamente
-        coordinator.web_retries = WEB_RETRIES_MINUTES.copy()
-        coordinator.schedule_token = async_call_later(
-            coordinator.hass, timedelta(seconds=5), coordinator.update_pun
+        # (annullando eventuali schedulazioni attive)
+        coordinator.web_retry_count = 0
+        coordinator.schedule_timer("pun", coordinator.update_pun, timedelta(seconds=5))
+
+    if (CONF_MIRROR_SERVER in config.options) and (
+        config.options[CONF_MIRROR_SERVER] != coordinator.mirror_server
+    ):
+        # Modificata la condivisione dei prezzi (attiva dal prossimo aggiornamento)
+        coordinator.mirror_server = config.options[CONF_MIRROR_SERVER]
+        coordinator.mirror_cache.clear()
+        coordinator.mirror_members = {}
+        _LOGGER.debug("Nuovo valore 'condividi prezzi': %s.", coordinator.mirror_server)
+
+    if (CONF_PRICE_THRESHOLDS in config.options) or (
+        CONF_CHEAPEST_HOURS in config.options
+    ):
+        # Soglie di prezzo e ore economiche per gli eventi
+        soglie: list[float] = coordinator.price_thresholds
+        ore_economiche: list[int] = coordinator.cheapest_hours
+        coordinator.set_price_events_config(
+            config.options.get(CONF_PRICE_THRESHOLDS, ""),
+            config.options.get(CONF_CHEAPEST_HOURS, ""),
         )
+        if (soglie != coordinator.price_thresholds) or (
+            ore_economiche != coordinator.cheapest_hours
+        ):
+            # Ricalcola gli eventi con i prezzi già disponibili
+            _LOGGER.debug(
+                "Nuove soglie di prezzo: %s, ore economiche: %s.",
+                coordinator.price_thresholds,
+                coordinator.cheapest_hours,
+            )
+            coordinator.schedule_price_events()
 
     if (CONF_ZONA in config.options) and (
         (coordinator.pun_data.zona is None)
@@ -168,16 +301,13 @@ async def update_listener(hass: HomeAssistant, config: ConfigEntry) -> None:
                 "Modificata la zona geografica in: %s.", coordinator.pun_data.zona.value
             )
 
-            # Annulla eventuali schedulazioni attive
-            if coordinator.schedule_token is not None:
-                coordinator.schedule_token()
-                coordinator.schedule_token = None
-
-            # Esegue un nuovo aggiornamento immediatamente
-            coordinator.web_retries = WEB_RETRIES_MINUTES.copy()
-            coordinator.schedule_token = async_call_later(
-                coordinator.hass, timedelta(seconds=5), coordinator.update_pun
-            )
+            # Ricalcola i prezzi con i giorni già scaricati, altrimenti esegue
+            # un nuovo aggiornamento immediatamente (annullando eventuali schedulazioni attive)
+            if not coordinator.rebuild_pun_data():
+                coordinator.web_retry_count = 0
+                coordinator.schedule_timer(
+                    "pun", coordinator.update_pun, timedelta(seconds=5)
+                )
 
 
 async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
@@ -0,0 +1,137 @@
+"""Periodi delle fasce orarie generati su richiesta per un intervallo di date."""
+
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import NamedTuple
+from zoneinfo import ZoneInfo
+
+import holidays
+
+from .interfaces import Fascia
+
+# Usa sempre il fuso orario italiano (le fasce sono definite sull'ora locale)
+tz_pun: ZoneInfo = ZoneInfo("Europe/Rome")
+
+# Fasce di ciascun tipo di giorno: (ora di inizio, ora di fine, fascia)
+# F1 = lu-ve 8-19
+# F2 = lu-ve 7-8, lu-ve 19-23, sa 7-23
+# F3 = lu-sa 0-7, lu-sa 23-24, do, festivi
+FASCE_FERIALE: tuple[tuple[int, int, Fascia], ...] = (
+    (0, 7, Fascia.F3),
+    (7, 8, Fascia.F2),
+    (8, 19, Fascia.F1),
+    (19, 23, Fascia.F2),
+    (23, 24, Fascia.F3),
+)
+FASCE_SABATO: tuple[tuple[int, int, Fascia], ...] = (
+    (0, 7, Fascia.F3),
+    (7, 23, Fascia.F2),
+    (23, 24, Fascia.F3),
+)
+FASCE_FESTIVO: tuple[tuple[int, int, Fascia], ...] = ((0, 24, Fascia.F3),)
+
+# Giorni precedenti l'intervallo da esaminare per trovare l'inizio del primo periodo
+# (la fascia F3 può proseguire da un sabato sera fino a un lunedì festivo)
+GIORNI_PRECEDENTI: int = 4
+
+
+class PeriodoFascia(NamedTuple):
+    """Periodo continuo della stessa fascia oraria."""
+
+    inizio: datetime
+    fine: datetime
+    fascia: Fascia
+
+
+@lru_cache(maxsize=8)
+def get_festivi(anno: int) -> frozenset[date]:
+    """Restituisce i giorni festivi dell'anno (calcolati una sola volta)."""
+    return frozenset(holidays.IT(years=anno))  # type: ignore[attr-defined]
+
+
+def get_fasce_tipo_giorno(
+    giorno: date, festivo: bool
+) -> tuple[tuple[int, int, Fascia], ...]:
+    """Restituisce le fasce del giorno in base al tipo (feriale, sabato o festivo).
+
+    Args:
+    giorno (date): giorno di cui restituire le fasce.
+    festivo (bool): True se il giorno è una festività (già verificata dal chiamante).
+
+    """
+    if festivo or (giorno.weekday() == 6):
+        return FASCE_FESTIVO
+    if giorno.weekday() == 5:
+        return FASCE_SABATO
+    return FASCE_FERIALE
+
+
+def get_fasce_giorno(giorno: date) -> tuple[tuple[int, int, Fascia], ...]:
+    """Restituisce le fasce del giorno, verificando se è una festività."""
+    return get_fasce_tipo_giorno(giorno, giorno in get_festivi(giorno.year))
+
+
+def get_fascia_ora(fasce: tuple[tuple[int, int, Fascia], ...], ora: int) -> Fascia:
+    """Restituisce la fascia che comprende l'ora locale indicata (0-23)."""
+    return next(fascia for _, ora_fine, fascia in fasce if ora < ora_fine)
+
+
+def iter_periodi(giorno: date) -> Iterator[PeriodoFascia]:
+    """Genera i periodi delle fasce a partire dal giorno indicato, senza fine.
+
+    I periodi consecutivi della stessa fascia (ad esempio la notte tra due
+    giorni feriali o l'intero fine settimana) vengono uniti in uno solo.
+    """
+    corrente: PeriodoFascia | None = None
+    while True:
+        for ora_inizio, ora_fine, fascia in get_fasce_giorno(giorno):
+            inizio: datetime = datetime(
+                giorno.year, giorno.month, giorno.day, ora_inizio, tzinfo=tz_pun
+            )
+            fine: datetime = (
+                datetime(giorno.year, giorno.month, giorno.day, ora_fine, tzinfo=tz_pun)
+                if ora_fine < 24
+                else datetime.combine(
+                    giorno + timedelta(days=1), datetime.min.time(), tz_pun
+                )
+            )
+            if (corrente is not None) and (corrente.fascia == fascia):
+                corrente = corrente._replace(fine=fine)
+                continue
+            if corrente is not None:
+                yield corrente
+            corrente = PeriodoFascia(inizio, fine, fascia)
+        giorno += timedelta(days=1)
+
+
+@lru_cache(maxsize=16)
+def get_periodi(inizio: date, fine: date) -> tuple[PeriodoFascia, ...]:
+    """Restituisce i periodi delle fasce che si sovrappongono ai giorni indicati.
+
+    I periodi vengono generati solo per l'intervallo richiesto (compreso
+    il periodo già in corso all'inizio del primo giorno); gli intervalli
+    richiesti più di recente restano in cache.
+    """
+    mezzanotte_inizio: datetime = datetime.combine(inizio, datetime.min.time(), tz_pun)
+    mezzanotte_fine: datetime = datetime.combine(
+        fine + timedelta(days=1), datetime.min.time(), tz_pun
+    )
+    periodi: list[PeriodoFascia] = []
+    for periodo in iter_periodi(inizio - timedelta(days=GIORNI_PRECEDENTI)):
+        if periodo.inizio >= mezzanotte_fine:
+            break
+        if periodo.fine > mezzanotte_inizio:
+            periodi.append(periodo)
+    return tuple(periodi)
+
+
+def get_periodi_tra(inizio: datetime, fine: datetime) -> list[PeriodoFascia]:
+    """Restituisce i periodi delle fasce che si sovrappongono all'intervallo indicato."""
+    return [
+        periodo
+        for periodo in get_periodi(
+            inizio.astimezone(tz_pun).date(), fine.astimezone(tz_pun).date()
+        )
+        if (periodo.inizio < fine) and (periodo.fine > inizio)
+    ]
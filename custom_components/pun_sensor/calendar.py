@@ -0,0 +1,104 @@
+"""Calendario delle fasce orarie F1, F2 e F3."""
+
+from datetime import date, datetime
+
+from homeassistant.components.calendar import (
+    ENTITY_ID_FORMAT,
+    CalendarEntity,
+    CalendarEvent,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+import homeassistant.util.dt as dt_util
+
+from . import PUNDataUpdateCoordinator
+from .bands import PeriodoFascia, get_periodi, get_periodi_tra, tz_pun
+from .const import COORD_EVENT, DOMAIN, EVENT_UPDATE_FASCIA
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Inizializza e crea il calendario."""
+
+    # Restituisce il coordinator
+    coordinator = hass.data[DOMAIN][config.entry_id]
+    async_add_entities([FasceCalendarEntity(coordinator)], update_before_add=False)
+
+
+def get_calendar_event(periodo: PeriodoFascia) -> CalendarEvent:
+    """Crea l'evento del calendario per il periodo di una fascia."""
+    return CalendarEvent(
+        start=periodo.inizio,
+        end=periodo.fine,
+        summary=periodo.fascia.value,
+    )
+
+
+class FasceCalendarEntity(CoordinatorEntity, CalendarEntity):
+    """Calendario con i periodi delle fasce orarie, generati per l'intervallo richiesto."""
+
+    def __init__(self, coordinator: PUNDataUpdateCoordinator) -> None:
+        """Inizializza il calendario."""
+        super().__init__(coordinator)
+
+        # Inizializza coordinator
+        self.coordinator: PUNDataUpdateCoordinator = coordinator
+
+        # ID univoco basato su un nome fisso
+        self.entity_id = ENTITY_ID_FORMAT.format("pun_fasce")
+        self._attr_unique_id = self.entity_id
+        self._attr_has_entity_name = True
+
+    def _handle_coordinator_update(self) -> None:
+        """Gestisce l'aggiornamento dei dati dal coordinator."""
+
+        # Identifica l'evento che ha scatenato l'aggiornamento
+        if self.coordinator.data is None:
+            return
+        if (coordinator_event := self.coordinator.data.get(COORD_EVENT)) is None:
+            return
+
+        # Aggiorna il calendario in caso di variazione di fascia
+        if coordinator_event != EVENT_UPDATE_FASCIA:
+            return
+
+        self.async_write_ha_state()
+
+    @property
+    def event(self) -> CalendarEvent | None:
+        """Restituisce il periodo della fascia corrente."""
+        now: datetime = dt_util.now()
+        oggi: date = now.astimezone(tz_pun).date()
+        for periodo in get_periodi(oggi, oggi):
+            if periodo.inizio <= now < periodo.fine:
+                return get_calendar_event(periodo)
+        return None
+
+    async def async_get_events(
+        self, hass: HomeAssistant, start_date: datetime, end_date: datetime
+    ) -> list[CalendarEvent]:
+        """Restituisce i periodi delle fasce nell'intervallo richiesto."""
+        return [
+            get_calendar_event(periodo)
+            for periodo in get_periodi_tra(start_date, end_date)
+        ]
+
+    @property
+    def should_poll(self) -> bool:
+        """Determina l'aggiornamento automatico."""
+        return False
+
+    @property
+    def icon(self) -> str:
+        """Icona da usare nel frontend."""
+        return "mdi:calendar-clock"
+
+    @property
+    def name(self) -> str:
+        """Restituisce il nome del calendario."""
+        return "Fasce orarie"
@@ -6,13 +6,29 @@ from awesomeversion.awesomeversion import AwesomeVersion
 import voluptuous as vol
 
 from homeassistant import config_entries
+from homeassistant.components.sensor import SensorDeviceClass
 from homeassistant.const import __version__ as HA_VERSION
 from homeassistant.core import callback
 from homeassistant.helpers import selector
 import homeassistant.helpers.config_validation as cv
 
-from .const import CONF_ACTUAL_DATA_ONLY, CONF_SCAN_HOUR, CONF_ZONA, DOMAIN
+from .const import (
+    CONF_ACTUAL_DATA_ONLY,
+    CONF_CHEAPEST_HOURS,
+    CONF_DATA_PATH,
+    CONF_ENERGY_SENSOR,
+    CONF_MEMORY_BUDGET,
+    CONF_MIRROR_SERVER,
+    CONF_MIRROR_URL,
+    CONF_PRICE_ATTRIBUTES,
+    CONF_PRICE_THRESHOLDS,
+    CONF_SCAN_HOUR,
+    CONF_ZONA,
+    DOMAIN,
+)
 from .interfaces import DEFAULT_ZONA, Zona
+from .mirror import is_mirror_url
+from .triggers import parse_number_list
 
 # Configurazione del tipo di ritorno compatibile con HA 2023.4.0
 if AwesomeVersion(HA_VERSION) >= AwesomeVersion("2024.4.0"):
@@ -31,6 +47,53 @@ selector_config = selector.SelectSelectorConfig(
 if AwesomeVersion(HA_VERSION) >= AwesomeVersion("2023.9.0"):
     selector_config["sort"] = True
 
+# Selettore del sensore di energia per il costo del mese
+energy_selector = selector.EntitySelector(
+    selector.EntitySelectorConfig(
+        domain="sensor", device_class=SensorDeviceClass.ENERGY
+    )
+)
+
+
+def validate_data_path(valore: Any) -> str:
+    """Verifica che il percorso dei dati locali non sia l'indirizzo di un'istanza."""
+    valore = cv.string(valore)
+    if is_mirror_url(valore):
+        raise vol.Invalid(
+            "Indicare l'indirizzo di un'altra istanza nel campo dedicato."
+        )
+    return valore
+
+
+def validate_mirror_url(valore: Any) -> str:
+    """Verifica l'indirizzo dell'istanza che condivide i prezzi (vuoto se non usata)."""
+    valore = cv.string(valore).strip()
+    if valore and not is_mirror_url(valore):
+        raise vol.Invalid("L'indirizzo deve iniziare con http:// o https://.")
+    return valore
+
+
+def validate_price_thresholds(valore: Any) -> str:
+    """Verifica l'elenco delle soglie di prezzo (in €/kWh, separate da ;)."""
+    valore = cv.string(valore)
+    try:
+        parse_number_list(valore)
+    except ValueError as e:
+        raise vol.Invalid("Soglie di prezzo non valide.") from e
+    return valore
+
+
+def validate_cheapest_hours(valore: Any) -> str:
+    """Verifica l'elenco del numero di ore economiche (da 1 a 23, separate da ;)."""
+    valore = cv.string(valore)
+    try:
+        ore: list[int] = parse_number_list(valore, interi=True)
+    except ValueError as e:
+        raise vol.Invalid("Numero di ore economiche non valido.") from e
+    if any(not (1 <= n <= 23) for n in ore):
+        raise vol.Invalid("Il numero di ore economiche deve essere tra 1 e 23.")
+    return valore
+
 
 class PUNOptionsFlow(config_entries.OptionsFlow):
     """Opzioni per prezzi PUN (= riconfigurazione successiva)."""
@@ -67,6 +130,62 @@ class PUNOptionsFlow(config_entries.OptionsFlow):
                     CONF_ACTUAL_DATA_ONLY, self.config_entry.data[CONF_ACTUAL_DATA_ONLY]
                 ),
             ): cv.boolean,
+            vol.Optional(
+                CONF_DATA_PATH,
+                default=self.config_entry.options.get(
+                    CONF_DATA_PATH, self.config_entry.data.get(CONF_DATA_PATH, "")
+                ),
+            ): validate_data_path,
+            vol.Optional(
+                CONF_MIRROR_URL,
+                default=self.config_entry.options.get(
+                    CONF_MIRROR_URL, self.config_entry.data.get(CONF_MIRROR_URL, "")
+                ),
+            ): validate_mirror_url,
+            vol.Optional(
+                CONF_MIRROR_SERVER,
+                default=self.config_entry.options.get(
+                    CONF_MIRROR_SERVER,
+                    self.config_entry.data.get(CONF_MIRROR_SERVER, False),
+                ),
+            ): cv.boolean,
+            vol.Optional(
+                CONF_MEMORY_BUDGET,
+                default=self.config_entry.options.get(
+                    CONF_MEMORY_BUDGET,
+                    self.config_entry.data.get(CONF_MEMORY_BUDGET, False),
+                ),
+            ): cv.boolean,
+            vol.Optional(
+                CONF_PRICE_ATTRIBUTES,
+                default=self.config_entry.options.get(
+                    CONF_PRICE_ATTRIBUTES,
+                    self.config_entry.data.get(CONF_PRICE_ATTRIBUTES, True),
+                ),
+            ): cv.boolean,
+            vol.Optional(
+                CONF_ENERGY_SENSOR,
+                description={
+                    "suggested_value": self.config_entry.options.get(
+                        CONF_ENERGY_SENSOR,
+                        self.config_entry.data.get(CONF_ENERGY_SENSOR),
+                    )
+                },
+            ): energy_selector,
+            vol.Optional(
+                CONF_PRICE_THRESHOLDS,
+                default=self.config_entry.options.get(
+                    CONF_PRICE_THRESHOLDS,
+                    self.config_entry.data.get(CONF_PRICE_THRESHOLDS, ""),
+                ),
+            ): validate_price_thresholds,
+            vol.Optional(
+                CONF_CHEAPEST_HOURS,
+                default=self.config_entry.options.get(
+                    CONF_CHEAPEST_HOURS,
+                    self.config_entry.data.get(CONF_CHEAPEST_HOURS, ""),
+                ),
+            ): validate_cheapest_hours,
         }
 
         # Mostra la schermata di configurazione, con gli eventuali errori
@@ -109,6 +228,14 @@ class PUNConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 cv.positive_int, vol.Range(min=0, max=23)
             ),
             vol.Optional(CONF_ACTUAL_DATA_ONLY, default=False): cv.boolean,
+            vol.Optional(CONF_DATA_PATH, default=""): validate_data_path,
+            vol.Optional(CONF_MIRROR_URL, default=""): validate_mirror_url,
+            vol.Optional(CONF_MIRROR_SERVER, default=False): cv.boolean,
+            vol.Optional(CONF_MEMORY_BUDGET, default=False): cv.boolean,
+            vol.Optional(CONF_PRICE_ATTRIBUTES, default=True): cv.boolean,
+            vol.Optional(CONF_ENERGY_SENSOR): energy_selector,
+            vol.Optional(CONF_PRICE_THRESHOLDS, default=""): validate_price_thresholds,
+            vol.Optional(CONF_CHEAPEST_HOURS, default=""): validate_cheapest_hours,
         }
 
         # Mostra la schermata di configurazione, con gli eventuali errori
@@ -10,8 +10,42 @@ PUN_FASCIA_F2: int = 2
 PUN_FASCIA_F3: int = 3
 PUN_FASCIA_F23: int = 4
 
-# Intervalli di tempo per i tentativi
-WEB_RETRIES_MINUTES: list[int] = [1, 10, 60, 120, 180]
+# Intervalli di tempo per i tentativi (backoff esponenziale con jitter)
+WEB_RETRY_BASE_MINUTES: int = 2
+WEB_RETRY_MAX_MINUTES: int = 180
+WEB_RETRIES_MAX: int = 8
+
+# Orario previsto di pubblicazione degli esiti MGP del giorno dopo (ora italiana)
+PUBLICATION_HOUR: int = 13
+PUBLICATION_MINUTE: int = 0
+PUBLICATION_JITTER_MINUTES: int = 15
+PUBLICATION_END_HOUR: int = 23
+
+# Intervalli di tempo per i tentativi di recupero dei prezzi di domani
+PROBE_RETRY_BASE_MINUTES: int = 5
+PROBE_RETRY_MAX_MINUTES: int = 60
+
+# Download dal GME: giorni per richiesta, richieste contemporanee
+# e tentativi (con attesa crescente) per ogni richiesta
+DOWNLOAD_CHUNK_DAYS: int = 31
+DOWNLOAD_MAX_CONCURRENCY: int = 3
+DOWNLOAD_CHUNK_RETRIES: int = 2
+DOWNLOAD_RETRY_SECONDS: int = 5
+
+# Numero massimo di file XML esaminati contemporaneamente nel thread executor:
+# l'esame tiene quasi sempre il GIL, quindi più thread non lo accelerano
+# (vedere tests/benchmark.py) ma occuperebbero solo l'executor condiviso
+PARSE_MAX_WORKERS: int = 2
+
+# Numero di aggiornamenti recenti conservati nelle tracce (per la diagnostica)
+FETCH_TRACE_SIZE: int = 20
+
+# Numero massimo di avvisi dell'esame dei file XML conservati in ogni traccia
+FETCH_TRACE_AVVISI: int = 10
+
+# Minuto di ogni ora in cui aggiornare il costo del mese
+# (dopo la compilazione delle statistiche orarie da parte del recorder)
+COST_UPDATE_MINUTE: int = 15
 
 # Tipi di aggiornamento
 COORD_EVENT: str = "coordinator_event"
@@ -19,11 +53,34 @@ EVENT_UPDATE_FASCIA: str = "event_update_fascia"
 EVENT_UPDATE_PUN: str = "event_update_pun"
 EVENT_UPDATE_PREZZO_ZONALE: str = "event_update_prezzo_zonale"
 EVENT_UPDATE_PREZZO_ZONALE_15MIN: str = "event_update_prezzo_zonale_15min"
+EVENT_UPDATE_METRICS: str = "event_update_metrics"
+EVENT_UPDATE_COSTI: str = "event_update_costi"
+EVENT_UPDATE_PREVISIONE: str = "event_update_previsione"
+
+# Evento sul bus di Home Assistant all'attraversamento delle soglie di prezzo
+EVENT_PREZZO: str = f"{DOMAIN}_prezzo"
+
+# Segnale inviato quando cambiano i prezzi (per le sottoscrizioni websocket)
+SIGNAL_PREZZI_AGGIORNATI: str = f"{DOMAIN}_prezzi_aggiornati"
+
+# Servizi
+SERVICE_PROFILE_UPDATE: str = "profile_update"
+
+# Versione del formato dei prezzi salvati per il ripristino dei sensori
+RESTORE_STATE_VERSION: int = 2
 
 # Parametri configurabili da configuration.yaml
 CONF_SCAN_HOUR: str = "scan_hour"
 CONF_ACTUAL_DATA_ONLY: str = "actual_data_only"
 CONF_ZONA: str = "zona"
+CONF_DATA_PATH: str = "data_path"
+CONF_MIRROR_URL: str = "mirror_url"
+CONF_MIRROR_SERVER: str = "mirror_server"
+CONF_ENERGY_SENSOR: str = "energy_sensor"
+CONF_MEMORY_BUDGET: str = "memory_budget"
+CONF_PRICE_ATTRIBUTES: str = "price_attributes"
+CONF_PRICE_THRESHOLDS: str = "price_thresholds"
+CONF_CHEAPEST_HOURS: str = "cheapest_hours"
 
 # Parametri interni
 CONF_SCAN_MINUTE: str = "scan_minute"
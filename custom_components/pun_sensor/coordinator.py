@@ -1,11 +1,15 @@
 """Coordinator per pun_sensor."""
 
-from collections.abc import Callable
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from contextlib import contextmanager
 from datetime import date, datetime, timedelta
-import io
 import logging
+from math import isnan
 import random
 from statistics import mean
+import time
 from typing import Any
 import zipfile
 from zoneinfo import ZoneInfo
@@ -13,33 +17,82 @@ from zoneinfo import ZoneInfo
 from aiohttp import ClientSession, ServerConnectionError
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.helpers.event import async_call_later, async_track_point_in_time
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_point_in_time
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 import homeassistant.util.dt as dt_util
 
 from .const import (
     CONF_ACTUAL_DATA_ONLY,
+    CONF_CHEAPEST_HOURS,
+    CONF_DATA_PATH,
+    CONF_ENERGY_SENSOR,
+    CONF_MEMORY_BUDGET,
+    CONF_MIRROR_SERVER,
+    CONF_MIRROR_URL,
+    CONF_PRICE_ATTRIBUTES,
+    CONF_PRICE_THRESHOLDS,
     CONF_SCAN_HOUR,
     CONF_SCAN_MINUTE,
     CONF_ZONA,
     COORD_EVENT,
+    COST_UPDATE_MINUTE,
     DOMAIN,
+    EVENT_PREZZO,
+    EVENT_UPDATE_COSTI,
     EVENT_UPDATE_FASCIA,
+    EVENT_UPDATE_METRICS,
+    EVENT_UPDATE_PREVISIONE,
     EVENT_UPDATE_PREZZO_ZONALE,
     EVENT_UPDATE_PREZZO_ZONALE_15MIN,
     EVENT_UPDATE_PUN,
-    WEB_RETRIES_MINUTES,
+    FETCH_TRACE_SIZE,
+    PARSE_MAX_WORKERS,
+    PROBE_RETRY_BASE_MINUTES,
+    PROBE_RETRY_MAX_MINUTES,
+    PUBLICATION_END_HOUR,
+    PUBLICATION_HOUR,
+    PUBLICATION_JITTER_MINUTES,
+    PUBLICATION_MINUTE,
+    SIGNAL_PREZZI_AGGIORNATI,
+    WEB_RETRIES_MAX,
+    WEB_RETRY_BASE_MINUTES,
+    WEB_RETRY_MAX_MINUTES,
 )
-from .interfaces import DEFAULT_ZONA, Fascia, PunData, PunValues, Zona
+from .costs import PUNCostEngine
+from .datasource import PUNDataSource, get_data_source
+from .interfaces import (
+    DEFAULT_ZONA,
+    Fascia,
+    FetchMetrics,
+    FetchTrace,
+    PunData,
+    PunValues,
+    Zona,
+)
+from .mirror import PUNMirrorClient, apply_snapshot
+from .projection import PrevisioneMese, build_month_projection
+from .ranks import ClassificaPrezzo, build_price_ranks
+from .stats import async_publish_statistics
+from .triggers import EventoPrezzo, build_price_events, parse_number_list
 from .utils import (
+    GiornoXML,
     add_timedelta_via_utc,
-    extract_xml,
+    elapsed_ms,
     get_15min_datetime,
     get_fascia,
     get_hour_datetime,
+    get_incomplete_days,
     get_next_date,
+    get_retry_delay,
+    is_day_complete,
+    merge_xml_days,
+    pack_prices,
+    parse_xml_content,
+    prune_prices,
+    select_zona,
 )
 
 # Ottiene il logger
@@ -67,6 +120,54 @@ class PUNDataUpdateCoordinator(DataUpdateCoordinator):
         # Salva la sessione client e la configurazione
         self.session = async_get_clientsession(hass)
 
+        # Sorgente dei dati (sito GME, cartella locale o altra istanza)
+        self.data_path: str = ""
+        self.mirror_url: str = ""
+        self.data_source: PUNDataSource
+        self.mirror_client: PUNMirrorClient | None = None
+        self.set_data_source(
+            config.options.get(CONF_DATA_PATH, config.data.get(CONF_DATA_PATH, "")),
+            config.options.get(CONF_MIRROR_URL, config.data.get(CONF_MIRROR_URL, "")),
+        )
+
+        # Condivisione dei prezzi con le altre istanze
+        self.mirror_server: bool = config.options.get(
+            CONF_MIRROR_SERVER, config.data.get(CONF_MIRROR_SERVER, False)
+        )
+        self.mirror_cache: dict[Zona | None, tuple[bytes, str]] = {}
+        self.mirror_members: dict[str, bytes] = {}
+        self.mirror_today: date | None = None
+
+        # Medie previste a fine mese per ciascuna fascia
+        self.previsione_mese: PrevisioneMese = PrevisioneMese({}, {})
+
+        # Prezzi in formato compatto condivisi dai sensori (per il ripristino)
+        self.compact_prices: dict[str, dict[str, Any]] = {}
+
+        # Classifica dei prezzi condivisa dai sensori (per gli attributi)
+        self.price_ranks: dict[str, dict[str, ClassificaPrezzo]] = {}
+
+        # Prezzi del mese per zona e risoluzione richiesti via websocket,
+        # con la versione incrementata a ogni aggiornamento dei prezzi
+        self.zone_prices: dict[
+            tuple[Zona | None, bool],
+            tuple[dict[str, float | None], dict[str, float | None]],
+        ] = {}
+        self.versione_prezzi: int = 0
+
+        # Giorni esaminati con i prezzi di tutte le zone e intervallo scaricato
+        # (per ricalcolare i dati al cambio delle opzioni senza scaricarli di nuovo)
+        self.giorni_xml: dict[tuple[date, bool], GiornoXML] = {}
+        self.intervallo_xml: tuple[date, date] | None = None
+
+        # Costo del mese in base ai consumi del sensore di energia (se configurato)
+        self.energy_sensor: str = config.options.get(
+            CONF_ENERGY_SENSOR, config.data.get(CONF_ENERGY_SENSOR, "")
+        )
+        self.costi: PUNCostEngine | None = (
+            PUNCostEngine(hass, self.energy_sensor) if self.energy_sensor else None
+        )
+
         # Inizializza i valori di configurazione (dalle opzioni o dalla configurazione iniziale)
         self.actual_data_only: bool = config.options.get(
             CONF_ACTUAL_DATA_ONLY, config.data.get(CONF_ACTUAL_DATA_ONLY, False)
@@ -75,6 +176,30 @@ class PUNDataUpdateCoordinator(DataUpdateCoordinator):
             CONF_SCAN_HOUR, config.data.get(CONF_SCAN_HOUR, 1)
         )
 
+        # Modalità a basso consumo di memoria (solo medie per i giorni passati)
+        self.memory_budget: bool = config.options.get(
+            CONF_MEMORY_BUDGET, config.data.get(CONF_MEMORY_BUDGET, False)
+        )
+
+        # Prezzi di oggi e domani negli attributi dei sensori
+        # (disattivabili se letti tramite websocket)
+        self.price_attributes: bool = config.options.get(
+            CONF_PRICE_ATTRIBUTES, config.data.get(CONF_PRICE_ATTRIBUTES, True)
+        )
+
+        # Soglie di prezzo e numero di ore economiche per gli eventi
+        self.price_thresholds: list[float] = []
+        self.cheapest_hours: list[int] = []
+        self.set_price_events_config(
+            config.options.get(
+                CONF_PRICE_THRESHOLDS, config.data.get(CONF_PRICE_THRESHOLDS, "")
+            ),
+            config.options.get(
+                CONF_CHEAPEST_HOURS, config.data.get(CONF_CHEAPEST_HOURS, "")
+            ),
+        )
+        self.eventi_prezzo: list[EventoPrezzo] = []
+
         # Inizializza i dati PUN e la zona geografica
         self.pun_data: PunData = PunData()
         try:
@@ -134,9 +259,15 @@ class PUNDataUpdateCoordinator(DataUpdateCoordinator):
         self.update_scan_minutes_from_config(hass=hass, config=config, new_minute=False)
 
         # Inizializza i valori di default
-        self.web_retries: list[int] = WEB_RETRIES_MINUTES.copy()
-        self.schedule_token: Callable | None = None
+        self.web_retry_count: int = 0
+        self.probe_retry_count: int = 0
+        self.timers: dict[str, CALLBACK_TYPE] = {}
+        self.fetch_corrente: asyncio.Future[None] | None = None
+        self.fetch_params: tuple[Any, ...] | None = None
+        self.fetch_coda: dict[str, asyncio.Future[None]] = {}
         self.pun_values: PunValues = PunValues()
+        self.metrics: FetchMetrics = FetchMetrics()
+        self.tracce: deque[FetchTrace] = deque(maxlen=FETCH_TRACE_SIZE)
         self.fascia_corrente: Fascia | None = None
         self.fascia_successiva: Fascia | None = None
         self.prossimo_cambio_fascia: datetime | None = None
@@ -151,11 +282,356 @@ class PUNDataUpdateCoordinator(DataUpdateCoordinator):
             self.actual_data_only,
         )
 
-    def clean_tokens(self) -> None:
-        """Annulla eventuali schedulazioni attive."""
-        if self.schedule_token is not None:
-            self.schedule_token()
-            self.schedule_token = None
+    def schedule_timer(
+        self,
+        nome: str,
+        azione: Callable[[datetime], Awaitable[None]],
+        quando: datetime | timedelta,
+    ) -> None:
+        """Schedula l'azione all'orario (o dopo l'attesa) indicato.
+
+        Il timer viene registrato con il nome indicato, sostituendo l'eventuale
+        timer con lo stesso nome, e rimosso dal registro alla scadenza.
+        """
+        self.cancel_timer(nome)
+        if isinstance(quando, timedelta):
+            quando = dt_util.utcnow() + quando
+
+        async def async_scaduto(now: datetime) -> None:
+            """Rimuove il timer dal registro ed esegue l'azione."""
+            if self.timers.get(nome) is annulla:
+                del self.timers[nome]
+            await azione(now)
+
+        annulla: CALLBACK_TYPE = async_track_point_in_time(
+            self.hass, async_scaduto, quando
+        )
+        self.timers[nome] = annulla
+
+    def cancel_timer(self, nome: str) -> None:
+        """Annulla il timer indicato, se attivo."""
+        if (annulla := self.timers.pop(nome, None)) is not None:
+            annulla()
+
+    @callback
+    def cancel_timers(self) -> None:
+        """Annulla tutti i timer attivi (alla rimozione dell'integrazione)."""
+        for annulla in self.timers.values():
+            annulla()
+        self.timers.clear()
+
+    def set_data_source(self, data_path: str, mirror_url: str) -> None:
+        """Imposta la sorgente dei dati (altra istanza, cartella locale o sito GME).
+
+        Se è configurato l'indirizzo di un'altra istanza, i prezzi elaborati
+        vengono ricevuti da essa anziché scaricati.
+        """
+        self.data_path = data_path
+        self.mirror_url = mirror_url
+        self.mirror_client = (
+            PUNMirrorClient(self.session, mirror_url) if mirror_url else None
+        )
+        self.data_source = get_data_source(self.hass, self.session, data_path)
+
+    def set_price_events_config(self, soglie: str, ore_economiche: str) -> None:
+        """Imposta le soglie di prezzo e le ore economiche (elenchi separati da ;)."""
+        try:
+            self.price_thresholds = parse_number_list(soglie)
+            self.cheapest_hours = parse_number_list(ore_economiche, interi=True)
+        except ValueError:
+            _LOGGER.error(
+                "Soglie di prezzo (%s) o ore economiche (%s) non valide.",
+                soglie,
+                ore_economiche,
+            )
+            self.price_thresholds = []
+            self.cheapest_hours = []
+
+    def get_compact_prices(self, nome: str) -> dict[str, Any]:
+        """Restituisce i prezzi indicati in formato compatto (calcolato una volta per aggiornamento)."""
+        if (compatto := self.compact_prices.get(nome)) is None:
+            compatto = pack_prices(
+                getattr(self.pun_data, nome), prezzi_15min=nome.endswith("_15min")
+            )
+            self.compact_prices[nome] = compatto
+        return compatto
+
+    def get_zone_prices(
+        self, zona: Zona | None, prezzi_15min: bool
+    ) -> tuple[dict[str, float | None], dict[str, float | None]] | None:
+        """Restituisce PUN e prezzi zonali del mese (giorni passati, oggi e domani).
+
+        Per una zona diversa da quella configurata usa i giorni già esaminati
+        con i prezzi di tutte le zone; restituisce None se non sono disponibili
+        (ad esempio in modalità a basso consumo di memoria).
+        I prezzi vengono calcolati una volta per aggiornamento.
+        """
+        if (prezzi := self.zone_prices.get((zona, prezzi_15min))) is not None:
+            return prezzi
+
+        # PUN dei giorni passati e di oggi e domani
+        storico: dict[str, tuple[float | None, float | None]] = (
+            self.pun_data.storico_15min if prezzi_15min else self.pun_data.storico_orari
+        )
+        pun: dict[str, float | None] = {o: p[0] for o, p in storico.items()}
+        pun.update(self.pun_data.pun_15min if prezzi_15min else self.pun_data.pun_orari)
+
+        # Prezzi zonali della zona richiesta
+        zonali: dict[str, float | None]
+        if zona == self.pun_data.zona:
+            zonali = {o: p[1] for o, p in storico.items()}
+            zonali.update(
+                self.pun_data.prezzi_zonali_15min
+                if prezzi_15min
+                else self.pun_data.prezzi_zonali
+            )
+        elif (zona is not None) and self.giorni_xml:
+            zonali = {}
+            for giorno in self.giorni_xml.values():
+                if (giorno.prezzi_15min != prezzi_15min) or (
+                    (valori := giorno.zonali.get(zona.name)) is None
+                ):
+                    continue
+                for i, (_, orario, _, _) in enumerate(giorno.prezzi):
+                    chiave: str = str(orario)
+                    if (chiave in pun) and not isnan(valori[i]):
+                        zonali[chiave] = valori[i]
+        else:
+            return None
+
+        self.zone_prices[(zona, prezzi_15min)] = (pun, zonali)
+        return pun, zonali
+
+    @callback
+    def notify_prices_updated(self) -> None:
+        """Azzera i dati calcolati dai prezzi e notifica sensori e sottoscrizioni websocket."""
+        self.compact_prices.clear()
+        self.price_ranks.clear()
+        self.zone_prices.clear()
+        self.versione_prezzi += 1
+        self.async_set_updated_data({COORD_EVENT: EVENT_UPDATE_PUN})
+        async_dispatcher_send(self.hass, SIGNAL_PREZZI_AGGIORNATI)
+
+    async def async_parse_archive(
+        self, archive: zipfile.ZipFile, traccia: FetchTrace | None = None
+    ) -> list[GiornoXML | None]:
+        """Esamina i file XML dell'archivio nel thread executor.
+
+        Ogni file (un giorno) viene scompattato nel loop, perché lo stesso
+        ZipFile non va letto da più thread, ed esaminato nel thread executor,
+        al massimo PARSE_MAX_WORKERS alla volta, così il loop resta libero
+        (ad esempio per ricevere gli altri blocchi del download); i risultati
+        vanno poi uniti in ordine di data con merge_xml_days().
+        Gli avvisi dell'esame vengono aggiunti alla traccia indicata.
+        """
+        tag_zona: str | None = (
+            self.pun_data.zona.name if self.pun_data.zona is not None else None
+        )
+        limite = asyncio.Semaphore(PARSE_MAX_WORKERS)
+
+        async def async_parse(fn: str) -> GiornoXML | None:
+            """Esamina un file XML dell'archivio nel thread executor."""
+            async with limite:
+                contenuto: bytes = archive.read(fn)
+                return await self.hass.async_add_executor_job(
+                    parse_xml_content, fn, contenuto, tag_zona, not self.memory_budget
+                )
+
+        giorni: list[GiornoXML | None] = await asyncio.gather(
+            *(async_parse(fn) for fn in archive.namelist())
+        )
+        if traccia is not None:
+            for giorno in giorni:
+                if giorno is not None:
+                    traccia.add_avvisi(giorno.avvisi)
+        return giorni
+
+    async def async_extract_xml(
+        self,
+        archive: zipfile.ZipFile,
+        today: date,
+        clear_pun: bool = True,
+        traccia: FetchTrace | None = None,
+    ) -> PunData:
+        """Estrae i prezzi dall'archivio esaminando i file XML nel thread executor."""
+        giorni: list[GiornoXML | None] = await self.async_parse_archive(
+            archive, traccia
+        )
+        if not self.memory_budget:
+            self.giorni_xml.update(
+                {(g.data, g.prezzi_15min): g for g in giorni if g is not None}
+            )
+        return merge_xml_days(
+            self.pun_data,
+            self.get_giorni_mese(giorni, today),
+            today,
+            clear_pun=clear_pun,
+            keep_history=not self.memory_budget,
+        )
+
+    def get_giorni_mese(
+        self, giorni: Iterable[GiornoXML | None], today: date
+    ) -> list[GiornoXML]:
+        """Restituisce i giorni da considerare per il mese di oggi.
+
+        Con 'usa dati reali' esclude i giorni del mese precedente (scaricati
+        comunque all'inizio del mese per poter cambiare l'opzione senza
+        scaricarli di nuovo).
+        """
+        inizio: date = today.replace(day=1) if self.actual_data_only else date.min
+        return [g for g in giorni if (g is not None) and (g.data >= inizio)]
+
+    def rebuild_pun_data(self) -> bool:
+        """Ricalcola i prezzi dai giorni già esaminati, senza scaricarli di nuovo.
+
+        Usato al cambio della zona o dell'impostazione 'usa dati reali'.
+
+        Returns:
+            bool: False se i giorni conservati non bastano (ad esempio in modalità
+            a basso consumo di memoria, con i prezzi condivisi da un'altra istanza
+            o dopo il cambio di giorno) e occorre quindi un aggiornamento via web.
+
+        """
+        date_start, date_end = self.get_date_range()
+        if (
+            (self.fetch_corrente is not None)
+            or (self.mirror_client is not None)
+            or self.memory_budget
+            or (self.intervallo_xml is None)
+            or (date_start < self.intervallo_xml[0])
+            or (date_end > self.intervallo_xml[1])
+        ):
+            return False
+
+        # Unisce di nuovo i giorni con i prezzi della zona configurata
+        inizio: float = time.perf_counter()
+        today: date = dt_util.now(time_zone=tz_pun).date()
+        tag_zona: str | None = (
+            self.pun_data.zona.name if self.pun_data.zona is not None else None
+        )
+        pun_data: PunData = PunData()
+        pun_data.zona = self.pun_data.zona
+        self.pun_data = merge_xml_days(
+            pun_data,
+            (
+                select_zona(giorno, tag_zona)
+                for giorno in self.get_giorni_mese(self.giorni_xml.values(), today)
+            ),
+            today,
+        )
+        prune_prices(self.pun_data, today)
+        self.update_pun_values()
+        _LOGGER.debug(
+            "Prezzi ricalcolati senza aggiornamento web in %s ms.", elapsed_ms(inizio)
+        )
+
+        # Notifica i nuovi prezzi come dopo un aggiornamento via web
+        async_publish_statistics(self.hass, self.pun_data)
+        self.mirror_cache.clear()
+        self.notify_prices_updated()
+        self.schedule_price_events()
+        return True
+
+    def get_price_ranks(self, nome: str) -> dict[str, ClassificaPrezzo]:
+        """Restituisce la classifica dei prezzi indicati (calcolata una volta per aggiornamento)."""
+        if (classifica := self.price_ranks.get(nome)) is None:
+            classifica = build_price_ranks(getattr(self.pun_data, nome))
+            self.price_ranks[nome] = classifica
+        return classifica
+
+    def get_date_range(self) -> tuple[date, date]:
+        """Restituisce l'intervallo di date da scaricare per il mese corrente."""
+        date_end: date = dt_util.now().date()
+        date_start: date = date(date_end.year, date_end.month, 1)
+
+        # All'inizio del mese, aggiunge i valori del mese precedente
+        # a meno che CONF_ACTUAL_DATA_ONLY non sia impostato (ma li scarica
+        # comunque per poter cambiare l'opzione senza un nuovo download,
+        # salvo in modalità a basso consumo di memoria)
+        if ((not self.actual_data_only) or (not self.memory_budget)) and (
+            date_end.day < 4
+        ):
+            date_start = date_start - timedelta(days=3)
+
+        # Aggiunge un giorno (domani) per il calcolo del prezzo zonale
+        date_end += timedelta(days=1)
+        return date_start, date_end
+
+    def get_fetch_params(self, tipo: str) -> tuple[Any, ...]:
+        """Restituisce i parametri che determinano il risultato di un aggiornamento."""
+        if tipo == "domani":
+            return (tipo, dt_util.now(time_zone=tz_pun).date())
+        return (
+            tipo,
+            self.data_path,
+            self.mirror_url,
+            self.pun_data.zona,
+            self.actual_data_only,
+            self.memory_budget,
+            self.mirror_server,
+            *self.get_date_range(),
+        )
+
+    def get_fetch_in_corso(self, tipo: str) -> asyncio.Future[None] | None:
+        """Restituisce l'aggiornamento a cui si unirebbe ora una richiesta del tipo indicato."""
+        if (self.fetch_corrente is not None) and (
+            self.get_fetch_params(tipo) == self.fetch_params
+        ):
+            return self.fetch_corrente
+        return self.fetch_coda.get(tipo)
+
+    async def async_single_flight(
+        self, tipo: str, aggiornamento: Callable[[], Awaitable[Any]]
+    ) -> bool:
+        """Esegue un aggiornamento dei prezzi senza sovrapporlo ad altri.
+
+        Chi arriva durante un aggiornamento con gli stessi parametri ne attende
+        il termine senza ripeterlo; con parametri diversi l'aggiornamento viene
+        accodato, unendo in un'unica esecuzione le richieste dello stesso tipo
+        (che userà le impostazioni più recenti). Un errore dell'aggiornamento
+        viene sollevato a chi lo ha eseguito e a tutti quelli che lo attendevano.
+
+        Returns:
+            bool: True se l'aggiornamento è stato eseguito da questo chiamante,
+            False se si è unito a un altro.
+
+        """
+        if (in_corso := self.get_fetch_in_corso(tipo)) is not None:
+            # Stesso aggiornamento già in corso (o dello stesso tipo in coda)
+            self.metrics.aggiornamenti_uniti += 1
+            await asyncio.shield(in_corso)
+            return False
+
+        termine: asyncio.Future[None] = self.hass.loop.create_future()
+        try:
+            if self.fetch_corrente is not None:
+                # Attende il termine degli aggiornamenti in corso (senza i loro errori)
+                self.metrics.aggiornamenti_accodati += 1
+                self.fetch_coda[tipo] = termine
+                while self.fetch_corrente is not None:
+                    await asyncio.wait([self.fetch_corrente])
+                del self.fetch_coda[tipo]
+
+            self.fetch_corrente = termine
+            self.fetch_params = self.get_fetch_params(tipo)
+            await aggiornamento()
+        except asyncio.CancelledError:
+            termine.cancel()
+            raise
+        except Exception as e:
+            termine.set_exception(e)
+            # Segna l'errore come letto anche se nessuno attende l'aggiornamento
+            termine.exception()
+            raise
+        finally:
+            if self.fetch_coda.get(tipo) is termine:
+                del self.fetch_coda[tipo]
+            if self.fetch_corrente is termine:
+                self.fetch_corrente = None
+                self.fetch_params = None
+            if not termine.done():
+                termine.set_result(None)
+        return True
 
     def update_scan_minutes_from_config(
         self, hass: HomeAssistant, config: ConfigEntry, new_minute: bool = False
@@ -187,81 +663,197 @@ class PUNDataUpdateCoordinator(DataUpdateCoordinator):
             # Carica i minuti dalla configurazione
             self.scan_minute = config.data.get(CONF_SCAN_MINUTE, 0)
 
+    @contextmanager
+    def trace_fetch(
+        self, tipo: str, date_start: date, date_end: date
+    ) -> Iterator[FetchTrace]:
+        """Registra la traccia di un download tra le ultime FETCH_TRACE_SIZE.
+
+        L'esito viene impostato a "ok" al termine (se non già impostato)
+        oppure a "errore" con la descrizione dell'eccezione, che viene
+        comunque propagata; byte, latenze, tentativi e stato HTTP dell'ultima
+        risposta vengono letti dalla sorgente usata.
+        """
+        traccia = FetchTrace(
+            tipo=tipo,
+            sorgente="mirror"
+            if self.mirror_client is not None
+            else type(self.data_source).__name__,
+            date_start=date_start,
+            date_end=date_end,
+            inizio=dt_util.now(),
+        )
+        self.tracce.append(traccia)
+        inizio: float = time.perf_counter()
+        try:
+            yield traccia
+        except BaseException as e:
+            traccia.esito = "errore"
+            traccia.errore = f"{type(e).__name__}: {e}"
+            raise
+        else:
+            if traccia.esito == "in_corso":
+                traccia.esito = "ok"
+        finally:
+            traccia.durata_ms = elapsed_ms(inizio)
+            if self.mirror_client is not None:
+                traccia.byte_scaricati = self.mirror_client.last_bytes
+                traccia.stato_http = self.mirror_client.last_status
+            else:
+                traccia.byte_scaricati = self.data_source.last_bytes
+                traccia.stato_http = self.data_source.last_status
+                traccia.latenze_blocchi_ms = self.data_source.last_latencies_ms
+                traccia.tentativi_ripetuti = self.data_source.last_retries
+
     async def _async_update_data(self) -> dict[str, Any]:
         """Aggiornamento dati a intervalli prestabiliti."""
 
         # Calcola l'intervallo di date per il mese corrente
-        date_end: date = dt_util.now().date()
-        date_start: date = date(date_end.year, date_end.month, 1)
+        date_start, date_end = self.get_date_range()
 
-        # All'inizio del mese, aggiunge i valori del mese precedente
-        # a meno che CONF_ACTUAL_DATA_ONLY non sia impostato
-        if (not self.actual_data_only) and (date_end.day < 4):
-            date_start = date_start - timedelta(days=3)
+        # Esegue l'aggiornamento registrandone la traccia
+        with self.trace_fetch("pun", date_start, date_end) as traccia:
+            await self.async_fetch_prices(date_start, date_end, traccia)
+        return {}
 
-        # Aggiunge un giorno (domani) per il calcolo del prezzo zonale
-        date_end += timedelta(days=1)
+    async def async_fetch_prices(
+        self, date_start: date, date_end: date, traccia: FetchTrace
+    ) -> None:
+        """Scarica ed elabora i prezzi dell'intervallo, aggiornando i valori."""
+
+        # Prezzi elaborati da un'altra istanza (nessun download dal GME)
+        if self.mirror_client is not None:
+            inizio: float = time.perf_counter()
+            snapshot: (
+                dict[str, Any] | None
+            ) = await self.mirror_client.async_get_snapshot(self.pun_data.zona)
+            self.metrics.durata_download_ms = elapsed_ms(inizio)
+            self.metrics.byte_scaricati = self.mirror_client.last_bytes
+            self.metrics.blocchi_scaricati = 1
+            self.metrics.latenze_blocchi_ms = (self.metrics.durata_download_ms,)
+            self.metrics.file_zip = 0
+            self.metrics.record_elaborati = 0
+            if snapshot is None:
+                _LOGGER.debug("Prezzi condivisi non modificati.")
+                traccia.esito = "non_modificato"
+                return
+
+            inizio = time.perf_counter()
+            self.pun_data = apply_snapshot(self.pun_data, snapshot)
+            self.giorni_xml = {}
+            self.intervallo_xml = None
+            self.metrics.durata_parsing_ms = elapsed_ms(inizio)
+        else:
+            # Recupera gli archivi con i file XML, esaminandoli appena scaricati
+            today: date = dt_util.now(time_zone=tz_pun).date()
+            giorni: list[GiornoXML | None] = []
+            members: dict[str, bytes] = {}
+            self.metrics.file_zip = 0
+            self.metrics.blocchi_scaricati = 0
+            durata_parsing: float = 0.0
+            async for archive in self.data_source.async_iter_archives(
+                date_start, date_end
+            ):
+                # Mostra i file nell'archivio
+                if _LOGGER.isEnabledFor(logging.DEBUG):
+                    _LOGGER.debug(
+                        "%s file trovati nell'archivio (%s)",
+                        len(archive.namelist()),
+                        ", ".join(str(fn) for fn in archive.namelist()),
+                    )
+                self.metrics.blocchi_scaricati += 1
+                self.metrics.file_zip += len(archive.namelist())
+
+                # Esamina i file XML mentre gli altri blocchi sono ancora in download
+                inizio = time.perf_counter()
+                giorni.extend(await self.async_parse_archive(archive, traccia))
+                durata_parsing += elapsed_ms(inizio)
+
+                # Conserva i file XML per le altre zone richieste dalle istanze collegate
+                # (non in modalità a basso consumo di memoria)
+                if self.mirror_server and not self.memory_budget:
+                    members.update({fn: archive.read(fn) for fn in archive.namelist()})
+
+                # Rilascia subito l'archivio in memoria
+                archive.close()
+                del archive
+
+            # Metriche del download
+            self.metrics.durata_download_ms = self.data_source.last_duration_ms
+            self.metrics.latenze_blocchi_ms = self.data_source.last_latencies_ms
+            self.metrics.byte_scaricati = self.data_source.last_bytes
+
+            # Unisce i dati dei giorni in ordine di data
+            inizio = time.perf_counter()
+            self.metrics.record_elaborati = 0
+            self.pun_data = merge_xml_days(
+                self.pun_data,
+                self.get_giorni_mese(giorni, today),
+                today,
+                metrics=self.metrics,
+                keep_history=not self.memory_budget,
+            )
+            prune_prices(self.pun_data, today)
+            self.metrics.durata_parsing_ms = round(
+                durata_parsing + elapsed_ms(inizio), 3
+            )
 
-        # Converte le date in stringa da passare all'API Mercato elettrico
-        start_date_param: str = date_start.strftime("%Y%m%d")
-        end_date_param: str = date_end.strftime("%Y%m%d")
-
-        # URL del sito Mercato elettrico
-        download_url: str = f"https://gme.mercatoelettrico.org/DesktopModules/GmeDownload/API/ExcelDownload/downloadzipfile?DataInizio={start_date_param}&DataFine={end_date_param}&Date={end_date_param}&Mercato=MGP&Settore=Prezzi&FiltroDate=InizioFine"
-
-        # Imposta gli header della richiesta
-        heads: dict[str, str] = {
-            "moduleid": "12103",
-            "referer": "https://gme.mercatoelettrico.org/en-us/Home/Results/Electricity/MGP/Download?valore=Prezzi",
-            "sec-ch-ua-mobile": "?0",
-            "sec-ch-ua-platform": "Windows",
-            "sec-fetch-dest": "empty",
-            "sec-fetch-mode": "cors",
-            "sec-fetch-site": "same-origin",
-            "sec-gpc": "1",
-            "tabid": "1749",
-            "userid": "-1",
-        }
-
-        # Effettua il download dello ZIP con i file XML
-        _LOGGER.debug("Inizio download file ZIP con XML.")
-        async with self.session.get(download_url, headers=heads) as response:
-            # Aspetta la request
-            bytes_response = await response.read()
-
-            # Se la richiesta NON e' andata a buon fine ritorna l'errore subito
-            if response.status != 200:
-                _LOGGER.error("Richiesta fallita con errore %s", response.status)
-                raise ServerConnectionError(
-                    f"Richiesta fallita con errore {response.status}"
-                )
+            # Conserva i giorni esaminati per ricalcolare i dati al cambio delle opzioni
+            # (non in modalità a basso consumo di memoria)
+            self.giorni_xml = (
+                {(g.data, g.prezzi_15min): g for g in giorni if g is not None}
+                if not self.memory_budget
+                else {}
+            )
+            self.intervallo_xml = (date_start, date_end) if self.giorni_xml else None
+            del giorni
+
+            # File XML per le istanze collegate
+            self.mirror_cache.clear()
+            self.mirror_today = today
+            self.mirror_members = members
+
+        # Velocità media del download (byte/ms = kB/s)
+        self.metrics.velocita_download_kbs = (
+            round(self.metrics.byte_scaricati / self.metrics.durata_download_ms, 3)
+            if self.metrics.durata_download_ms > 0
+            else 0.0
+        )
 
-            # La richiesta e' andata a buon fine, tenta l'estrazione
-            try:
-                archive = zipfile.ZipFile(io.BytesIO(bytes_response), "r")
+        # Completa la traccia del download
+        traccia.file_zip = self.metrics.file_zip
+        traccia.record_elaborati = self.metrics.record_elaborati
+        traccia.durata_download_ms = self.metrics.durata_download_ms
+        traccia.durata_parsing_ms = self.metrics.durata_parsing_ms
+        oggi: date = date_end - timedelta(days=1)
+        traccia.giorni_incompleti = get_incomplete_days(
+            self.pun_data,
+            oggi if self.mirror_client is not None else oggi.replace(day=1),
+            date_end,
+        )
 
-            # Ritorna error se l'output non è uno ZIP, o ha un errore IO
-            except (zipfile.BadZipfile, OSError) as e:  # not a zip:
-                _LOGGER.error(
-                    "Download fallito con URL: %s, lunghezza %s, risposta %s",
-                    download_url,
-                    response.content_length,
-                    response.status,
-                )
-                raise UpdateFailed("Archivio ZIP scaricato dal sito non valido.") from e
+        # Calcola i valori medi per fascia
+        inizio = time.perf_counter()
+        self.update_pun_values()
+        self.metrics.durata_medie_ms = elapsed_ms(inizio)
 
-        # Mostra i file nell'archivio
-        _LOGGER.debug(
-            "%s file trovati nell'archivio (%s)",
-            len(archive.namelist()),
-            ", ".join(str(fn) for fn in archive.namelist()),
-        )
+        # Importa i prezzi nelle statistiche a lungo termine (in blocco)
+        async_publish_statistics(self.hass, self.pun_data)
 
-        # Estrae i dati dall'archivio
-        self.pun_data = extract_xml(
-            archive, self.pun_data, dt_util.now(time_zone=tz_pun).date()
-        )
-        archive.close()
+        # Notifica che i dati PUN (prezzi) sono stati aggiornati
+        inizio = time.perf_counter()
+        self.notify_prices_updated()
+        self.metrics.durata_entita_ms = elapsed_ms(inizio)
+
+        # Ricalcola gli eventi di attraversamento delle soglie
+        self.schedule_price_events()
+
+        # Notifica che le metriche sono state aggiornate
+        self.metrics.ultimo_aggiornamento = dt_util.now()
+        self.async_set_updated_data({COORD_EVENT: EVENT_UPDATE_METRICS})
+
+    def update_pun_values(self) -> None:
+        """Calcola i valori medi del PUN per ciascuna fascia."""
 
         # Per ogni fascia, calcola il valore del pun
         for fascia, value_list in self.pun_data.pun.items():
@@ -287,7 +879,12 @@ class PUNDataUpdateCoordinator(DataUpdateCoordinator):
         else:
             self.pun_values.value[Fascia.F23] = 0
 
+        # Aggiorna la previsione di fine mese (dalle medie appena calcolate)
+        self.update_previsione_mese()
+
         # Logga i dati
+        if not _LOGGER.isEnabledFor(logging.DEBUG):
+            return
         _LOGGER.debug(
             "Numero di dati: %s",
             ", ".join(
@@ -304,9 +901,13 @@ class PUNDataUpdateCoordinator(DataUpdateCoordinator):
             ),
         )
 
-        # Notifica che i dati PUN (prezzi) sono stati aggiornati
-        self.async_set_updated_data({COORD_EVENT: EVENT_UPDATE_PUN})
-        return {}
+    def update_previsione_mese(self) -> None:
+        """Calcola le medie previste a fine mese per ciascuna fascia."""
+        self.previsione_mese = build_month_projection(
+            self.pun_data,
+            self.pun_values.value,
+            dt_util.now(time_zone=tz_pun).date(),
+        )
 
     async def update_fascia(self, now=None) -> None:
         """Aggiorna la fascia oraria corrente (al cambio fascia)."""
@@ -341,56 +942,227 @@ class PUNDataUpdateCoordinator(DataUpdateCoordinator):
         self.async_set_updated_data({COORD_EVENT: EVENT_UPDATE_FASCIA})
 
         # Schedula la prossima esecuzione
-        async_track_point_in_time(
-            self.hass, self.update_fascia, self.prossimo_cambio_fascia
+        self.schedule_timer("fascia", self.update_fascia, self.prossimo_cambio_fascia)
+
+    def get_next_update_pun(self) -> datetime:
+        """Restituisce la data della prossima esecuzione all'ora configurata."""
+        next_update_pun: datetime = get_next_date(
+            dataora=dt_util.now(time_zone=tz_pun),
+            ora=self.scan_hour,
+            minuto=self.scan_minute,
         )
+        if next_update_pun <= dt_util.now():
+            # Se l'evento è già trascorso, passa a domani alla stessa ora
+            next_update_pun = next_update_pun + timedelta(days=1)
+        return next_update_pun
+
+    def schedule_next_update(self) -> None:
+        """Schedula il prossimo aggiornamento all'ora configurata."""
+
+        # Schedula la prossima esecuzione (annullando quella attiva)
+        next_update_pun: datetime = self.get_next_update_pun()
+        self.schedule_timer("pun", self.update_pun, next_update_pun)
+        _LOGGER.debug(
+            "Prossimo aggiornamento web: %s",
+            next_update_pun.strftime("%d/%m/%Y %H:%M:%S %z"),
+        )
+
+    def schedule_update_pun_domani(self, retry: bool = False) -> None:
+        """Schedula il recupero dei soli prezzi di domani nella finestra di pubblicazione.
+
+        Con retry=True riprova dopo il backoff, purché entro la fine della finestra;
+        altrimenti attende l'orario previsto di pubblicazione del GME
+        (con un ritardo casuale per distribuire le richieste tra le istanze).
+        """
+
+        # Annulla l'eventuale schedulazione attiva
+        self.cancel_timer("domani")
+
+        now: datetime = dt_util.now(time_zone=tz_pun)
+        ritardo_casuale: timedelta = timedelta(
+            seconds=random.randint(0, PUBLICATION_JITTER_MINUTES * 60)
+        )
+        inizio_finestra: datetime = (
+            get_next_date(dataora=now, ora=PUBLICATION_HOUR, minuto=PUBLICATION_MINUTE)
+            + ritardo_casuale
+        )
+        fine_finestra: datetime = get_next_date(dataora=now, ora=PUBLICATION_END_HOUR)
+
+        # Nuovo tentativo entro la finestra di pubblicazione
+        if retry:
+            next_update_domani: datetime = max(
+                inizio_finestra,
+                now
+                + get_retry_delay(
+                    self.probe_retry_count,
+                    PROBE_RETRY_BASE_MINUTES,
+                    PROBE_RETRY_MAX_MINUTES,
+                ),
+            )
+            if next_update_domani < fine_finestra:
+                self.schedule_timer(
+                    "domani", self.update_pun_domani, next_update_domani
+                )
+                _LOGGER.debug(
+                    "Prossima verifica prezzi di domani: %s",
+                    next_update_domani.strftime("%d/%m/%Y %H:%M:%S %z"),
+                )
+                return
+
+        # Passa alla prossima apertura della finestra di pubblicazione
+        self.probe_retry_count = 0
+        next_update_domani = inizio_finestra
+        if next_update_domani <= now:
+            next_update_domani = (
+                get_next_date(
+                    dataora=now,
+                    ora=PUBLICATION_HOUR,
+                    minuto=PUBLICATION_MINUTE,
+                    offset=1,
+                )
+                + ritardo_casuale
+            )
+        self.schedule_timer("domani", self.update_pun_domani, next_update_domani)
+        _LOGGER.debug(
+            "Prossima verifica prezzi di domani: %s",
+            next_update_domani.strftime("%d/%m/%Y %H:%M:%S %z"),
+        )
+
+    async def update_pun_domani(self, now=None) -> None:
+        """Scarica i soli prezzi di domani e li unisce a quelli del mese."""
+        oggi: date = dt_util.now(time_zone=tz_pun).date()
+        domani: date = oggi + timedelta(days=1)
+
+        # Prezzi del mese e di domani già completi, nessuna richiesta necessaria
+        # (con i prezzi condivisi sono disponibili solo oggi e domani)
+        giorni_incompleti: list[date] = get_incomplete_days(
+            self.pun_data,
+            oggi if self.mirror_client is not None else oggi.replace(day=1),
+            domani,
+        )
+        if not giorni_incompleti:
+            _LOGGER.debug("Prezzi di domani già disponibili.")
+            self.schedule_update_pun_domani()
+            return
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "Giorni con prezzi incompleti: %s",
+                ", ".join(str(giorno) for giorno in giorni_incompleti),
+            )
+
+        # Scarica solo dal primo giorno incompleto a domani (di solito
+        # il solo giorno di domani, pochi KB anziché l'intero mese)
+        aggiornato: bool = False
+
+        async def async_update_domani() -> None:
+            """Scarica i giorni ancora incompleti all'avvio del download."""
+            nonlocal aggiornato
+            if self.mirror_client is not None:
+                # Prezzi condivisi: richiesta condizionale all'altra istanza
+                await self._async_update_data()
+                return
+
+            # Un aggiornamento completo appena concluso potrebbe averli già scaricati
+            if not (
+                giorni_incompleti := get_incomplete_days(
+                    self.pun_data, oggi.replace(day=1), domani
+                )
+            ):
+                return
+            with self.trace_fetch("domani", giorni_incompleti[0], domani) as traccia:
+                archive: zipfile.ZipFile = await self.data_source.async_get_archive(
+                    giorni_incompleti[0], domani
+                )
+                traccia.file_zip = len(archive.namelist())
+                self.pun_data = await self.async_extract_xml(
+                    archive, oggi, clear_pun=False, traccia=traccia
+                )
+                traccia.giorni_incompleti = get_incomplete_days(
+                    self.pun_data, giorni_incompleti[0], domani
+                )
+            self.mirror_cache.clear()
+            if self.mirror_server and not self.memory_budget:
+                self.mirror_members.update(
+                    {fn: archive.read(fn) for fn in archive.namelist()}
+                )
+            archive.close()
+            aggiornato = True
+
+        try:
+            await self.async_single_flight("domani", async_update_domani)
+
+        # pylint: disable=broad-exception-caught
+        except (Exception, UpdateFailed, ServerConnectionError) as e:
+            _LOGGER.debug(
+                "Errore durante il download dei prezzi di domani.", exc_info=e
+            )
+
+        if is_day_complete(self.pun_data, domani):
+            # Prezzi pubblicati, notifica l'aggiornamento dei prezzi
+            _LOGGER.info("Prezzi di domani pubblicati e aggiornati.")
+            if aggiornato:
+                self.update_pun_values()
+                async_publish_statistics(self.hass, self.pun_data)
+                self.notify_prices_updated()
+                self.schedule_price_events()
+            self.schedule_update_pun_domani()
+            return
+
+        # Non ancora pubblicati, riprova più tardi
+        self.probe_retry_count += 1
+        self.schedule_update_pun_domani(retry=True)
 
     async def update_pun(self, now=None) -> None:
         """Aggiorna i prezzi PUN da Internet (funziona solo se schedulata)."""
+        # Chi si unisce a un aggiornamento in corso ne riceve anche gli errori,
+        # ma i nuovi tentativi li schedula solo chi lo ha eseguito
+        unito: bool = self.get_fetch_in_corso("pun") is not None
+
         # Aggiorna i dati da web
         try:
-            # Esegue l'aggiornamento
-            await self._async_update_data()
+            # Esegue l'aggiornamento (o attende quello già in corso)
+            if not await self.async_single_flight("pun", self._async_update_data):
+                return
 
             # Se non ci sono eccezioni, ha avuto successo
-            # Ricarica i tentativi per la prossima esecuzione
-            self.web_retries = WEB_RETRIES_MINUTES.copy()
+            # Azzera i tentativi per la prossima esecuzione
+            self.web_retry_count = 0
 
         # Errore nel fetch dei dati se la response non e' 200
         # pylint: disable=broad-exception-caught
         except (Exception, UpdateFailed, ServerConnectionError) as e:
-            # Errori durante l'esecuzione dell'aggiornamento, riprova dopo
-            # Annulla eventuali schedulazioni attive
-            self.clean_tokens()
+            if unito:
+                _LOGGER.debug("Errore dell'aggiornamento in corso: %s", e)
+                return
 
+            # Errori durante l'esecuzione dell'aggiornamento, riprova dopo
             # Prepara la schedulazione
-            if self.web_retries:
-                # Minuti dopo
-                retry_in_minutes: int = self.web_retries.pop(0)
+            if self.web_retry_count < WEB_RETRIES_MAX:
+                # Attesa crescente (con jitter) ad ogni tentativo
+                retry_in: timedelta = get_retry_delay(
+                    self.web_retry_count, WEB_RETRY_BASE_MINUTES, WEB_RETRY_MAX_MINUTES
+                )
+                self.web_retry_count += 1
                 _LOGGER.warning(
-                    "Errore durante l'aggiornamento dei dati, nuovo tentativo tra %s minut%s.",
-                    retry_in_minutes,
-                    "o" if retry_in_minutes == 1 else "i",
+                    "Errore durante l'aggiornamento dei dati, nuovo tentativo tra %s minuti.",
+                    round(retry_in.total_seconds() / 60),
                     exc_info=e,
                 )
-                self.schedule_token = async_call_later(
-                    self.hass, timedelta(minutes=retry_in_minutes), self.update_pun
-                )
+                self.schedule_timer("pun", self.update_pun, retry_in)
             else:
                 # Tentativi esauriti, passa al giorno dopo
                 _LOGGER.error(
                     "Errore durante l'aggiornamento via web, tentativi esauriti.",
                     exc_info=e,
                 )
+                self.web_retry_count = 0
                 next_update_pun: datetime = get_next_date(
                     dataora=dt_util.now(time_zone=tz_pun),
                     ora=self.scan_hour,
                     minuto=self.scan_minute,
                     offset=1,
                 )
-                self.schedule_token = async_track_point_in_time(
-                    self.hass, self.update_pun, next_update_pun
-                )
+                self.schedule_timer("pun", self.update_pun, next_update_pun)
                 _LOGGER.debug(
                     "Prossimo aggiornamento web: %s",
                     next_update_pun.strftime("%d/%m/%Y %H:%M:%S %z"),
@@ -399,27 +1171,11 @@ class PUNDataUpdateCoordinator(DataUpdateCoordinator):
             # Esce e attende la prossima schedulazione
             return
 
-        # Calcola la data della prossima esecuzione
-        next_update_pun = get_next_date(
-            dataora=dt_util.now(time_zone=tz_pun),
-            ora=self.scan_hour,
-            minuto=self.scan_minute,
-        )
-        if next_update_pun <= dt_util.now():
-            # Se l'evento è già trascorso, passa a domani alla stessa ora
-            next_update_pun = next_update_pun + timedelta(days=1)
-
-        # Annulla eventuali schedulazioni attive
-        self.clean_tokens()
+        # Aggiorna il costo del mese con i nuovi prezzi
+        await self.update_costi()
 
         # Schedula la prossima esecuzione
-        self.schedule_token = async_track_point_in_time(
-            self.hass, self.update_pun, next_update_pun
-        )
-        _LOGGER.debug(
-            "Prossimo aggiornamento web: %s",
-            next_update_pun.strftime("%d/%m/%Y %H:%M:%S %z"),
-        )
+        self.schedule_next_update()
 
     async def update_prezzo_zonale(self, now=None) -> None:
         """Aggiorna il prezzo zonale corrente (ogni ora)."""
@@ -430,13 +1186,19 @@ class PUNDataUpdateCoordinator(DataUpdateCoordinator):
         # Notifica che i dati sono stati aggiornati (orario prezzo zonale)
         self.async_set_updated_data({COORD_EVENT: EVENT_UPDATE_PREZZO_ZONALE})
 
+        # Al cambio di giorno aggiorna la previsione di fine mese
+        # (ore rimanenti e prezzi di oggi, prima del prossimo aggiornamento)
+        if self.previsione_mese.oggi not in (None, self.orario_prezzo.date()):
+            self.update_previsione_mese()
+            self.async_set_updated_data({COORD_EVENT: EVENT_UPDATE_PREVISIONE})
+
         # Schedula la prossima esecuzione all'ora successiva
         # (tenendo conto del cambio ora legale/solare)
         next_update_prezzo_zonale: datetime = add_timedelta_via_utc(
             dt=self.orario_prezzo, hours=1
         )
-        async_track_point_in_time(
-            self.hass, self.update_prezzo_zonale, next_update_prezzo_zonale
+        self.schedule_timer(
+            "prezzo_zonale", self.update_prezzo_zonale, next_update_prezzo_zonale
         )
 
     async def update_prezzo_zonale_15min(self, now=None) -> None:
@@ -452,6 +1214,65 @@ class PUNDataUpdateCoordinator(DataUpdateCoordinator):
         next_update_prezzo_zonale_15min: datetime = add_timedelta_via_utc(
             dt=self.orario_prezzo_15min, minutes=15
         )
-        async_track_point_in_time(
-            self.hass, self.update_prezzo_zonale_15min, next_update_prezzo_zonale_15min
+        self.schedule_timer(
+            "prezzo_zonale_15min",
+            self.update_prezzo_zonale_15min,
+            next_update_prezzo_zonale_15min,
+        )
+
+    async def update_costi(self, now=None) -> None:
+        """Aggiorna il costo del mese con i consumi delle ultime ore (ogni ora)."""
+        if self.costi is None:
+            return
+
+        # Calcola il costo solo dopo aver caricato i prezzi del mese
+        if len(self.pun_data.pun[Fascia.MONO]) > 0:
+            try:
+                if await self.costi.async_update(self.pun_data, dt_util.now()):
+                    # Notifica che il costo del mese è stato aggiornato
+                    self.async_set_updated_data({COORD_EVENT: EVENT_UPDATE_COSTI})
+
+            # pylint: disable=broad-exception-caught
+            except Exception as e:
+                _LOGGER.warning(
+                    "Errore durante il calcolo del costo del mese.", exc_info=e
+                )
+
+        # Schedula la prossima esecuzione all'ora successiva
+        # (dopo la compilazione delle statistiche orarie)
+        next_update_costi: datetime = add_timedelta_via_utc(
+            dt=get_hour_datetime(dt_util.now(time_zone=tz_pun)),
+            hours=1,
+            minutes=COST_UPDATE_MINUTE,
+        )
+        self.schedule_timer("costi", self.update_costi, next_update_costi)
+
+    def schedule_price_events(self) -> None:
+        """Calcola gli eventi di prezzo di oggi e domani e schedula il primo."""
+        self.cancel_timer("eventi")
+        self.eventi_prezzo = build_price_events(
+            self.pun_data,
+            self.price_thresholds,
+            self.cheapest_hours,
+            dt_util.now(time_zone=tz_pun),
         )
+        if self.eventi_prezzo:
+            self.schedule_timer(
+                "eventi", self.fire_price_events, self.eventi_prezzo[0].istante
+            )
+            _LOGGER.debug(
+                "%s eventi di prezzo schedulati, il primo alle %s.",
+                len(self.eventi_prezzo),
+                self.eventi_prezzo[0].istante.strftime("%d/%m/%Y %H:%M:%S %z"),
+            )
+
+    async def fire_price_events(self, now=None) -> None:
+        """Invia gli eventi di prezzo giunti all'istante previsto e schedula i successivi."""
+        adesso: datetime = dt_util.now(time_zone=tz_pun)
+        while self.eventi_prezzo and (self.eventi_prezzo[0].istante <= adesso):
+            self.hass.bus.async_fire(EVENT_PREZZO, self.eventi_prezzo.pop(0).dati)
+
+        if self.eventi_prezzo:
+            self.schedule_timer(
+                "eventi", self.fire_price_events, self.eventi_prezzo[0].istante
+            )
@@ -0,0 +1,268 @@
+"""Calcolo del costo dell'energia del mese a partire dalle statistiche dei consumi."""
+
+from datetime import date, datetime, timedelta, timezone
+import logging
+from statistics import mean
+from typing import Any
+from zoneinfo import ZoneInfo
+
+import holidays
+
+from homeassistant.const import UnitOfEnergy
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from .interfaces import Fascia, PunData
+from .utils import get_fascia_for_xml, get_hour_datetime
+
+# Ottiene il logger
+_LOGGER = logging.getLogger(__name__)
+
+# Usa sempre il fuso orario italiano (i dati del sito sono per il mercato italiano)
+tz_pun: ZoneInfo = ZoneInfo("Europe/Rome")
+
+
+class PUNCostEngine:
+    """Costo progressivo del mese per fascia, aggiornato un'ora alla volta.
+
+    I consumi orari vengono letti in blocco dalle statistiche a lungo termine
+    del sensore di energia configurato, a partire dall'ultima ora già conteggiata,
+    e moltiplicati per il PUN e per il prezzo zonale della stessa ora.
+
+    Le ore senza PUN (ad esempio se le statistiche arrivano prima dei prezzi)
+    vengono conteggiate subito nell'energia e tenute da parte con il loro
+    consumo; il costo viene aggiunto a ogni aggiornamento successivo,
+    appena i prezzi dell'ora diventano disponibili.
+    """
+
+    def __init__(self, hass: HomeAssistant, entity_id: str) -> None:
+        """Inizializza il calcolo per il sensore di energia indicato."""
+        self.hass: HomeAssistant = hass
+        self.entity_id: str = entity_id
+        self.mese: date | None = None
+        self.ultima_ora: datetime | None = None
+        self.energia: dict[Fascia, float] = {}
+        self.costo_pun: dict[Fascia, float] = {}
+        self.costo_zonale: dict[Fascia, float] = {}
+        self.ore_senza_prezzo: dict[str, float] = {}
+        self.reset(None)
+
+    def reset(self, mese: date | None) -> None:
+        """Azzera i totali e riparte dall'inizio del mese indicato."""
+        self.mese = mese
+        self.ultima_ora = (
+            datetime(mese.year, mese.month, 1, tzinfo=tz_pun)
+            if mese is not None
+            else None
+        )
+        self.energia = dict.fromkeys(Fascia, 0.0)
+        self.costo_pun = dict.fromkeys(Fascia, 0.0)
+        self.costo_zonale = dict.fromkeys(Fascia, 0.0)
+        self.ore_senza_prezzo = {}
+
+    async def async_update(self, pun_data: PunData, now: datetime) -> bool:
+        """Aggiunge ai totali le ore concluse dopo l'ultimo aggiornamento.
+
+        Restituisce True se sono state conteggiate nuove ore.
+        """
+
+        # Fine dell'ultima ora conclusa e mese di riferimento
+        fine: datetime = get_hour_datetime(now.astimezone(tz_pun))
+        mese: date = date(fine.year, fine.month, 1)
+        if self.mese != mese:
+            # Nuovo mese (o primo avvio): riparte da zero
+            self.reset(mese)
+
+        # Aggiunge il costo delle ore conteggiate prima dell'arrivo dei prezzi
+        aggiornato: bool = self.add_prezzi_mancanti(pun_data)
+        if (self.ultima_ora is None) or (self.ultima_ora >= fine):
+            return aggiornato
+
+        # Legge in blocco i consumi orari dalle statistiche (in kWh); il recorder
+        # viene importato solo qui perché è una dipendenza facoltativa
+        from homeassistant.components.recorder import get_instance  # noqa: PLC0415
+        from homeassistant.components.recorder.statistics import (  # noqa: PLC0415
+            statistics_during_period,
+        )
+
+        statistiche: dict[str, list[dict[str, Any]]] = await get_instance(
+            self.hass
+        ).async_add_executor_job(
+            statistics_during_period,
+            self.hass,
+            self.ultima_ora,
+            fine,
+            {self.entity_id},
+            "hour",
+            {"energy": UnitOfEnergy.KILO_WATT_HOUR},
+            {"change"},
+        )
+        righe: list[dict[str, Any]] = statistiche.get(self.entity_id, [])
+        if not righe:
+            _LOGGER.debug(
+                "Nessuna statistica di consumo per %s dalle %s.",
+                self.entity_id,
+                self.ultima_ora,
+            )
+            return aggiornato
+
+        # Aggiunge il costo di ciascuna ora
+        it_holidays = holidays.IT()  # type: ignore[attr-defined]
+        for riga in righe:
+            # Dalla versione 2023.3 l'orario è un timestamp
+            inizio_riga: datetime | float = riga["start"]
+            inizio: datetime = (
+                inizio_riga
+                if isinstance(inizio_riga, datetime)
+                else dt_util.utc_from_timestamp(inizio_riga)
+            )
+            ora: datetime = inizio.astimezone(tz_pun)
+            if (energia := riga.get("change")) is not None:
+                self.add_ora(pun_data, ora, energia, ora.date() in it_holidays)
+
+            # Avanza solo fino all'ultima ora presente nelle statistiche
+            self.ultima_ora = max(
+                self.ultima_ora, (inizio + timedelta(hours=1)).astimezone(tz_pun)
+            )
+
+        _LOGGER.debug(
+            "Costo del mese aggiornato fino alle %s: %s € (%s kWh).",
+            self.ultima_ora,
+            round(self.costo_pun[Fascia.MONO], 2),
+            round(self.energia[Fascia.MONO], 3),
+        )
+        return True
+
+    def add_ora(
+        self, pun_data: PunData, ora: datetime, energia: float, festivo: bool
+    ) -> None:
+        """Aggiunge ai totali il consumo di un'ora con i relativi prezzi.
+
+        Se manca il PUN dell'ora conteggia solo l'energia: il costo verrà
+        aggiunto da add_prezzi_mancanti() all'arrivo dei prezzi.
+        """
+        fasce: list[Fascia] = get_fasce_ora(ora, festivo)
+        for f in fasce:
+            self.energia[f] += energia
+        prezzo_pun, prezzo_zonale = get_prezzi_ora(pun_data, ora)
+        if prezzo_pun is None:
+            self.ore_senza_prezzo[ora.isoformat()] = energia
+            return
+        self.add_costo(fasce, energia, prezzo_pun, prezzo_zonale)
+
+    def add_costo(
+        self,
+        fasce: list[Fascia],
+        energia: float,
+        prezzo_pun: float,
+        prezzo_zonale: float | None,
+    ) -> None:
+        """Aggiunge il costo dell'energia di un'ora alle fasce indicate."""
+        for f in fasce:
+            self.costo_pun[f] += energia * prezzo_pun
+            if prezzo_zonale is not None:
+                self.costo_zonale[f] += energia * prezzo_zonale
+
+    def add_prezzi_mancanti(self, pun_data: PunData) -> bool:
+        """Aggiunge il costo delle ore senza PUN i cui prezzi sono ora disponibili.
+
+        Restituisce True se è stato aggiunto il costo di almeno un'ora.
+        """
+        if not self.ore_senza_prezzo:
+            return False
+        it_holidays = holidays.IT()  # type: ignore[attr-defined]
+        aggiornato: bool = False
+        for orario, energia in list(self.ore_senza_prezzo.items()):
+            ora: datetime = datetime.fromisoformat(orario).astimezone(tz_pun)
+            prezzo_pun, prezzo_zonale = get_prezzi_ora(pun_data, ora)
+            if prezzo_pun is None:
+                continue
+            self.add_costo(
+                get_fasce_ora(ora, ora.date() in it_holidays),
+                energia,
+                prezzo_pun,
+                prezzo_zonale,
+            )
+            del self.ore_senza_prezzo[orario]
+            aggiornato = True
+        return aggiornato
+
+    def as_dict(self) -> dict[str, Any]:
+        """Restituisce lo stato del calcolo (per il ripristino al riavvio)."""
+        return {
+            "mese": self.mese.isoformat() if self.mese is not None else None,
+            "ultima_ora": self.ultima_ora.isoformat()
+            if self.ultima_ora is not None
+            else None,
+            "energia": {f.name: v for f, v in self.energia.items()},
+            "costo_pun": {f.name: v for f, v in self.costo_pun.items()},
+            "costo_zonale": {f.name: v for f, v in self.costo_zonale.items()},
+            "ore_senza_prezzo": dict(self.ore_senza_prezzo),
+        }
+
+    def from_dict(self, dati: dict[str, Any]) -> None:
+        """Ripristina lo stato del calcolo salvato in precedenza."""
+        try:
+            mese: date = date.fromisoformat(dati["mese"])
+            ultima_ora: datetime = datetime.fromisoformat(dati["ultima_ora"])
+            self.reset(mese)
+            self.ultima_ora = ultima_ora.astimezone(tz_pun)
+            for f in Fascia:
+                self.energia[f] = float(dati["energia"].get(f.name, 0.0))
+                self.costo_pun[f] = float(dati["costo_pun"].get(f.name, 0.0))
+                self.costo_zonale[f] = float(dati["costo_zonale"].get(f.name, 0.0))
+            self.ore_senza_prezzo = {
+                str(orario): float(energia)
+                for orario, energia in dati.get("ore_senza_prezzo", {}).items()
+            }
+        except (AttributeError, KeyError, TypeError, ValueError):
+            _LOGGER.debug("Stato del costo del mese non valido, ricalcolo completo.")
+            self.reset(None)
+
+
+def get_fasce_ora(ora: datetime, festivo: bool) -> list[Fascia]:
+    """Restituisce le fasce a cui appartiene l'ora indicata.
+
+    Oltre alla fascia dell'ora comprende sempre il totale mensile (MONO)
+    e, per le ore in F2 o F3, la fascia F23.
+    """
+    fascia: Fascia = get_fascia_for_xml(ora.date(), festivo, ora.hour)
+    if fascia in (Fascia.F2, Fascia.F3):
+        return [Fascia.MONO, fascia, Fascia.F23]
+    return [Fascia.MONO, fascia]
+
+
+def get_prezzi_ora(
+    pun_data: PunData, ora: datetime
+) -> tuple[float | None, float | None]:
+    """Restituisce il PUN e il prezzo zonale dell'ora indicata.
+
+    Usa i prezzi orari se disponibili, altrimenti la media dei quattro
+    prezzi a 15 minuti della stessa ora.
+    """
+    chiave: str = str(ora)
+    if chiave in pun_data.storico_orari:
+        return pun_data.storico_orari[chiave]
+    if (chiave in pun_data.pun_orari) or (chiave in pun_data.prezzi_zonali):
+        return pun_data.pun_orari.get(chiave), pun_data.prezzi_zonali.get(chiave)
+
+    # Prezzi a 15 minuti dell'ora (calcolati in UTC per i cambi ora)
+    inizio_utc: datetime = ora.astimezone(timezone.utc)
+    quarti: list[tuple[float | None, float | None]] = []
+    for q in range(4):
+        chiave = str((inizio_utc + timedelta(minutes=15 * q)).astimezone(tz_pun))
+        if chiave in pun_data.storico_15min:
+            quarti.append(pun_data.storico_15min[chiave])
+        else:
+            quarti.append(
+                (
+                    pun_data.pun_15min.get(chiave),
+                    pun_data.prezzi_zonali_15min.get(chiave),
+                )
+            )
+    pun: list[float] = [q[0] for q in quarti if q[0] is not None]
+    zonali: list[float] = [q[1] for q in quarti if q[1] is not None]
+    return (
+        mean(pun) if len(pun) == 4 else None,
+        mean(zonali) if len(zonali) == 4 else None,
+    )
@@ -0,0 +1,328 @@
+"""Sorgenti dati per gli archivi dei prezzi di pun_sensor."""
+
+from abc import ABC, abstractmethod
+import asyncio
+from collections.abc import AsyncIterator, Iterable
+from datetime import date, timedelta
+import io
+import logging
+from pathlib import Path
+import time
+import zipfile
+
+from aiohttp import ClientError, ClientSession, ServerConnectionError
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from .const import (
+    DOWNLOAD_CHUNK_DAYS,
+    DOWNLOAD_CHUNK_RETRIES,
+    DOWNLOAD_MAX_CONCURRENCY,
+    DOWNLOAD_RETRY_SECONDS,
+)
+from .utils import elapsed_ms
+
+# Ottiene il logger
+_LOGGER = logging.getLogger(__name__)
+
+# URL del sito Mercato elettrico (date nel formato YYYYMMDD)
+GME_DOWNLOAD_URL: str = "https://gme.mercatoelettrico.org/DesktopModules/GmeDownload/API/ExcelDownload/downloadzipfile?DataInizio={inizio}&DataFine={fine}&Date={fine}&Mercato=MGP&Settore=Prezzi&FiltroDate=InizioFine"
+
+# Header delle richieste al sito Mercato elettrico
+GME_HEADERS: dict[str, str] = {
+    "moduleid": "12103",
+    "referer": "https://gme.mercatoelettrico.org/en-us/Home/Results/Electricity/MGP/Download?valore=Prezzi",
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": "Windows",
+    "sec-fetch-dest": "empty",
+    "sec-fetch-mode": "cors",
+    "sec-fetch-site": "same-origin",
+    "sec-gpc": "1",
+    "tabid": "1749",
+    "userid": "-1",
+}
+
+
+class PUNDataSource(ABC):
+    """Sorgente generica degli archivi ZIP con i file XML dei prezzi MGP."""
+
+    # Byte letti durante l'ultima richiesta
+    last_bytes: int = 0
+
+    # Durata complessiva e latenza di ogni blocco dell'ultima richiesta
+    last_duration_ms: float = 0.0
+    last_latencies_ms: tuple[float, ...] = ()
+
+    # Tentativi ripetuti durante l'ultima richiesta
+    last_retries: int = 0
+
+    # Codice di stato HTTP dell'ultima risposta (None se la sorgente non usa HTTP)
+    last_status: int | None = None
+
+    @abstractmethod
+    async def async_get_archive(
+        self, date_start: date, date_end: date
+    ) -> zipfile.ZipFile:
+        """Restituisce un archivio ZIP con i file XML dei giorni richiesti (estremi inclusi)."""
+
+    async def async_iter_archives(
+        self, date_start: date, date_end: date
+    ) -> AsyncIterator[zipfile.ZipFile]:
+        """Restituisce gli archivi dei giorni richiesti man mano che sono disponibili.
+
+        Di default un unico archivio con tutti i giorni dell'intervallo.
+        """
+        inizio: float = time.perf_counter()
+        archive: zipfile.ZipFile = await self.async_get_archive(date_start, date_end)
+        self.last_duration_ms = elapsed_ms(inizio)
+        self.last_latencies_ms = (self.last_duration_ms,)
+        yield archive
+
+
+class GMEDataSource(PUNDataSource):
+    """Download degli archivi dal sito del GME (Mercato elettrico).
+
+    Gli intervalli lunghi vengono divisi in blocchi di giorni, scaricati in
+    parallelo (fino a un limite) sulla sessione HTTP condivisa di Home Assistant
+    e ritentati singolarmente in caso di errore.
+    """
+
+    def __init__(
+        self,
+        session: ClientSession,
+        chunk_days: int = DOWNLOAD_CHUNK_DAYS,
+        max_concurrency: int = DOWNLOAD_MAX_CONCURRENCY,
+        retries: int = DOWNLOAD_CHUNK_RETRIES,
+    ) -> None:
+        """Inizializza la sorgente con la sessione HTTP di Home Assistant."""
+        self.session: ClientSession = session
+        self.chunk_days: int = chunk_days
+        self.max_concurrency: int = max_concurrency
+        self.retries: int = retries
+
+    async def async_get_archive(
+        self, date_start: date, date_end: date
+    ) -> zipfile.ZipFile:
+        """Scarica l'archivio ZIP con i file XML dei prezzi per l'intervallo di date."""
+        archivi: list[zipfile.ZipFile] = [
+            archive async for archive in self.async_iter_archives(date_start, date_end)
+        ]
+        if len(archivi) == 1:
+            return archivi[0]
+
+        # Unisce i blocchi in un unico archivio
+        members: dict[str, bytes] = {
+            fn: archive.read(fn) for archive in archivi for fn in archive.namelist()
+        }
+        for archive in archivi:
+            archive.close()
+        return build_archive(sorted(members.items()))
+
+    async def async_iter_archives(
+        self, date_start: date, date_end: date
+    ) -> AsyncIterator[zipfile.ZipFile]:
+        """Scarica i blocchi dell'intervallo in parallelo, restituendoli appena completati."""
+        inizio: float = time.perf_counter()
+        self.last_bytes = 0
+        self.last_retries = 0
+        self.last_status = None
+        latenze: list[float] = []
+        limite = asyncio.Semaphore(self.max_concurrency)
+
+        async def async_get_blocco(
+            blocco_inizio: date, blocco_fine: date
+        ) -> zipfile.ZipFile:
+            """Scarica un blocco, al massimo max_concurrency alla volta."""
+            async with limite:
+                inizio_blocco: float = time.perf_counter()
+                archive: zipfile.ZipFile = await self.async_get_chunk(
+                    blocco_inizio, blocco_fine
+                )
+                latenze.append(elapsed_ms(inizio_blocco))
+                return archive
+
+        blocchi: list[asyncio.Task[zipfile.ZipFile]] = [
+            asyncio.create_task(async_get_blocco(blocco_inizio, blocco_fine))
+            for blocco_inizio, blocco_fine in split_date_range(
+                date_start, date_end, self.chunk_days
+            )
+        ]
+        try:
+            for completato in asyncio.as_completed(blocchi):
+                archive: zipfile.ZipFile = await completato
+                self.last_duration_ms = elapsed_ms(inizio)
+                self.last_latencies_ms = tuple(latenze)
+                yield archive
+        finally:
+            # Annulla i blocchi ancora in corso in caso di errore
+            for blocco in blocchi:
+                blocco.cancel()
+
+    async def async_get_chunk(
+        self, date_start: date, date_end: date
+    ) -> zipfile.ZipFile:
+        """Scarica un blocco di giorni, ritentando in caso di errore."""
+        tentativo: int = 0
+        while True:
+            try:
+                return await self.async_download(date_start, date_end)
+            except (ClientError, TimeoutError, UpdateFailed) as e:  # noqa: PERF203
+                if tentativo >= self.retries:
+                    # Solo l'ultimo tentativo fallito viene segnalato come errore
+                    _LOGGER.error(
+                        "Download dal %s al %s fallito dopo %s tentativi: %s",
+                        date_start,
+                        date_end,
+                        tentativo + 1,
+                        e,
+                    )
+                    raise
+                attesa: int = DOWNLOAD_RETRY_SECONDS * (2**tentativo)
+                tentativo += 1
+                self.last_retries += 1
+                _LOGGER.debug(
+                    "Download dal %s al %s fallito (%s), nuovo tentativo tra %s secondi.",
+                    date_start,
+                    date_end,
+                    e,
+                    attesa,
+                )
+                await asyncio.sleep(attesa)
+
+    async def async_download(self, date_start: date, date_end: date) -> zipfile.ZipFile:
+        """Effettua una singola richiesta al sito per l'intervallo di date."""
+
+        # URL del sito Mercato elettrico con le date in formato stringa
+        download_url: str = GME_DOWNLOAD_URL.format(
+            inizio=date_start.strftime("%Y%m%d"), fine=date_end.strftime("%Y%m%d")
+        )
+
+        # Effettua il download dello ZIP con i file XML
+        _LOGGER.debug(
+            "Inizio download file ZIP con XML (%s - %s).", date_start, date_end
+        )
+        async with self.session.get(download_url, headers=GME_HEADERS) as response:
+            # Aspetta la request
+            bytes_response = await response.read()
+            self.last_bytes += len(bytes_response)
+            self.last_status = response.status
+
+            # Se la richiesta NON e' andata a buon fine ritorna l'errore subito
+            # (registrato da async_get_chunk se non ci sono altri tentativi)
+            if response.status != 200:
+                _LOGGER.debug("Richiesta fallita con errore %s", response.status)
+                raise ServerConnectionError(
+                    f"Richiesta fallita con errore {response.status}"
+                )
+
+            # La richiesta e' andata a buon fine, tenta l'estrazione
+            try:
+                return zipfile.ZipFile(io.BytesIO(bytes_response), "r")
+
+            # Ritorna error se l'output non è uno ZIP, o ha un errore IO
+            except (zipfile.BadZipfile, OSError) as e:  # not a zip:
+                _LOGGER.debug(
+                    "Download fallito con URL: %s, lunghezza %s, risposta %s",
+                    download_url,
+                    response.content_length,
+                    response.status,
+                )
+                raise UpdateFailed("Archivio ZIP scaricato dal sito non valido.") from e
+
+
+class LocalDataSource(PUNDataSource):
+    """Lettura degli archivi da una cartella locale (o condivisa in rete).
+
+    La cartella può contenere i file XML del GME e/o archivi ZIP che li
+    contengono, con il nome che inizia per la data (es. 20250101MGPPrezzi.xml).
+    """
+
+    def __init__(self, hass: HomeAssistant, path: str) -> None:
+        """Inizializza la sorgente con il percorso della cartella o dello ZIP."""
+        self.hass: HomeAssistant = hass
+        self.path: Path = Path(path)
+
+    async def async_get_archive(
+        self, date_start: date, date_end: date
+    ) -> zipfile.ZipFile:
+        """Legge i file XML dei giorni richiesti (nel thread executor)."""
+        return await self.hass.async_add_executor_job(
+            self._get_archive, date_start, date_end
+        )
+
+    def _get_archive(self, date_start: date, date_end: date) -> zipfile.ZipFile:
+        """Costruisce l'archivio in memoria con i file trovati nel percorso."""
+        if not self.path.exists():
+            raise UpdateFailed(f"Percorso dei dati locali non trovato: {self.path}")
+
+        # Singolo archivio ZIP oppure cartella con XML e ZIP
+        files: list[Path] = (
+            [self.path] if self.path.is_file() else sorted(self.path.iterdir())
+        )
+        members: dict[str, bytes] = {}
+        try:
+            for file in files:
+                if file.suffix.lower() == ".xml":
+                    if is_member_in_range(file.name, date_start, date_end):
+                        members[file.name] = file.read_bytes()
+                elif file.suffix.lower() == ".zip":
+                    with zipfile.ZipFile(file, "r") as archive:
+                        for fn in archive.namelist():
+                            if fn.lower().endswith(".xml") and is_member_in_range(
+                                fn, date_start, date_end
+                            ):
+                                members[Path(fn).name] = archive.read(fn)
+
+        except (zipfile.BadZipfile, OSError) as e:
+            raise UpdateFailed(
+                f"Errore durante la lettura dei dati locali: {self.path}"
+            ) from e
+
+        self.last_bytes = sum(len(content) for content in members.values())
+        return build_archive(members.items())
+
+
+def get_data_source(
+    hass: HomeAssistant, session: ClientSession, path: str | None
+) -> PUNDataSource:
+    """Restituisce la sorgente dati configurata (sito GME se non c'è un percorso locale)."""
+    if path:
+        return LocalDataSource(hass, path)
+    return GMEDataSource(session)
+
+
+def split_date_range(
+    date_start: date, date_end: date, giorni: int
+) -> list[tuple[date, date]]:
+    """Divide l'intervallo di date (estremi inclusi) in blocchi di al massimo `giorni` giorni."""
+    blocchi: list[tuple[date, date]] = []
+    while date_start <= date_end:
+        fine: date = min(date_start + timedelta(days=giorni - 1), date_end)
+        blocchi.append((date_start, fine))
+        date_start = fine + timedelta(days=1)
+    return blocchi
+
+
+def is_member_in_range(fn: str, date_start: date, date_end: date) -> bool:
+    """Verifica se il nome del file (che inizia con YYYYMMDD) è nell'intervallo di date.
+
+    I file con un nome non riconosciuto vengono sempre inclusi
+    (il parsing userà comunque la data contenuta nell'XML).
+    """
+    nome: str = Path(fn).name
+    try:
+        giorno: date = date(int(nome[0:4]), int(nome[4:6]), int(nome[6:8]))
+    except ValueError:
+        return True
+    return date_start <= giorno <= date_end
+
+
+def build_archive(members: Iterable[tuple[str, bytes]]) -> zipfile.ZipFile:
+    """Crea un archivio ZIP in memoria (senza compressione) con i file indicati."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        for fn, content in members:
+            archive.writestr(fn, content)
+    buffer.seek(0)
+    return zipfile.ZipFile(buffer, "r")
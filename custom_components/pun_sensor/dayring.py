@@ -0,0 +1,152 @@
+"""Prezzi di oggi e domani in due posizioni che si scambiano a mezzanotte."""
+
+from collections.abc import Callable, Iterator
+from datetime import date, datetime, timedelta
+
+from .utils import TabellaGiorno, get_day_table, get_ordinal_hour, get_periodo_15min
+
+
+class PrezziGiorno:
+    """Prezzi di un giorno in ordine di ora (o di periodo di 15 minuti)."""
+
+    __slots__ = ("chiavi", "giorno", "valori")
+
+    def __init__(self) -> None:
+        """Inizializza la posizione senza alcun giorno."""
+        self.giorno: date | None = None
+        self.chiavi: tuple[str, ...] = ()
+        self.valori: list[float | None] = []
+
+    def set_giorno(self, giorno: date, prezzi_15min: bool) -> None:
+        """Assegna il giorno alla posizione, senza alcun prezzo."""
+        tabella: TabellaGiorno = get_day_table(giorno)
+        self.giorno = giorno
+        self.chiavi = tabella.chiavi_15min if prezzi_15min else tabella.chiavi_ore
+        self.valori.clear()
+
+    def get(
+        self, indice: int, condivisi: dict[str, float | None] | None = None
+    ) -> float | None:
+        """Restituisce il prezzo in posizione indice (da condivisi, se non caricato)."""
+        if indice < len(self.valori):
+            return self.valori[indice]
+        if condivisi is not None and indice < len(self.chiavi):
+            return condivisi.get(self.chiavi[indice])
+        return None
+
+    def items(
+        self, condivisi: dict[str, float | None] | None = None
+    ) -> Iterator[tuple[str, float | None]]:
+        """Restituisce orari e prezzi del giorno (None per quelli mancanti)."""
+        for indice, chiave in enumerate(self.chiavi):
+            yield chiave, self.get(indice, condivisi)
+
+
+class AnelloGiorni:
+    """Prezzi di oggi e domani indicizzati per ora (o periodo) del giorno.
+
+    Al cambio di giorno le due posizioni si scambiano: domani diventa oggi
+    e la posizione liberata resta vuota fino all'arrivo dei nuovi prezzi,
+    senza convertire di nuovo orari o dizionari.
+
+    È l'unica copia dei prezzi tenuta dal sensore: i dizionari completi
+    restano nel coordinator, da cui l'anello si ricarica tramite la sorgente.
+    In modalità condivisa (basso consumo di memoria) l'anello non copia
+    nemmeno i valori: tiene solo le chiavi dei due giorni (dalle tabelle in
+    cache) e legge i prezzi dalla sorgente a ogni richiesta.
+    """
+
+    def __init__(
+        self,
+        sorgente: Callable[[], dict[str, float | None]],
+        prezzi_15min: bool = False,
+        condiviso: bool = False,
+    ) -> None:
+        """Inizializza l'anello vuoto.
+
+        Args:
+        sorgente (Callable): restituisce i prezzi del coordinator indicizzati per orario.
+        prezzi_15min (bool): True per i prezzi a 15 minuti, False per quelli orari.
+        condiviso (bool): True per leggere i prezzi dalla sorgente senza copiarli.
+
+        """
+        self.sorgente: Callable[[], dict[str, float | None]] = sorgente
+        self.prezzi_15min: bool = prezzi_15min
+        self.condiviso: bool = condiviso
+        self.posizioni: tuple[PrezziGiorno, PrezziGiorno] = (
+            PrezziGiorno(),
+            PrezziGiorno(),
+        )
+        self.indice_oggi: int = 0
+
+    @property
+    def oggi(self) -> PrezziGiorno:
+        """Prezzi di oggi."""
+        return self.posizioni[self.indice_oggi]
+
+    @property
+    def domani(self) -> PrezziGiorno:
+        """Prezzi di domani."""
+        return self.posizioni[1 - self.indice_oggi]
+
+    def load(self, oggi: date, prezzi: dict[str, float | None] | None = None) -> None:
+        """Carica i prezzi di oggi e domani dal coordinator.
+
+        Args:
+        oggi (date): giorno da caricare nella posizione di oggi.
+        prezzi (dict | None): prezzi da caricare al posto di quelli del
+            coordinator (ad esempio quelli ripristinati all'avvio).
+
+        """
+        if (prezzi is None) and not self.condiviso:
+            prezzi = self.sorgente()
+        self.indice_oggi = 0
+        for posizione, giorno in zip(
+            self.posizioni, (oggi, oggi + timedelta(days=1)), strict=True
+        ):
+            posizione.set_giorno(giorno, self.prezzi_15min)
+            if prezzi is not None:
+                posizione.valori.extend(
+                    prezzi.get(chiave) for chiave in posizione.chiavi
+                )
+
+    def advance(self, giorno: date) -> bool:
+        """Porta l'anello al giorno indicato, scambiando le posizioni se è domani.
+
+        Returns:
+            bool: False se il giorno non è né oggi né domani (prezzi da ricaricare).
+
+        """
+        if self.oggi.giorno == giorno:
+            return True
+        if self.domani.giorno != giorno:
+            return False
+
+        # Domani diventa oggi, la posizione di ieri passa a domani (vuota)
+        ieri: PrezziGiorno = self.oggi
+        self.indice_oggi = 1 - self.indice_oggi
+        ieri.set_giorno(giorno + timedelta(days=1), self.prezzi_15min)
+        return True
+
+    def get_prezzo(self, orario: datetime) -> float | None:
+        """Restituisce il prezzo dell'ora (o del periodo) che inizia all'orario indicato.
+
+        Se l'orario non è né oggi né domani, ricarica l'anello dal coordinator.
+        """
+        if not self.advance(orario.date()):
+            self.load(orario.date())
+        indice: int = (
+            get_periodo_15min(orario) if self.prezzi_15min else get_ordinal_hour(orario)
+        ) - 1
+        return self.oggi.get(indice, self.get_condivisi()) if indice >= 0 else None
+
+    def get_condivisi(self) -> dict[str, float | None] | None:
+        """Restituisce i prezzi della sorgente se l'anello è condiviso, altrimenti None."""
+        return self.sorgente() if self.condiviso else None
+
+    def get_attributes(self) -> dict[str, float | None]:
+        """Restituisce i prezzi di oggi e domani indicizzati per orario (per gli attributi)."""
+        condivisi: dict[str, float | None] | None = self.get_condivisi()
+        attributi: dict[str, float | None] = dict(self.oggi.items(condivisi))
+        attributi.update(self.domani.items(condivisi))
+        return attributi
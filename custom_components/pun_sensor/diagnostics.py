@@ -0,0 +1,79 @@
+"""Diagnostica di pun_sensor."""
+
+from pathlib import Path
+import tracemalloc
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import PUNDataUpdateCoordinator
+from .utils import XML_BACKEND, get_deep_size
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, config: ConfigEntry
+) -> dict[str, Any]:
+    """Restituisce i dati di diagnostica della configurazione."""
+
+    # Recupera il coordinator
+    coordinator: PUNDataUpdateCoordinator = hass.data[DOMAIN][config.entry_id]
+
+    # Memoria occupata dai dati (e allocata dal codice dell'integrazione)
+    memoria: dict[str, Any] = {
+        "modalita_risparmio": coordinator.memory_budget,
+        "dati_byte": get_deep_size(coordinator.pun_data),
+        "archivi_condivisi_byte": get_deep_size(coordinator.mirror_members),
+        "giorni_esaminati_byte": get_deep_size(coordinator.giorni_xml),
+        "tracemalloc_byte": await hass.async_add_executor_job(get_traced_size)
+        if tracemalloc.is_tracing()
+        else None,
+    }
+
+    return {
+        "config": {"data": dict(config.data), "options": dict(config.options)},
+        "memoria": memoria,
+        "sorgente_dati": type(coordinator.data_source).__name__
+        if coordinator.mirror_client is None
+        else "PUNMirrorClient",
+        "metriche": coordinator.metrics.as_dict(),
+        "tracce": [traccia.as_dict() for traccia in coordinator.tracce],
+        "parser_xml": XML_BACKEND.nome,
+        "timer_attivi": len(coordinator.timers),
+        "timer": sorted(coordinator.timers),
+        "dati": {
+            "zona": coordinator.pun_data.zona.name
+            if coordinator.pun_data.zona is not None
+            else None,
+            "valori_fasce": {
+                fascia.value: len(valori)
+                for fascia, valori in coordinator.pun_data.pun.items()
+            },
+            "pun_orari": len(coordinator.pun_data.pun_orari),
+            "prezzi_zonali": len(coordinator.pun_data.prezzi_zonali),
+            "pun_15min": len(coordinator.pun_data.pun_15min),
+            "prezzi_zonali_15min": len(coordinator.pun_data.prezzi_zonali_15min),
+            "completezza": {
+                str(giorno): completezza.as_dict()
+                for giorno, completezza in sorted(
+                    coordinator.pun_data.completezza.items()
+                )
+            },
+        },
+        "valori_pun": {
+            fascia.value: valore
+            for fascia, valore in coordinator.pun_values.value.items()
+        },
+    }
+
+
+def get_traced_size() -> int:
+    """Restituisce i byte allocati dai file dell'integrazione ancora in uso.
+
+    Richiede che tracemalloc sia attivo (es. avviando Python con -X tracemalloc).
+    """
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        (tracemalloc.Filter(True, str(Path(__file__).parent / "*")),)
+    )
+    return sum(stat.size for stat in snapshot.statistics("filename"))
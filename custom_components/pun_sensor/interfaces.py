@@ -1,6 +1,11 @@
 """Interfacce di gestione di pun_sensor."""
 
+from collections.abc import Iterable
+from datetime import date, datetime
 from enum import Enum
+from typing import Any
+
+from .const import FETCH_TRACE_AVVISI
 
 
 class PunData:
@@ -28,6 +33,64 @@ class PunData:
         self.prezzi_zonali_15min: dict[str, float | None] = {}
         self.pun_15min: dict[str, float | None] = {}
 
+        # Prezzi PUN e zonali dei giorni passati del mese (per il calcolo dei costi)
+        self.storico_orari: dict[str, tuple[float | None, float | None]] = {}
+        self.storico_15min: dict[str, tuple[float | None, float | None]] = {}
+
+        # Periodi disponibili per ciascun giorno esaminato
+        self.completezza: dict[date, Completezza] = {}
+
+        # Ultimo giorno conteggiato nelle liste di pun (oggi, all'ultima unione)
+        # e numero di prezzi all'inizio di ciascuna lista relativi al mese precedente
+        # (inclusi nei primi giorni del mese se 'usa dati reali' non è impostato)
+        self.giorno_fasce: date | None = None
+        self.prezzi_mese_precedente: dict[Fascia, int] = {}
+
+        # Numero e somma dei prezzi del mese di giorno_fasce per ciascuna fascia
+        # (esclusi quelli del mese precedente), aggiornati a ogni prezzo aggiunto
+        self.prezzi_mese: dict[Fascia, tuple[int, float]] = {}
+
+
+class Completezza:
+    """Periodi con un prezzo disponibile in un giorno (un bit per ora o per 15 minuti).
+
+    Gli attributi hanno lo stesso nome dei dizionari dei prezzi di PunData;
+    il bit n corrisponde all'ora (o al periodo) n + 1 del giorno.
+    """
+
+    def __init__(self, ore: int) -> None:
+        """Inizializza il giorno senza alcun prezzo."""
+        self.ore: int = ore
+        self.pun_orari: int = 0
+        self.prezzi_zonali: int = 0
+        self.pun_15min: int = 0
+        self.prezzi_zonali_15min: int = 0
+
+    def get_periodi(self, nome: str) -> int:
+        """Restituisce il numero di periodi del giorno per i prezzi indicati."""
+        return 4 * self.ore if nome.endswith("_15min") else self.ore
+
+    def is_complete(self, nome: str) -> bool:
+        """Verifica se sono presenti tutti i prezzi indicati del giorno."""
+        return getattr(self, nome) == (1 << self.get_periodi(nome)) - 1
+
+    def get_missing(self, nome: str) -> list[int]:
+        """Restituisce le ore (o i periodi) senza prezzo, a partire da 1."""
+        bitmap: int = getattr(self, nome)
+        return [1 + n for n in range(self.get_periodi(nome)) if not (bitmap >> n) & 1]
+
+    def as_dict(self) -> dict[str, str]:
+        """Restituisce i periodi disponibili sul totale (per la diagnostica)."""
+        return {
+            nome: f"{getattr(self, nome).bit_count()}/{self.get_periodi(nome)}"
+            for nome in (
+                "pun_orari",
+                "prezzi_zonali",
+                "pun_15min",
+                "prezzi_zonali_15min",
+            )
+        }
+
 
 class Fascia(Enum):
     """Enumerazione con i tipi di fascia oraria."""
@@ -52,6 +115,112 @@ class PunValues:
     }
 
 
+class FetchMetrics:
+    """Classe che contiene le metriche dell'ultimo aggiornamento dei prezzi."""
+
+    def __init__(self) -> None:
+        """Inizializza le metriche a zero."""
+        self.ultimo_aggiornamento: datetime | None = None
+        self.durata_download_ms: float = 0.0
+        self.byte_scaricati: int = 0
+        self.blocchi_scaricati: int = 0
+        self.latenze_blocchi_ms: tuple[float, ...] = ()
+        self.velocita_download_kbs: float = 0.0
+        self.file_zip: int = 0
+        self.record_elaborati: int = 0
+        self.durata_parsing_ms: float = 0.0
+        self.durata_medie_ms: float = 0.0
+        self.durata_entita_ms: float = 0.0
+
+        # Aggiornamenti concorrenti (totali dall'avvio)
+        self.aggiornamenti_uniti: int = 0
+        self.aggiornamenti_accodati: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Restituisce le metriche come dizionario (per la diagnostica)."""
+        return {
+            "ultimo_aggiornamento": self.ultimo_aggiornamento.isoformat()
+            if self.ultimo_aggiornamento is not None
+            else None,
+            "durata_download_ms": self.durata_download_ms,
+            "byte_scaricati": self.byte_scaricati,
+            "blocchi_scaricati": self.blocchi_scaricati,
+            "latenze_blocchi_ms": list(self.latenze_blocchi_ms),
+            "velocita_download_kbs": self.velocita_download_kbs,
+            "file_zip": self.file_zip,
+            "record_elaborati": self.record_elaborati,
+            "durata_parsing_ms": self.durata_parsing_ms,
+            "durata_medie_ms": self.durata_medie_ms,
+            "durata_entita_ms": self.durata_entita_ms,
+            "aggiornamenti_uniti": self.aggiornamenti_uniti,
+            "aggiornamenti_accodati": self.aggiornamenti_accodati,
+        }
+
+
+class FetchTrace:
+    """Traccia di un singolo download dei prezzi (conservata per la diagnostica)."""
+
+    def __init__(
+        self,
+        tipo: str,
+        sorgente: str,
+        date_start: date,
+        date_end: date,
+        inizio: datetime,
+    ) -> None:
+        """Inizializza la traccia di un download appena iniziato."""
+        self.tipo: str = tipo
+        self.sorgente: str = sorgente
+        self.date_start: date = date_start
+        self.date_end: date = date_end
+        self.inizio: datetime = inizio
+        self.esito: str = "in_corso"
+        self.errore: str | None = None
+        self.stato_http: int | None = None
+        self.byte_scaricati: int = 0
+        self.latenze_blocchi_ms: tuple[float, ...] = ()
+        self.tentativi_ripetuti: int = 0
+        self.file_zip: int = 0
+        self.record_elaborati: int = 0
+        self.durata_download_ms: float = 0.0
+        self.durata_parsing_ms: float = 0.0
+        self.durata_ms: float = 0.0
+        self.giorni_incompleti: list[date] = []
+        self.avvisi: list[str] = []
+        self.avvisi_scartati: int = 0
+
+    def add_avvisi(self, avvisi: Iterable[str]) -> None:
+        """Aggiunge gli avvisi dell'esame dei file, fino a FETCH_TRACE_AVVISI."""
+        for avviso in avvisi:
+            if len(self.avvisi) < FETCH_TRACE_AVVISI:
+                self.avvisi.append(avviso)
+            else:
+                self.avvisi_scartati += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Restituisce la traccia come dizionario (per la diagnostica)."""
+        return {
+            "tipo": self.tipo,
+            "sorgente": self.sorgente,
+            "intervallo": [self.date_start.isoformat(), self.date_end.isoformat()],
+            "inizio": self.inizio.isoformat(),
+            "esito": self.esito,
+            "errore": self.errore,
+            "stato_http": self.stato_http,
+            "byte_scaricati": self.byte_scaricati,
+            "latenze_blocchi_ms": list(self.latenze_blocchi_ms),
+            "tentativi_ripetuti": self.tentativi_ripetuti,
+            "file_zip": self.file_zip,
+            "record_elaborati": self.record_elaborati,
+            "durata_download_ms": self.durata_download_ms,
+            "durata_parsing_ms": self.durata_parsing_ms,
+            "durata_ms": self.durata_ms,
+            "giorni_incompleti": [str(giorno) for giorno in self.giorni_incompleti],
+            "avvisi": list(self.avvisi),
+            "avvisi_scartati": self.avvisi_scartati,
+        }
+
+
 class Zona(Enum):
     """Enumerazione con i nomi delle zone per i prezzi zonali."""
 
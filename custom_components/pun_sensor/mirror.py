@@ -0,0 +1,266 @@
+"""Condivisione dei prezzi tra più istanze di Home Assistant nella rete locale."""
+
+from datetime import date
+import hashlib
+import json
+import logging
+from typing import Any
+
+from aiohttp import ClientSession, ServerConnectionError, web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from .const import DOMAIN
+from .datasource import build_archive
+from .interfaces import Completezza, Fascia, PunData, Zona
+from .utils import (
+    extract_xml,
+    get_datetime_from_ordinal_hour,
+    get_datetime_from_periodo_15min,
+    get_total_hours,
+)
+
+# Ottiene il logger
+_LOGGER = logging.getLogger(__name__)
+
+# Percorso della vista HTTP e versione del formato
+MIRROR_URL: str = "/api/pun_sensor/snapshot"
+SNAPSHOT_VERSION: int = 1
+
+
+def build_snapshot(pun_data: PunData) -> dict[str, Any]:
+    """Crea la rappresentazione compatta dei prezzi da condividere.
+
+    I prezzi orari e a 15 minuti vengono salvati come liste per giorno,
+    ordinate per ora progressiva o per periodo.
+    """
+    giorni: set[str] = {
+        orario[0:10]
+        for prezzi in (pun_data.pun_orari, pun_data.pun_15min)
+        for orario in prezzi
+    }
+
+    snapshot_giorni: dict[str, dict[str, list[float | None]]] = {}
+    for giorno_str in sorted(giorni):
+        giorno: date = date.fromisoformat(giorno_str)
+        ore: list[str] = [
+            str(get_datetime_from_ordinal_hour(giorno, 1 + h))
+            for h in range(get_total_hours(giorno))
+        ]
+        periodi: list[str] = [
+            str(get_datetime_from_periodo_15min(giorno, 1 + p))
+            for p in range(4 * get_total_hours(giorno))
+        ]
+        snapshot_giorni[giorno_str] = {
+            "pun_orari": [pun_data.pun_orari.get(o) for o in ore],
+            "prezzi_zonali": [pun_data.prezzi_zonali.get(o) for o in ore],
+            "pun_15min": [pun_data.pun_15min.get(p) for p in periodi],
+            "prezzi_zonali_15min": [
+                pun_data.prezzi_zonali_15min.get(p) for p in periodi
+            ],
+        }
+
+    return {
+        "versione": SNAPSHOT_VERSION,
+        "zona": pun_data.zona.name if pun_data.zona is not None else None,
+        "pun": {fascia.name: valori for fascia, valori in pun_data.pun.items()},
+        "giorno_fasce": (
+            pun_data.giorno_fasce.isoformat() if pun_data.giorno_fasce else None
+        ),
+        "mese_precedente": {
+            fascia.name: prezzi
+            for fascia, prezzi in pun_data.prezzi_mese_precedente.items()
+        },
+        "giorni": snapshot_giorni,
+    }
+
+
+def apply_snapshot(pun_data: PunData, snapshot: dict[str, Any]) -> PunData:
+    """Carica nella struttura dei dati i prezzi ricevuti da un'altra istanza."""
+    if snapshot.get("versione") != SNAPSHOT_VERSION:
+        raise UpdateFailed(
+            f"Versione dei dati condivisi non supportata: {snapshot.get('versione')}"
+        )
+
+    # Medie mensili
+    for fascia in Fascia:
+        pun_data.pun[fascia] = list(snapshot["pun"].get(fascia.name, []))
+    giorno_fasce: str | None = snapshot.get("giorno_fasce")
+    pun_data.giorno_fasce = (
+        date.fromisoformat(giorno_fasce) if giorno_fasce is not None else None
+    )
+    pun_data.prezzi_mese_precedente = {
+        Fascia[nome]: prezzi
+        for nome, prezzi in snapshot.get("mese_precedente", {}).items()
+    }
+    pun_data.prezzi_mese = {
+        fascia: (len(valori), sum(valori))
+        for fascia, prezzi in pun_data.pun.items()
+        if (valori := prezzi[pun_data.prezzi_mese_precedente.get(fascia, 0) :])
+    }
+
+    # Prezzi orari e a 15 minuti
+    pun_data.pun_orari.clear()
+    pun_data.prezzi_zonali.clear()
+    pun_data.pun_15min.clear()
+    pun_data.prezzi_zonali_15min.clear()
+    pun_data.completezza.clear()
+    for giorno_str, prezzi in snapshot["giorni"].items():
+        giorno: date = date.fromisoformat(giorno_str)
+        completezza: Completezza = Completezza(get_total_hours(giorno))
+        pun_data.completezza[giorno] = completezza
+        for h, (pun, zonale) in enumerate(
+            zip(prezzi["pun_orari"], prezzi["prezzi_zonali"], strict=True)
+        ):
+            if (pun is None) and (zonale is None):
+                continue
+            orario: str = str(get_datetime_from_ordinal_hour(giorno, 1 + h))
+            if pun is not None:
+                pun_data.pun_orari[orario] = pun
+                completezza.pun_orari |= 1 << h
+            if zonale is not None:
+                completezza.prezzi_zonali |= 1 << h
+            pun_data.prezzi_zonali[orario] = zonale
+        for p, (pun, zonale) in enumerate(
+            zip(prezzi["pun_15min"], prezzi["prezzi_zonali_15min"], strict=True)
+        ):
+            if (pun is None) and (zonale is None):
+                continue
+            orario = str(get_datetime_from_periodo_15min(giorno, 1 + p))
+            if pun is not None:
+                pun_data.pun_15min[orario] = pun
+                completezza.pun_15min |= 1 << p
+            if zonale is not None:
+                completezza.prezzi_zonali_15min |= 1 << p
+            pun_data.prezzi_zonali_15min[orario] = zonale
+
+    return pun_data
+
+
+class PUNSnapshotView(HomeAssistantView):
+    """Vista HTTP che espone i prezzi elaborati alle altre istanze.
+
+    I dati sono pubblici (prezzi del GME), quindi non è richiesta l'autenticazione.
+    Le zone diverse da quella configurata vengono ricavate esaminando di nuovo
+    i file XML dell'ultimo aggiornamento, al massimo una volta per zona fino
+    al prossimo aggiornamento (il risultato resta in mirror_cache).
+    La vista risponde solo se la condivisione è attivata nelle opzioni.
+    """
+
+    url = MIRROR_URL
+    name = "api:pun_sensor:snapshot"
+    requires_auth = False
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Inizializza la vista."""
+        self.hass: HomeAssistant = hass
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Restituisce i prezzi per la zona richiesta (o 304 se non modificati)."""
+
+        # Recupera il coordinator (l'integrazione ha una sola configurazione)
+        coordinator = next(iter(self.hass.data.get(DOMAIN, {}).values()), None)
+        if (coordinator is None) or (not coordinator.mirror_server):
+            return web.Response(status=404)
+
+        # Zona richiesta (di default quella configurata)
+        try:
+            zona: Zona | None = (
+                Zona[request.query["zona"]]
+                if "zona" in request.query
+                else coordinator.pun_data.zona
+            )
+        except KeyError:
+            return web.Response(status=400, text="Zona non valida.")
+
+        # Prepara i dati (memorizzati fino al prossimo aggiornamento)
+        if (body_etag := coordinator.mirror_cache.get(zona)) is None:
+            if zona == coordinator.pun_data.zona:
+                pun_data: PunData = coordinator.pun_data
+            elif coordinator.mirror_members:
+                # Zona diversa: rielabora l'ultimo archivio una sola volta
+                # (su una copia, perché i file possono essere aggiornati nel frattempo)
+                pun_data = await self.hass.async_add_executor_job(
+                    parse_members,
+                    dict(coordinator.mirror_members),
+                    zona,
+                    coordinator.mirror_today,
+                )
+            else:
+                # File non conservati (modalità a basso consumo di memoria)
+                return web.Response(status=404, text="Zona non disponibile.")
+
+            body: bytes = json.dumps(
+                build_snapshot(pun_data), separators=(",", ":")
+            ).encode("utf-8")
+            body_etag = (body, f'"{hashlib.sha1(body).hexdigest()[:16]}"')
+            coordinator.mirror_cache[zona] = body_etag
+
+        # Richiesta condizionale: i dati non sono cambiati
+        if request.headers.get("If-None-Match") == body_etag[1]:
+            return web.Response(status=304, headers={"ETag": body_etag[1]})
+
+        return web.Response(
+            body=body_etag[0],
+            content_type="application/json",
+            headers={"ETag": body_etag[1]},
+        )
+
+
+def parse_members(members: dict[str, bytes], zona: Zona, today: date) -> PunData:
+    """Estrae i prezzi di una zona dai file XML memorizzati."""
+    pun_data: PunData = PunData()
+    pun_data.zona = zona
+    with build_archive(members.items()) as archive:
+        return extract_xml(archive, pun_data, today)
+
+
+def is_mirror_url(path: str | None) -> bool:
+    """Verifica se il percorso configurato è l'indirizzo di un'altra istanza."""
+    return (path is not None) and path.lower().startswith(("http://", "https://"))
+
+
+class PUNMirrorClient:
+    """Client che scarica i prezzi elaborati da un'altra istanza di Home Assistant."""
+
+    def __init__(self, session: ClientSession, url: str) -> None:
+        """Inizializza il client con l'indirizzo dell'istanza (es. http://ha:8123)."""
+        self.session: ClientSession = session
+        self.url: str = url.rstrip("/") + MIRROR_URL
+        self.etag: str | None = None
+        self.zona: Zona | None = None
+        self.last_bytes: int = 0
+        self.last_status: int | None = None
+
+    async def async_get_snapshot(self, zona: Zona | None) -> dict[str, Any] | None:
+        """Scarica i prezzi della zona, oppure None se non sono cambiati."""
+
+        # Richiesta condizionale solo se la zona non è cambiata
+        heads: dict[str, str] = {}
+        if (self.etag is not None) and (zona == self.zona):
+            heads["If-None-Match"] = self.etag
+        params: dict[str, str] = {"zona": zona.name} if zona is not None else {}
+
+        _LOGGER.debug("Download prezzi condivisi da: %s", self.url)
+        async with self.session.get(self.url, params=params, headers=heads) as response:
+            self.last_status = response.status
+            if response.status == 304:
+                self.last_bytes = 0
+                return None
+
+            if response.status != 200:
+                _LOGGER.error(
+                    "Richiesta prezzi condivisi fallita con errore %s", response.status
+                )
+                raise ServerConnectionError(
+                    f"Richiesta fallita con errore {response.status}"
+                )
+
+            body: bytes = await response.read()
+            self.last_bytes = len(body)
+            snapshot: dict[str, Any] = json.loads(body)
+            self.etag = response.headers.get("ETag")
+            self.zona = zona
+            return snapshot
@@ -0,0 +1,192 @@
+"""Previsione delle medie del PUN per fascia a fine mese."""
+
+from calendar import monthrange
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import NamedTuple
+
+from .bands import get_fasce_giorno
+from .interfaces import Fascia, PunData
+from .utils import TabellaGiorno, get_day_table, get_total_hours, is_day_complete
+
+# Fasce orarie in cui viene suddiviso ciascun giorno
+FASCE_ORARIE: tuple[Fascia, ...] = (Fascia.F1, Fascia.F2, Fascia.F3)
+
+
+class PrevisioneMese(NamedTuple):
+    """Medie previste a fine mese e ore ancora da pubblicare per ciascuna fascia."""
+
+    medie: dict[Fascia, float | None]
+    ore_rimanenti: dict[Fascia, int]
+
+    # Giorno in cui è stata calcolata la previsione
+    oggi: date | None = None
+
+
+def get_ore_fasce_giorno(giorno: date) -> tuple[int, int, int]:
+    """Restituisce le ore del giorno in fascia F1, F2 e F3.
+
+    Il cambio dell'ora avviene sempre di notte (tra le 2 e le 3),
+    quindi l'ora in meno o in più è sempre in fascia F3.
+    """
+    ore: dict[Fascia, int] = dict.fromkeys(FASCE_ORARIE, 0)
+    for ora_inizio, ora_fine, fascia in get_fasce_giorno(giorno):
+        ore[fascia] += ora_fine - ora_inizio
+    ore[Fascia.F3] += get_total_hours(giorno) - 24
+    return ore[Fascia.F1], ore[Fascia.F2], ore[Fascia.F3]
+
+
+@lru_cache(maxsize=4)
+def get_ore_rimanenti_mese(anno: int, mese: int) -> tuple[tuple[int, int, int], ...]:
+    """Restituisce, per ogni giorno del mese, le ore per fascia dei giorni successivi.
+
+    L'elemento d contiene le ore in fascia F1, F2 e F3 dal giorno d + 1
+    alla fine del mese (l'elemento 0 contiene quindi l'intero mese);
+    la tabella viene calcolata una sola volta per mese.
+    """
+    giorni: int = monthrange(anno, mese)[1]
+    rimanenti: list[tuple[int, int, int]] = [(0, 0, 0)]
+    for giorno in range(giorni, 0, -1):
+        ore: tuple[int, int, int] = get_ore_fasce_giorno(date(anno, mese, giorno))
+        rimanenti.append(
+            (
+                rimanenti[-1][0] + ore[0],
+                rimanenti[-1][1] + ore[1],
+                rimanenti[-1][2] + ore[2],
+            )
+        )
+    return tuple(reversed(rimanenti))
+
+
+def get_prezzi_fasce_giorno(
+    pun_data: PunData, giorno: date
+) -> dict[Fascia, tuple[int, float]]:
+    """Restituisce il numero di ore e la somma dei PUN orari di oggi o domani per fascia.
+
+    Usa i prezzi orari se disponibili, altrimenti la media dei quattro
+    prezzi a 15 minuti della stessa ora.
+    """
+    fasce = get_fasce_giorno(giorno)
+    tabella: TabellaGiorno = get_day_table(giorno)
+    prezzi: dict[Fascia, tuple[int, float]] = dict.fromkeys(FASCE_ORARIE, (0, 0.0))
+    for i, (orario, chiave) in enumerate(zip(tabella.ore, tabella.chiavi_ore)):
+        if (prezzo := pun_data.pun_orari.get(chiave)) is None:
+            quarti: list[float] = [
+                p
+                for c in tabella.chiavi_15min[4 * i : 4 * i + 4]
+                if (p := pun_data.pun_15min.get(c)) is not None
+            ]
+            if len(quarti) < 4:
+                continue
+            prezzo = sum(quarti) / 4
+        fascia: Fascia = next(
+            f for inizio, fine, f in fasce if inizio <= orario.hour < fine
+        )
+        ore, somma = prezzi[fascia]
+        prezzi[fascia] = (ore + 1, somma + prezzo)
+    return prezzi
+
+
+def get_prezzi_noti_mese(
+    pun_data: PunData, oggi: date
+) -> tuple[dict[Fascia, tuple[int, float]], date]:
+    """Restituisce ore e somma dei PUN già noti del mese di oggi per fascia.
+
+    Usa i totali dei prezzi conteggiati nelle liste delle fasce, esclusi quelli
+    del mese precedente, e aggiunge i giorni successivi già completi fino a domani
+    (ad esempio oggi dopo la mezzanotte, prima del nuovo aggiornamento).
+
+    Returns:
+        tuple: ore e somma dei prezzi per fascia e ultimo giorno conteggiato.
+
+    """
+    inizio_mese: date = oggi.replace(day=1)
+    note: dict[Fascia, tuple[int, float]] = dict.fromkeys(FASCE_ORARIE, (0, 0.0))
+    ultimo_giorno: date = inizio_mese - timedelta(days=1)
+    if (pun_data.giorno_fasce is not None) and (pun_data.giorno_fasce >= inizio_mese):
+        for fascia in FASCE_ORARIE:
+            note[fascia] = pun_data.prezzi_mese.get(fascia, (0, 0.0))
+        ultimo_giorno = pun_data.giorno_fasce
+
+    # Giorni completi non ancora conteggiati (dello stesso mese)
+    giorno: date = ultimo_giorno + timedelta(days=1)
+    while (
+        (giorno <= oggi + timedelta(days=1))
+        and (giorno.month == oggi.month)
+        and is_day_complete(pun_data, giorno)
+    ):
+        for fascia, (ore, somma) in get_prezzi_fasce_giorno(pun_data, giorno).items():
+            note[fascia] = (note[fascia][0] + ore, note[fascia][1] + somma)
+        ultimo_giorno = giorno
+        giorno += timedelta(days=1)
+    return note, ultimo_giorno
+
+
+def build_month_projection(
+    pun_data: PunData, medie: dict[Fascia, float], oggi: date
+) -> PrevisioneMese:
+    """Calcola le medie previste a fine mese per ciascuna fascia.
+
+    Parte dai prezzi già noti del mese (fino ad oggi e domani, se già
+    pubblicati) e suppone che le ore rimanenti del mese abbiano il prezzo
+    medio della propria fascia (che all'inizio del mese può comprendere
+    anche gli ultimi giorni del mese precedente). La media mensile (MONO)
+    pesa quindi ogni fascia con le ore che avrà sull'intero mese, in base
+    al calendario delle fasce e delle festività; il calcolo non dipende
+    dal numero di giorni già trascorsi.
+    """
+
+    # Ore e somma dei prezzi già noti per fascia
+    note, ultimo_giorno = get_prezzi_noti_mese(pun_data, oggi)
+
+    # Ore per fascia dei giorni successivi del mese
+    rimanenti: dict[Fascia, int] = dict(
+        zip(
+            FASCE_ORARIE,
+            get_ore_rimanenti_mese(oggi.year, oggi.month)[
+                ultimo_giorno.day if ultimo_giorno.month == oggi.month else 0
+            ],
+            strict=True,
+        )
+    )
+
+    # Media prevista di ciascuna fascia (stimando le ore rimanenti con la media
+    # attuale della fascia) e media mensile pesata per le ore
+    # (solo per le fasce con almeno un prezzo)
+    previste: dict[Fascia, float] = {}
+    pesi: dict[Fascia, int] = {}
+    for fascia, (ore, somma) in note.items():
+        if pun_data.pun[fascia] and (ore + rimanenti[fascia] > 0):
+            previste[fascia] = (somma + medie[fascia] * rimanenti[fascia]) / (
+                ore + rimanenti[fascia]
+            )
+        elif ore > 0:
+            previste[fascia] = somma / ore
+        else:
+            continue
+        pesi[fascia] = ore + rimanenti[fascia]
+
+    medie_previste: dict[Fascia, float | None] = {
+        fascia: previste.get(fascia) for fascia in FASCE_ORARIE
+    }
+    medie_previste[Fascia.MONO] = (
+        sum(previste[fascia] * peso for fascia, peso in pesi.items())
+        / sum(pesi.values())
+        if pesi
+        else None
+    )
+    medie_previste[Fascia.F23] = (
+        0.46 * previste[Fascia.F2] + 0.54 * previste[Fascia.F3]
+        if (Fascia.F2 in previste) and (Fascia.F3 in previste)
+        else None
+    )
+
+    return PrevisioneMese(
+        medie=medie_previste,
+        ore_rimanenti={
+            **rimanenti,
+            Fascia.MONO: sum(rimanenti.values()),
+            Fascia.F23: rimanenti[Fascia.F2] + rimanenti[Fascia.F3],
+        },
+        oggi=oggi,
+    )
@@ -0,0 +1,98 @@
+"""Posizione di ciascun prezzo rispetto agli altri del giorno e delle 24 ore successive."""
+
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Any, NamedTuple
+
+# Durata della finestra per la posizione nelle prossime ore
+FINESTRA: timedelta = timedelta(hours=24)
+
+
+class ClassificaPrezzo(NamedTuple):
+    """Posizione di un prezzo (1 = il più economico) e statistiche del suo giorno."""
+
+    posizione: int
+    percentile: float
+    posizione_24h: int
+    percentile_24h: float
+    minimo: float
+    massimo: float
+    media: float
+
+
+def get_percentile(posizione: int, totale: int) -> float:
+    """Restituisce il percentile della posizione (0 = il più economico, 100 = il più caro)."""
+    if totale <= 1:
+        return 0.0
+    return round(100 * (posizione - 1) / (totale - 1), 1)
+
+
+def build_price_ranks(prezzi: dict[str, float | None]) -> dict[str, ClassificaPrezzo]:
+    """Calcola la posizione di ogni prezzo nel suo giorno e nelle 24 ore successive.
+
+    Ogni giorno viene ordinato una sola volta; la posizione nelle 24 ore
+    considera il prezzo stesso e quelli successivi disponibili che iniziano
+    entro 24 ore (anche nei giorni di cambio ora), mantenuti in una lista
+    ordinata che scorre all'indietro nel tempo.
+
+    Args:
+    prezzi (dict[str, float | None]): prezzi indicizzati per orario.
+
+    Returns:
+        dict[str, ClassificaPrezzo]: classifica indicizzata per orario (solo prezzi validi).
+
+    """
+    # Prezzi validi in ordine di tempo, raggruppati per giorno
+    serie: list[tuple[datetime, str, float]] = sorted(
+        (datetime.fromisoformat(orario), orario, prezzo)
+        for orario, prezzo in prezzi.items()
+        if prezzo is not None
+    )
+    giorni: dict[str, list[float]] = {}
+    for _, orario, prezzo in serie:
+        giorni.setdefault(orario[0:10], []).append(prezzo)
+
+    # Statistiche del giorno (un solo ordinamento per giorno)
+    ordinati: dict[str, list[float]] = {
+        giorno: sorted(valori) for giorno, valori in giorni.items()
+    }
+
+    classifica: dict[str, ClassificaPrezzo] = {}
+    successivi: list[float] = []
+    fine: int = len(serie)
+    for istante, orario, prezzo in reversed(serie):
+        # Aggiunge il prezzo e toglie quelli oltre le 24 ore
+        insort(successivi, prezzo)
+        while serie[fine - 1][0] >= istante + FINESTRA:
+            fine -= 1
+            del successivi[bisect_left(successivi, serie[fine][2])]
+
+        valori: list[float] = ordinati[orario[0:10]]
+        posizione: int = 1 + bisect_left(valori, prezzo)
+        posizione_24h: int = 1 + bisect_left(successivi, prezzo)
+        classifica[orario] = ClassificaPrezzo(
+            posizione=posizione,
+            percentile=get_percentile(posizione, len(valori)),
+            posizione_24h=posizione_24h,
+            percentile_24h=get_percentile(posizione_24h, len(successivi)),
+            minimo=valori[0],
+            massimo=valori[-1],
+            media=round(sum(valori) / len(valori), 6),
+        )
+
+    return classifica
+
+
+def get_rank_attributes(classifica: ClassificaPrezzo | None) -> dict[str, Any]:
+    """Restituisce gli attributi di stato con la classifica del prezzo corrente."""
+    if classifica is None:
+        return {}
+    return {
+        "posizione_oggi": classifica.posizione,
+        "percentile_oggi": classifica.percentile,
+        "posizione_24h": classifica.posizione_24h,
+        "percentile_24h": classifica.percentile_24h,
+        "minimo_oggi": classifica.minimo,
+        "massimo_oggi": classifica.massimo,
+        "media_oggi": classifica.media,
+    }
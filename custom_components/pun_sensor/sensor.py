@@ -1,7 +1,9 @@
 """Implementazione sensori di pun_sensor."""
 
+from datetime import datetime
 import logging
 from typing import Any
+from zoneinfo import ZoneInfo
 
 from awesomeversion.awesomeversion import AwesomeVersion
 
@@ -15,7 +17,11 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     CURRENCY_EURO,
     MATCH_ALL,
+    EntityCategory,
+    UnitOfDataRate,
     UnitOfEnergy,
+    UnitOfInformation,
+    UnitOfTime,
     __version__ as HA_VERSION,
 )
 from homeassistant.core import HomeAssistant
@@ -32,24 +38,67 @@ from . import PUNDataUpdateCoordinator
 from .const import (
     COORD_EVENT,
     DOMAIN,
+    EVENT_UPDATE_COSTI,
     EVENT_UPDATE_FASCIA,
+    EVENT_UPDATE_METRICS,
+    EVENT_UPDATE_PREVISIONE,
     EVENT_UPDATE_PREZZO_ZONALE,
     EVENT_UPDATE_PREZZO_ZONALE_15MIN,
     EVENT_UPDATE_PUN,
+    RESTORE_STATE_VERSION,
 )
+from .costs import PUNCostEngine
+from .dayring import AnelloGiorni
 from .interfaces import Fascia, PunValues
-from .utils import (
-    add_timedelta_via_utc,
-    get_datetime_from_ordinal_hour,
-    get_datetime_from_periodo_15min,
-    get_ordinal_hour,
-    get_periodo_15min,
-    get_total_hours,
-)
+from .ranks import get_rank_attributes
+from .utils import get_ordinal_hour, get_periodo_15min, get_restored_prices, pack_prices
 
 # Ottiene il logger
 _LOGGER = logging.getLogger(__name__)
 
+# Metriche dell'ultimo aggiornamento: chiave, nome, unità di misura e classe
+METRICHE: tuple[tuple[str, str, str | None, SensorDeviceClass | None], ...] = (
+    (
+        "durata_download_ms",
+        "Durata download",
+        UnitOfTime.MILLISECONDS,
+        SensorDeviceClass.DURATION,
+    ),
+    (
+        "byte_scaricati",
+        "Dati scaricati",
+        UnitOfInformation.BYTES,
+        SensorDeviceClass.DATA_SIZE,
+    ),
+    (
+        "velocita_download_kbs",
+        "Velocità download",
+        UnitOfDataRate.KILOBYTES_PER_SECOND,
+        SensorDeviceClass.DATA_RATE,
+    ),
+    ("blocchi_scaricati", "Richieste di download", None, None),
+    ("file_zip", "File nell'archivio", None, None),
+    ("record_elaborati", "Record elaborati", None, None),
+    (
+        "durata_parsing_ms",
+        "Durata elaborazione XML",
+        UnitOfTime.MILLISECONDS,
+        SensorDeviceClass.DURATION,
+    ),
+    (
+        "durata_medie_ms",
+        "Durata calcolo medie",
+        UnitOfTime.MILLISECONDS,
+        SensorDeviceClass.DURATION,
+    ),
+    (
+        "durata_entita_ms",
+        "Durata aggiornamento entità",
+        UnitOfTime.MILLISECONDS,
+        SensorDeviceClass.DURATION,
+    ),
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -76,6 +125,13 @@ async def async_setup_entry(
     entities.append(PUNOrarioSensorEntity(coordinator))
     entities.append(PUN15MinSensorEntity(coordinator))
 
+    # Crea il sensore del costo del mese (se è configurato il sensore di energia)
+    if (costi := coordinator.costi) is not None:
+        entities.append(PUNCostoMeseSensorEntity(coordinator, costi))
+
+    # Crea i sensori diagnostici con le metriche dell'ultimo aggiornamento
+    entities.extend(PUNMetricSensorEntity(coordinator, metrica) for metrica in METRICHE)
+
     # Aggiunge i sensori ma non aggiorna automaticamente via web
     # per lasciare il tempo ad Home Assistant di avviarsi
     async_add_entities(entities, update_before_add=False)
@@ -124,6 +180,11 @@ class PUNSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
         if (coordinator_event := self.coordinator.data.get(COORD_EVENT)) is None:
             return
 
+        # Aggiorna solo gli attributi al cambio della previsione di fine mese
+        if coordinator_event == EVENT_UPDATE_PREVISIONE:
+            self.async_write_ha_state()
+            return
+
         # Aggiorna il sensore in caso di variazione di prezzi
         if coordinator_event != EVENT_UPDATE_PUN:
             return
@@ -205,6 +266,20 @@ class PUNSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
             return f"PUN fascia {self.fascia.value}"
         return None
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Restituisce gli attributi di stato."""
+
+        # Media prevista a fine mese e ore ancora da pubblicare nella fascia
+        return {
+            "previsione_fine_mese": self.coordinator.previsione_mese.medie.get(
+                self.fascia
+            ),
+            "ore_rimanenti": self.coordinator.previsione_mese.ore_rimanenti.get(
+                self.fascia
+            ),
+        }
+
 
 class FasciaPUNSensorEntity(CoordinatorEntity, SensorEntity):
     """Sensore che rappresenta il nome la fascia oraria PUN corrente."""
@@ -418,7 +493,12 @@ class PrezzoZonaleSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
         self._available: bool = False
         self._native_value: float = 0
         self._friendly_name: str = "Prezzo zonale"
-        self._prezzi_zonali: dict[str, float | None] = {}
+        self._anello: AnelloGiorni = AnelloGiorni(
+            lambda: self.coordinator.pun_data.prezzi_zonali,
+            prezzi_15min=False,
+            condiviso=coordinator.memory_budget,
+        )
+        self._compatto: dict[str, Any] | None = None
 
     def _handle_coordinator_update(self) -> None:
         """Gestisce l'aggiornamento dei dati dal coordinator."""
@@ -438,12 +518,16 @@ class PrezzoZonaleSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
                 )
                 # Verifica che il coordinator abbia i prezzi
                 if self.coordinator.pun_data.prezzi_zonali:
-                    # Copia i dati dal coordinator in locale (per il backup)
-                    self._prezzi_zonali = dict(self.coordinator.pun_data.prezzi_zonali)
+                    # Carica i prezzi di oggi e domani dal coordinator
+                    self._anello.load(self.coordinator.orario_prezzo.date())
+                    self._compatto = self.coordinator.get_compact_prices(
+                        "prezzi_zonali"
+                    )
             else:
                 # Nessuna zona impostata
                 self._friendly_name = "Prezzo zonale"
-                self._prezzi_zonali = {}
+                self._anello.load(self.coordinator.orario_prezzo.date(), {})
+                self._compatto = None
                 self._available = False
                 self.async_write_ha_state()
                 return
@@ -457,20 +541,14 @@ class PrezzoZonaleSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
                     self.coordinator.orario_prezzo,
                     get_ordinal_hour(self.coordinator.orario_prezzo),
                 )
-                if str(self.coordinator.orario_prezzo) in self._prezzi_zonali:
-                    # Aggiorna il valore al prezzo orario
-                    if (
-                        valore := self._prezzi_zonali[
-                            str(self.coordinator.orario_prezzo)
-                        ]
-                    ) is not None:
-                        self._native_value = valore
-                        self._available = True
-                    else:
-                        # Prezzo non disponibile
-                        self._available = False
+                # Prezzo corrente (dai prezzi di oggi e domani)
+                if (
+                    valore := self._anello.get_prezzo(self.coordinator.orario_prezzo)
+                ) is not None:
+                    self._native_value = valore
+                    self._available = True
                 else:
-                    # Orario non disponibile
+                    # Prezzo o orario non disponibile
                     self._available = False
             else:
                 # Nessuna zona impostata
@@ -490,7 +568,10 @@ class PrezzoZonaleSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
                 "zona": self.coordinator.pun_data.zona.name
                 if self.coordinator.pun_data.zona is not None
                 else None,
-                "prezzi_zonali": self._prezzi_zonali,
+                "versione": RESTORE_STATE_VERSION,
+                "prezzi_zonali": self._compatto
+                if self._compatto is not None
+                else pack_prices(self._anello.get_attributes(), prezzi_15min=False),
             }
         )
 
@@ -530,24 +611,23 @@ class PrezzoZonaleSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
                 self._friendly_name = old_friendly_name
 
             # Valori delle fasce orarie
-            if (old_prezzi_zonali := old_data_dict.get("prezzi_zonali")) is not None:
-                self._prezzi_zonali = old_prezzi_zonali
+            if (
+                old_prezzi_zonali := get_restored_prices(old_data_dict, "prezzi_zonali")
+            ) is not None:
+                self._anello.load(
+                    self.coordinator.orario_prezzo.date(), old_prezzi_zonali
+                )
+                # Al salvataggio i prezzi vengono ricavati dall'anello
+                self._compatto = None
 
                 # Controlla se il prezzo orario esiste per l'ora corrente
-                if str(self.coordinator.orario_prezzo) in self._prezzi_zonali:
-                    # Aggiorna il valore al prezzo orario
-                    if (
-                        valore := self._prezzi_zonali[
-                            str(self.coordinator.orario_prezzo)
-                        ]
-                    ) is not None:
-                        self._native_value = valore
-                        self._available = True
-                    else:
-                        # Prezzo non disponibile
-                        self._available = False
+                if (
+                    valore := self._anello.get_prezzo(self.coordinator.orario_prezzo)
+                ) is not None:
+                    self._native_value = valore
+                    self._available = True
                 else:
-                    # Imposta come non disponibile
+                    # Prezzo o orario non disponibile
                     self._available = False
 
     @property
@@ -587,28 +667,19 @@ class PrezzoZonaleSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
         # Crea il dizionario degli attributi
         attributes: dict[str, Any] = {}
 
-        # Aggiunge i prezzi orari negli attributi, ora per ora
         if self.coordinator.pun_data.zona is not None:
-            # Prezzi di oggi
-            max_ore_oggi: int = get_total_hours(self.coordinator.orario_prezzo)
-            for h in range(max_ore_oggi):
-                data_ora_prezzo = get_datetime_from_ordinal_hour(
-                    self.coordinator.orario_prezzo, (1 + h)
-                )
-                attributes[str(data_ora_prezzo)] = self._prezzi_zonali.get(
-                    str(data_ora_prezzo)
+            # Posizione del prezzo corrente rispetto al giorno e alle 24 ore successive
+            attributes.update(
+                get_rank_attributes(
+                    self.coordinator.get_price_ranks("prezzi_zonali").get(
+                        str(self.coordinator.orario_prezzo)
+                    )
                 )
-
-            # Prezzi di domani
-            domani = add_timedelta_via_utc(
-                dt=self.coordinator.orario_prezzo, full_days=1
             )
-            max_ore_domani: int = get_total_hours(domani)
-            for h in range(max_ore_domani):
-                data_ora_prezzo = get_datetime_from_ordinal_hour(domani, (1 + h))
-                attributes[str(data_ora_prezzo)] = self._prezzi_zonali.get(
-                    str(data_ora_prezzo)
-                )
+
+            # Aggiunge i prezzi di oggi e domani negli attributi (se non disattivati)
+            if self.coordinator.price_attributes:
+                attributes.update(self._anello.get_attributes())
 
         # Restituisce gli attributi
         return attributes
@@ -638,7 +709,12 @@ class PrezzoZonale15MinSensorEntity(CoordinatorEntity, SensorEntity, RestoreEnti
         self._available: bool = False
         self._native_value: float = 0
         self._friendly_name: str = "Prezzo zonale 15 min"
-        self._prezzi_zonali_15min: dict[str, float | None] = {}
+        self._anello: AnelloGiorni = AnelloGiorni(
+            lambda: self.coordinator.pun_data.prezzi_zonali_15min,
+            prezzi_15min=True,
+            condiviso=coordinator.memory_budget,
+        )
+        self._compatto: dict[str, Any] | None = None
 
     def _handle_coordinator_update(self) -> None:
         """Gestisce l'aggiornamento dei dati dal coordinator."""
@@ -658,14 +734,16 @@ class PrezzoZonale15MinSensorEntity(CoordinatorEntity, SensorEntity, RestoreEnti
                 )
                 # Verifica che il coordinator abbia i prezzi
                 if self.coordinator.pun_data.prezzi_zonali_15min:
-                    # Copia i dati dal coordinator in locale (per il backup)
-                    self._prezzi_zonali_15min = dict(
-                        self.coordinator.pun_data.prezzi_zonali_15min
+                    # Carica i prezzi di oggi e domani dal coordinator
+                    self._anello.load(self.coordinator.orario_prezzo_15min.date())
+                    self._compatto = self.coordinator.get_compact_prices(
+                        "prezzi_zonali_15min"
                     )
             else:
                 # Nessuna zona impostata
                 self._friendly_name = "Prezzo zonale 15 min"
-                self._prezzi_zonali_15min = {}
+                self._anello.load(self.coordinator.orario_prezzo_15min.date(), {})
+                self._compatto = None
                 self._available = False
                 self.async_write_ha_state()
                 return
@@ -679,23 +757,16 @@ class PrezzoZonale15MinSensorEntity(CoordinatorEntity, SensorEntity, RestoreEnti
                     self.coordinator.orario_prezzo_15min,
                     get_periodo_15min(self.coordinator.orario_prezzo_15min),
                 )
+                # Prezzo corrente (dai prezzi di oggi e domani)
                 if (
-                    str(self.coordinator.orario_prezzo_15min)
-                    in self._prezzi_zonali_15min
-                ):
-                    # Aggiorna il valore al prezzo orario
-                    if (
-                        valore := self._prezzi_zonali_15min[
-                            str(self.coordinator.orario_prezzo_15min)
-                        ]
-                    ) is not None:
-                        self._native_value = valore
-                        self._available = True
-                    else:
-                        # Prezzo non disponibile
-                        self._available = False
+                    valore := self._anello.get_prezzo(
+                        self.coordinator.orario_prezzo_15min
+                    )
+                ) is not None:
+                    self._native_value = valore
+                    self._available = True
                 else:
-                    # Orario non disponibile
+                    # Prezzo o orario non disponibile
                     self._available = False
             else:
                 # Nessuna zona impostata
@@ -715,7 +786,10 @@ class PrezzoZonale15MinSensorEntity(CoordinatorEntity, SensorEntity, RestoreEnti
                 "zona": self.coordinator.pun_data.zona.name
                 if self.coordinator.pun_data.zona is not None
                 else None,
-                "prezzi_zonali_15min": self._prezzi_zonali_15min,
+                "versione": RESTORE_STATE_VERSION,
+                "prezzi_zonali_15min": self._compatto
+                if self._compatto is not None
+                else pack_prices(self._anello.get_attributes(), prezzi_15min=True),
             }
         )
 
@@ -756,28 +830,26 @@ class PrezzoZonale15MinSensorEntity(CoordinatorEntity, SensorEntity, RestoreEnti
 
             # Valori delle fasce orarie
             if (
-                old_prezzi_zonali_15min := old_data_dict.get("prezzi_zonali_15min")
+                old_prezzi_zonali_15min := get_restored_prices(
+                    old_data_dict, "prezzi_zonali_15min"
+                )
             ) is not None:
-                self._prezzi_zonali_15min = old_prezzi_zonali_15min
+                self._anello.load(
+                    self.coordinator.orario_prezzo_15min.date(), old_prezzi_zonali_15min
+                )
+                # Al salvataggio i prezzi vengono ricavati dall'anello
+                self._compatto = None
 
                 # Controlla se il prezzo a 15 minuti esiste per il periodo corrente
                 if (
-                    str(self.coordinator.orario_prezzo_15min)
-                    in self._prezzi_zonali_15min
-                ):
-                    # Aggiorna il valore al prezzo a 15 minuti
-                    if (
-                        valore := self._prezzi_zonali_15min[
-                            str(self.coordinator.orario_prezzo_15min)
-                        ]
-                    ) is not None:
-                        self._native_value = valore
-                        self._available = True
-                    else:
-                        # Prezzo non disponibile
-                        self._available = False
+                    valore := self._anello.get_prezzo(
+                        self.coordinator.orario_prezzo_15min
+                    )
+                ) is not None:
+                    self._native_value = valore
+                    self._available = True
                 else:
-                    # Imposta come non disponibile
+                    # Prezzo o orario non disponibile
                     self._available = False
 
     @property
@@ -817,30 +889,19 @@ class PrezzoZonale15MinSensorEntity(CoordinatorEntity, SensorEntity, RestoreEnti
         # Crea il dizionario degli attributi
         attributes: dict[str, Any] = {}
 
-        # Aggiunge i prezzi a 15 minuti negli attributi, periodo per periodo
         if self.coordinator.pun_data.zona is not None:
-            # Prezzi di oggi
-            max_15min_oggi: int = 4 * get_total_hours(
-                self.coordinator.orario_prezzo_15min
-            )
-            for p in range(max_15min_oggi):
-                data_ora_prezzo = get_datetime_from_periodo_15min(
-                    self.coordinator.orario_prezzo_15min, (1 + p)
-                )
-                attributes[str(data_ora_prezzo)] = self._prezzi_zonali_15min.get(
-                    str(data_ora_prezzo)
+            # Posizione del prezzo corrente rispetto al giorno e alle 24 ore successive
+            attributes.update(
+                get_rank_attributes(
+                    self.coordinator.get_price_ranks("prezzi_zonali_15min").get(
+                        str(self.coordinator.orario_prezzo_15min)
+                    )
                 )
-
-            # Prezzi di domani
-            domani = add_timedelta_via_utc(
-                dt=self.coordinator.orario_prezzo_15min, full_days=1
             )
-            max_15min_domani: int = 4 * get_total_hours(domani)
-            for p in range(max_15min_domani):
-                data_ora_prezzo = get_datetime_from_periodo_15min(domani, (1 + p))
-                attributes[str(data_ora_prezzo)] = self._prezzi_zonali_15min.get(
-                    str(data_ora_prezzo)
-                )
+
+            # Aggiunge i prezzi di oggi e domani negli attributi (se non disattivati)
+            if self.coordinator.price_attributes:
+                attributes.update(self._anello.get_attributes())
 
         # Restituisce gli attributi
         return attributes
@@ -870,7 +931,12 @@ class PUNOrarioSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
         self._available: bool = False
         self._native_value: float = 0
         self._friendly_name: str = "PUN orario"
-        self._pun_orari: dict[str, float | None] = {}
+        self._anello: AnelloGiorni = AnelloGiorni(
+            lambda: self.coordinator.pun_data.pun_orari,
+            prezzi_15min=False,
+            condiviso=coordinator.memory_budget,
+        )
+        self._compatto: dict[str, Any] | None = None
 
     def _handle_coordinator_update(self) -> None:
         """Gestisce l'aggiornamento dei dati dal coordinator."""
@@ -885,8 +951,9 @@ class PUNOrarioSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
         if coordinator_event == EVENT_UPDATE_PUN:
             # Verifica che il coordinator abbia i prezzi
             if self.coordinator.pun_data.pun_orari:
-                # Copia i dati dal coordinator in locale (per il backup)
-                self._pun_orari = dict(self.coordinator.pun_data.pun_orari)
+                # Carica i prezzi di oggi e domani dal coordinator
+                self._anello.load(self.coordinator.orario_prezzo.date())
+                self._compatto = self.coordinator.get_compact_prices("pun_orari")
 
         # Cambiato l'orario del prezzo
         if coordinator_event in (EVENT_UPDATE_PUN, EVENT_UPDATE_PREZZO_ZONALE):
@@ -896,18 +963,14 @@ class PUNOrarioSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
                 self.coordinator.orario_prezzo,
                 get_ordinal_hour(self.coordinator.orario_prezzo),
             )
-            if str(self.coordinator.orario_prezzo) in self._pun_orari:
-                # Aggiorna il valore al prezzo orario
-                if (
-                    valore := self._pun_orari[str(self.coordinator.orario_prezzo)]
-                ) is not None:
-                    self._native_value = valore
-                    self._available = True
-                else:
-                    # Prezzo non disponibile
-                    self._available = False
+            # Prezzo corrente (dai prezzi di oggi e domani)
+            if (
+                valore := self._anello.get_prezzo(self.coordinator.orario_prezzo)
+            ) is not None:
+                self._native_value = valore
+                self._available = True
             else:
-                # Orario non disponibile
+                # Prezzo o orario non disponibile
                 self._available = False
 
         # Aggiorna lo stato di Home Assistant
@@ -920,7 +983,10 @@ class PUNOrarioSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
         # Salva i dati per la prossima istanza
         return RestoredExtraData(
             {
-                "pun_orari": self._pun_orari,
+                "versione": RESTORE_STATE_VERSION,
+                "pun_orari": self._compatto
+                if self._compatto is not None
+                else pack_prices(self._anello.get_attributes(), prezzi_15min=False),
             }
         )
 
@@ -934,22 +1000,21 @@ class PUNOrarioSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
             old_data_dict = old_data.as_dict()
 
             # Valori dei prezzi orari
-            if (old_pun_orari := old_data_dict.get("pun_orari")) is not None:
-                self._pun_orari = old_pun_orari
+            if (
+                old_pun_orari := get_restored_prices(old_data_dict, "pun_orari")
+            ) is not None:
+                self._anello.load(self.coordinator.orario_prezzo.date(), old_pun_orari)
+                # Al salvataggio i prezzi vengono ricavati dall'anello
+                self._compatto = None
 
                 # Controlla se il prezzo orario esiste per l'ora corrente
-                if str(self.coordinator.orario_prezzo) in self._pun_orari:
-                    # Aggiorna il valore al prezzo orario
-                    if (
-                        valore := self._pun_orari[str(self.coordinator.orario_prezzo)]
-                    ) is not None:
-                        self._native_value = valore
-                        self._available = True
-                    else:
-                        # Prezzo non disponibile
-                        self._available = False
+                if (
+                    valore := self._anello.get_prezzo(self.coordinator.orario_prezzo)
+                ) is not None:
+                    self._native_value = valore
+                    self._available = True
                 else:
-                    # Imposta come non disponibile
+                    # Prezzo o orario non disponibile
                     self._available = False
 
     @property
@@ -991,21 +1056,18 @@ class PUNOrarioSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
         # Crea il dizionario degli attributi
         attributes: dict[str, Any] = {}
 
-        # Aggiunge i prezzi orari negli attributi, ora per ora
-        # Prezzi di oggi
-        max_ore_oggi: int = get_total_hours(self.coordinator.orario_prezzo)
-        for h in range(max_ore_oggi):
-            data_ora_prezzo = get_datetime_from_ordinal_hour(
-                self.coordinator.orario_prezzo, (1 + h)
+        # Posizione del prezzo corrente rispetto al giorno e alle 24 ore successive
+        attributes.update(
+            get_rank_attributes(
+                self.coordinator.get_price_ranks("pun_orari").get(
+                    str(self.coordinator.orario_prezzo)
+                )
             )
-            attributes[str(data_ora_prezzo)] = self._pun_orari.get(str(data_ora_prezzo))
+        )
 
-        # Prezzi di domani
-        domani = add_timedelta_via_utc(dt=self.coordinator.orario_prezzo, full_days=1)
-        max_ore_domani: int = get_total_hours(domani)
-        for h in range(max_ore_domani):
-            data_ora_prezzo = get_datetime_from_ordinal_hour(domani, (1 + h))
-            attributes[str(data_ora_prezzo)] = self._pun_orari.get(str(data_ora_prezzo))
+        # Aggiunge i prezzi di oggi e domani negli attributi (se non disattivati)
+        if self.coordinator.price_attributes:
+            attributes.update(self._anello.get_attributes())
 
         # Restituisce gli attributi
         return attributes
@@ -1035,7 +1097,12 @@ class PUN15MinSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
         self._available: bool = False
         self._native_value: float = 0
         self._friendly_name: str = "PUN 15 min"
-        self._pun_15min: dict[str, float | None] = {}
+        self._anello: AnelloGiorni = AnelloGiorni(
+            lambda: self.coordinator.pun_data.pun_15min,
+            prezzi_15min=True,
+            condiviso=coordinator.memory_budget,
+        )
+        self._compatto: dict[str, Any] | None = None
 
     def _handle_coordinator_update(self) -> None:
         """Gestisce l'aggiornamento dei dati dal coordinator."""
@@ -1050,8 +1117,9 @@ class PUN15MinSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
         if coordinator_event == EVENT_UPDATE_PUN:
             # Verifica che il coordinator abbia i prezzi
             if self.coordinator.pun_data.pun_15min:
-                # Copia i dati dal coordinator in locale (per il backup)
-                self._pun_15min = dict(self.coordinator.pun_data.pun_15min)
+                # Carica i prezzi di oggi e domani dal coordinator
+                self._anello.load(self.coordinator.orario_prezzo_15min.date())
+                self._compatto = self.coordinator.get_compact_prices("pun_15min")
 
         # Cambiato l'orario del prezzo
         if coordinator_event in (EVENT_UPDATE_PUN, EVENT_UPDATE_PREZZO_ZONALE_15MIN):
@@ -1061,18 +1129,14 @@ class PUN15MinSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
                 self.coordinator.orario_prezzo_15min,
                 get_periodo_15min(self.coordinator.orario_prezzo_15min),
             )
-            if str(self.coordinator.orario_prezzo_15min) in self._pun_15min:
-                # Aggiorna il valore al prezzo orario
-                if (
-                    valore := self._pun_15min[str(self.coordinator.orario_prezzo_15min)]
-                ) is not None:
-                    self._native_value = valore
-                    self._available = True
-                else:
-                    # Prezzo non disponibile
-                    self._available = False
+            # Prezzo corrente (dai prezzi di oggi e domani)
+            if (
+                valore := self._anello.get_prezzo(self.coordinator.orario_prezzo_15min)
+            ) is not None:
+                self._native_value = valore
+                self._available = True
             else:
-                # Orario non disponibile
+                # Prezzo o orario non disponibile
                 self._available = False
 
         # Aggiorna lo stato di Home Assistant
@@ -1085,7 +1149,10 @@ class PUN15MinSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
         # Salva i dati per la prossima istanza
         return RestoredExtraData(
             {
-                "pun_15min": self._pun_15min,
+                "versione": RESTORE_STATE_VERSION,
+                "pun_15min": self._compatto
+                if self._compatto is not None
+                else pack_prices(self._anello.get_attributes(), prezzi_15min=True),
             }
         )
 
@@ -1099,24 +1166,25 @@ class PUN15MinSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
             old_data_dict = old_data.as_dict()
 
             # Valori dei prezzi a 15 minuti
-            if (old_pun_15min := old_data_dict.get("pun_15min")) is not None:
-                self._pun_15min = old_pun_15min
+            if (
+                old_pun_15min := get_restored_prices(old_data_dict, "pun_15min")
+            ) is not None:
+                self._anello.load(
+                    self.coordinator.orario_prezzo_15min.date(), old_pun_15min
+                )
+                # Al salvataggio i prezzi vengono ricavati dall'anello
+                self._compatto = None
 
                 # Controlla se il prezzo a 15 minuti esiste per il periodo corrente
-                if str(self.coordinator.orario_prezzo_15min) in self._pun_15min:
-                    # Aggiorna il valore al prezzo a 15 minuti
-                    if (
-                        valore := self._pun_15min[
-                            str(self.coordinator.orario_prezzo_15min)
-                        ]
-                    ) is not None:
-                        self._native_value = valore
-                        self._available = True
-                    else:
-                        # Prezzo non disponibile
-                        self._available = False
+                if (
+                    valore := self._anello.get_prezzo(
+                        self.coordinator.orario_prezzo_15min
+                    )
+                ) is not None:
+                    self._native_value = valore
+                    self._available = True
                 else:
-                    # Imposta come non disponibile
+                    # Prezzo o orario non disponibile
                     self._available = False
 
     @property
@@ -1158,23 +1226,190 @@ class PUN15MinSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
         # Crea il dizionario degli attributi
         attributes: dict[str, Any] = {}
 
-        # Aggiunge i prezzi a 15 minuti negli attributi, periodo per periodo
-        # Prezzi di oggi
-        max_15min_oggi: int = 4 * get_total_hours(self.coordinator.orario_prezzo_15min)
-        for p in range(max_15min_oggi):
-            data_ora_prezzo = get_datetime_from_periodo_15min(
-                self.coordinator.orario_prezzo_15min, (1 + p)
+        # Posizione del prezzo corrente rispetto al giorno e alle 24 ore successive
+        attributes.update(
+            get_rank_attributes(
+                self.coordinator.get_price_ranks("pun_15min").get(
+                    str(self.coordinator.orario_prezzo_15min)
+                )
             )
-            attributes[str(data_ora_prezzo)] = self._pun_15min.get(str(data_ora_prezzo))
-
-        # Prezzi di domani
-        domani = add_timedelta_via_utc(
-            dt=self.coordinator.orario_prezzo_15min, full_days=1
         )
-        max_15min_domani: int = 4 * get_total_hours(domani)
-        for p in range(max_15min_domani):
-            data_ora_prezzo = get_datetime_from_periodo_15min(domani, (1 + p))
-            attributes[str(data_ora_prezzo)] = self._pun_15min.get(str(data_ora_prezzo))
+
+        # Aggiunge i prezzi di oggi e domani negli attributi (se non disattivati)
+        if self.coordinator.price_attributes:
+            attributes.update(self._anello.get_attributes())
 
         # Restituisce gli attributi
         return attributes
+
+
+class PUNMetricSensorEntity(CoordinatorEntity, SensorEntity):
+    """Sensore diagnostico con una metrica dell'ultimo aggiornamento dei prezzi."""
+
+    def __init__(
+        self,
+        coordinator: PUNDataUpdateCoordinator,
+        metrica: tuple[str, str, str | None, SensorDeviceClass | None],
+    ) -> None:
+        """Inizializza il sensore."""
+        super().__init__(coordinator)
+
+        # Inizializza coordinator e metrica
+        self.coordinator: PUNDataUpdateCoordinator = coordinator
+        self.metrica: str = metrica[0]
+
+        # ID univoco sensore basato sul nome della metrica
+        self.entity_id = ENTITY_ID_FORMAT.format(f"pun_{self.metrica}")
+        self._attr_unique_id = self.entity_id
+        self._attr_has_entity_name = True
+
+        # Sensore diagnostico, disattivato di default
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_entity_registry_enabled_default = False
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_name = metrica[1]
+        self._attr_native_unit_of_measurement = metrica[2]
+        self._attr_device_class = metrica[3]
+
+    def _handle_coordinator_update(self) -> None:
+        """Gestisce l'aggiornamento dei dati dal coordinator."""
+
+        # Identifica l'evento che ha scatenato l'aggiornamento
+        if self.coordinator.data is None:
+            return
+        if (coordinator_event := self.coordinator.data.get(COORD_EVENT)) is None:
+            return
+
+        # Aggiorna il sensore in caso di nuove metriche
+        if coordinator_event != EVENT_UPDATE_METRICS:
+            return
+
+        self.async_write_ha_state()
+
+    @property
+    def should_poll(self) -> bool:
+        """Determina l'aggiornamento automatico."""
+        return False
+
+    @property
+    def available(self) -> bool:
+        """Determina se il valore è disponibile."""
+        return self.coordinator.metrics.ultimo_aggiornamento is not None
+
+    @property
+    def native_value(self) -> float:
+        """Valore corrente della metrica."""
+        return getattr(self.coordinator.metrics, self.metrica)
+
+    @property
+    def icon(self) -> str:
+        """Icona da usare nel frontend."""
+        return "mdi:timer-outline"
+
+
+class PUNCostoMeseSensorEntity(CoordinatorEntity, SensorEntity, RestoreEntity):
+    """Sensore con il costo dell'energia consumata nel mese (a prezzo PUN)."""
+
+    def __init__(
+        self, coordinator: PUNDataUpdateCoordinator, costi: PUNCostEngine
+    ) -> None:
+        """Inizializza il sensore."""
+        super().__init__(coordinator)
+
+        # Inizializza coordinator e calcolo del costo
+        self.coordinator: PUNDataUpdateCoordinator = coordinator
+        self._costi: PUNCostEngine = costi
+
+        # ID univoco sensore basato su un nome fisso
+        self.entity_id = ENTITY_ID_FORMAT.format("pun_costo_mese")
+        self._attr_unique_id = self.entity_id
+        self._attr_has_entity_name = True
+
+        # Inizializza le proprietà comuni
+        self._attr_device_class = SensorDeviceClass.MONETARY
+        self._attr_state_class = SensorStateClass.TOTAL
+        self._attr_suggested_display_precision = 2
+
+    def _handle_coordinator_update(self) -> None:
+        """Gestisce l'aggiornamento dei dati dal coordinator."""
+
+        # Identifica l'evento che ha scatenato l'aggiornamento
+        if self.coordinator.data is None:
+            return
+        if (coordinator_event := self.coordinator.data.get(COORD_EVENT)) is None:
+            return
+
+        # Aggiorna il sensore in caso di nuovo costo calcolato
+        if coordinator_event != EVENT_UPDATE_COSTI:
+            return
+
+        self.async_write_ha_state()
+
+    @property
+    def extra_restore_state_data(self) -> ExtraStoredData:
+        """Determina i dati da salvare per il ripristino successivo."""
+        return RestoredExtraData(self._costi.as_dict())
+
+    async def async_added_to_hass(self) -> None:
+        """Entità aggiunta ad Home Assistant."""
+        await super().async_added_to_hass()
+
+        # Recupera i totali precedenti (se il calcolo non è già partito)
+        if (self._costi.mese is None) and (
+            (old_data := await self.async_get_last_extra_data()) is not None
+        ):
+            self._costi.from_dict(old_data.as_dict())
+
+    @property
+    def should_poll(self) -> bool:
+        """Determina l'aggiornamento automatico."""
+        return False
+
+    @property
+    def available(self) -> bool:
+        """Determina se il valore è disponibile."""
+        return self._costi.mese is not None
+
+    @property
+    def native_value(self) -> float:
+        """Costo del mese a prezzo PUN."""
+        return round(self._costi.costo_pun[Fascia.MONO], 4)
+
+    @property
+    def last_reset(self) -> datetime | None:
+        """Inizio del mese a cui si riferisce il costo."""
+        if (mese := self._costi.mese) is None:
+            return None
+        return datetime(mese.year, mese.month, 1, tzinfo=ZoneInfo("Europe/Rome"))
+
+    @property
+    def native_unit_of_measurement(self) -> str:
+        """Unita' di misura."""
+        return CURRENCY_EURO
+
+    @property
+    def icon(self) -> str:
+        """Icona da usare nel frontend."""
+        return "mdi:cash-clock"
+
+    @property
+    def name(self) -> str:
+        """Restituisce il nome del sensore."""
+        return "Costo energia mese"
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Restituisce energia e costi per fascia."""
+        costi: PUNCostEngine = self._costi
+        attributes: dict[str, Any] = {
+            "ultima_ora": costi.ultima_ora.isoformat()
+            if costi.ultima_ora is not None
+            else None,
+            "ore_senza_prezzo": len(costi.ore_senza_prezzo),
+        }
+        for fascia in Fascia:
+            nome: str = fascia.name.lower()
+            attributes[f"energia_{nome}"] = round(costi.energia[fascia], 3)
+            attributes[f"costo_{nome}"] = round(costi.costo_pun[fascia], 4)
+            attributes[f"costo_zonale_{nome}"] = round(costi.costo_zonale[fascia], 4)
+        return attributes
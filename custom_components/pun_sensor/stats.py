@@ -0,0 +1,156 @@
+"""Pubblicazione dei prezzi come statistiche a lungo termine di Home Assistant."""
+
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from itertools import chain
+import logging
+from statistics import mean
+from typing import TYPE_CHECKING
+
+from awesomeversion.awesomeversion import AwesomeVersion
+
+from homeassistant.const import CURRENCY_EURO, UnitOfEnergy, __version__ as HA_VERSION
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .interfaces import PunData
+
+# Il recorder (con SQLAlchemy) è solo una dipendenza facoltativa (after_dependencies):
+# viene importato solo quando serve, non al caricamento dell'integrazione
+if TYPE_CHECKING:
+    from homeassistant.components.recorder.models import (
+        StatisticData,
+        StatisticMetaData,
+    )
+
+# Ottiene il logger
+_LOGGER = logging.getLogger(__name__)
+
+
+def get_ora_utc(orario: str) -> datetime:
+    """Restituisce l'inizio in UTC dell'ora a cui appartiene l'orario (chiave dei prezzi)."""
+    return (
+        datetime.fromisoformat(orario)
+        .astimezone(timezone.utc)
+        .replace(minute=0, second=0, microsecond=0)
+    )
+
+
+def group_by_hour(
+    prezzi: Iterable[tuple[str, float | None]],
+) -> dict[datetime, list[float]]:
+    """Raggruppa i prezzi disponibili per ora (inizio in UTC)."""
+    ore: dict[datetime, list[float]] = {}
+    for orario, prezzo in prezzi:
+        if prezzo is not None:
+            ore.setdefault(get_ora_utc(orario), []).append(prezzo)
+    return ore
+
+
+def get_prezzi_per_ora(
+    pun_data: PunData,
+) -> tuple[dict[datetime, list[float]], dict[datetime, list[float]]]:
+    """Raggruppa per ora tutti i PUN e i prezzi zonali disponibili.
+
+    Considera sia i giorni passati del mese sia oggi e domani; i prezzi
+    a 15 minuti vengono usati (raggruppati nell'ora a cui appartengono)
+    solo per le ore senza prezzi orari.
+    """
+    pun: dict[datetime, list[float]] = group_by_hour(
+        chain(
+            ((o, p[0]) for o, p in pun_data.storico_orari.items()),
+            pun_data.pun_orari.items(),
+        )
+    )
+    zonali: dict[datetime, list[float]] = group_by_hour(
+        chain(
+            ((o, p[1]) for o, p in pun_data.storico_orari.items()),
+            pun_data.prezzi_zonali.items(),
+        )
+    )
+
+    # Prezzi a 15 minuti
+    for ora_utc, valori in group_by_hour(
+        chain(
+            ((o, p[0]) for o, p in pun_data.storico_15min.items()),
+            pun_data.pun_15min.items(),
+        )
+    ).items():
+        pun.setdefault(ora_utc, valori)
+    for ora_utc, valori in group_by_hour(
+        chain(
+            ((o, p[1]) for o, p in pun_data.storico_15min.items()),
+            pun_data.prezzi_zonali_15min.items(),
+        )
+    ).items():
+        zonali.setdefault(ora_utc, valori)
+
+    return pun, zonali
+
+
+def build_statistics(prezzi: dict[datetime, list[float]]) -> list["StatisticData"]:
+    """Crea le righe orarie (media, minimo e massimo) ordinate per orario."""
+    return [
+        {"start": ora_utc, "mean": mean(valori), "min": min(valori), "max": max(valori)}
+        for ora_utc, valori in sorted(prezzi.items())
+    ]
+
+
+def build_metadata(statistic_id: str, nome: str) -> "StatisticMetaData":
+    """Crea i metadati della statistica esterna di un prezzo."""
+    metadata: StatisticMetaData = {
+        "has_sum": False,
+        "name": nome,
+        "source": DOMAIN,
+        "statistic_id": statistic_id,
+        "unit_of_measurement": f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
+    }
+    if AwesomeVersion(HA_VERSION) >= AwesomeVersion("2025.4.0"):
+        from homeassistant.components.recorder.models import (  # noqa: PLC0415
+            StatisticMeanType,
+        )
+
+        metadata["mean_type"] = StatisticMeanType.ARITHMETIC
+    else:
+        metadata["has_mean"] = True
+    if AwesomeVersion(HA_VERSION) >= AwesomeVersion("2025.10.0"):
+        # Nessuna conversione di unità per i prezzi
+        metadata["unit_class"] = None
+    return metadata
+
+
+def async_publish_statistics(hass: HomeAssistant, pun_data: PunData) -> int:
+    """Importa i prezzi del mese nelle statistiche esterne del recorder.
+
+    Ogni serie (PUN e prezzo zonale) viene inviata con un'unica chiamata;
+    le ore già presenti vengono sovrascritte dal recorder.
+    Restituisce il numero di righe importate.
+    """
+    if "recorder" not in hass.config.components:
+        return 0
+    from homeassistant.components.recorder.statistics import (  # noqa: PLC0415
+        async_add_external_statistics,
+    )
+
+    pun, zonali = get_prezzi_per_ora(pun_data)
+    righe: int = 0
+    if pun:
+        async_add_external_statistics(
+            hass,
+            build_metadata(f"{DOMAIN}:pun_orario", "PUN orario"),
+            build_statistics(pun),
+        )
+        righe += len(pun)
+    if zonali and (pun_data.zona is not None):
+        async_add_external_statistics(
+            hass,
+            build_metadata(
+                f"{DOMAIN}:prezzo_zonale_{pun_data.zona.name.lower()}",
+                f"Prezzo zonale ({pun_data.zona.value})",
+            ),
+            build_statistics(zonali),
+        )
+        righe += len(zonali)
+
+    _LOGGER.debug("Importate %s righe nelle statistiche a lungo termine.", righe)
+    return righe
@@ -0,0 +1,133 @@
+"""Eventi di Home Assistant negli istanti in cui il prezzo attraversa le soglie."""
+
+from datetime import date, datetime
+from typing import Any, NamedTuple
+
+from .interfaces import PunData
+from .utils import add_timedelta_via_utc
+
+
+class EventoPrezzo(NamedTuple):
+    """Evento da inviare sul bus di Home Assistant all'istante indicato."""
+
+    istante: datetime
+    dati: dict[str, Any]
+
+
+def parse_number_list(testo: str | None, interi: bool = False) -> list[Any]:
+    """Restituisce i numeri di un elenco separato da punto e virgola (es. "0,10; 0.15").
+
+    Accetta sia la virgola sia il punto come separatore decimale;
+    i valori sono ordinati e senza duplicati.
+
+    Raises:
+        ValueError: se uno dei valori non è un numero valido (o non è intero).
+
+    """
+    valori: set[Any] = set()
+    for parte in (testo or "").split(";"):
+        if not (parte := parte.strip()):
+            continue
+        valori.add(int(parte) if interi else float(parte.replace(",", ".")))
+    return sorted(valori)
+
+
+def get_prezzi_giorni(
+    pun_data: PunData,
+) -> dict[date, tuple[int, list[tuple[datetime, float]]]]:
+    """Restituisce i PUN disponibili per ogni giorno, ordinati per orario.
+
+    Per ciascun giorno vengono usati i prezzi a 15 minuti se presenti,
+    altrimenti quelli orari; il primo elemento è la durata dei periodi in minuti.
+    """
+    giorni: dict[date, tuple[int, list[tuple[datetime, float]]]] = {}
+    for minuti, prezzi in ((15, pun_data.pun_15min), (60, pun_data.pun_orari)):
+        per_giorno: dict[date, list[tuple[datetime, float]]] = {}
+        for orario_str, prezzo in prezzi.items():
+            if prezzo is not None:
+                orario: datetime = datetime.fromisoformat(orario_str)
+                per_giorno.setdefault(orario.date(), []).append((orario, prezzo))
+        for giorno, valori in per_giorno.items():
+            giorni.setdefault(giorno, (minuti, sorted(valori)))
+    return dict(sorted(giorni.items()))
+
+
+def build_evento_economico(
+    orario: datetime, ore: int, inizio: bool, prezzo: float | None
+) -> EventoPrezzo:
+    """Evento di inizio o fine di un intervallo tra le N ore più economiche."""
+    return EventoPrezzo(
+        orario,
+        {
+            "tipo": "ore_economiche",
+            "ore": ore,
+            "direzione": "inizio" if inizio else "fine",
+            "prezzo": prezzo,
+            "orario": orario.isoformat(),
+        },
+    )
+
+
+def build_price_events(
+    pun_data: PunData,
+    soglie: list[float],
+    ore_economiche: list[int],
+    now: datetime,
+) -> list[EventoPrezzo]:
+    """Calcola gli istanti futuri in cui il PUN attraversa le soglie configurate.
+
+    Per ogni soglia viene generato un evento quando il prezzo scende sotto
+    (o torna sopra) il valore, dove un prezzo uguale alla soglia non è
+    considerato sotto; per ogni numero di ore economiche un evento
+    all'inizio e alla fine di ciascun intervallo appartenente alle N ore
+    più economiche del giorno. Un prezzo mancante interrompe l'intervallo.
+    """
+    giorni = get_prezzi_giorni(pun_data)
+    eventi: list[EventoPrezzo] = []
+
+    # Attraversamento delle soglie (sui prezzi consecutivi di oggi e domani)
+    precedente: float | None = None
+    for _, prezzi in giorni.values():
+        for orario, prezzo in prezzi:
+            if precedente is not None:
+                eventi.extend(
+                    EventoPrezzo(
+                        orario,
+                        {
+                            "tipo": "soglia",
+                            "soglia": soglia,
+                            "direzione": "sotto" if prezzo < soglia else "sopra",
+                            "prezzo": prezzo,
+                            "orario": orario.isoformat(),
+                        },
+                    )
+                    for soglia in soglie
+                    if (precedente < soglia) != (prezzo < soglia)
+                )
+            precedente = prezzo
+
+    # Ore più economiche di ciascun giorno (un solo ordinamento per giorno)
+    for minuti, prezzi in giorni.values():
+        ordinati: list[int] = sorted(range(len(prezzi)), key=lambda i: prezzi[i][1])
+        for ore in ore_economiche:
+            economici: set[int] = set(ordinati[: ore * 60 // minuti])
+            dentro: bool = False
+            fine: datetime = prezzi[0][0]
+            for i, (orario, prezzo) in enumerate(prezzi):
+                if dentro and (orario != fine):
+                    # Prezzo mancante: l'intervallo termina dove iniziano i dati mancanti
+                    eventi.append(build_evento_economico(fine, ore, False, None))
+                    dentro = False
+                if (i in economici) != dentro:
+                    dentro = not dentro
+                    eventi.append(build_evento_economico(orario, ore, dentro, prezzo))
+                fine = add_timedelta_via_utc(dt=orario, minutes=minuti)
+            if dentro:
+                # Termine dell'ultimo periodo del giorno
+                eventi.append(build_evento_economico(fine, ore, False, None))
+
+    # Solo gli eventi futuri, in ordine di tempo
+    return sorted(
+        (evento for evento in eventi if evento.istante > now),
+        key=lambda evento: evento.istante,
+    )
@@ -1,118 +1,120 @@
 """Metodi di utilità generale."""
 
+from array import array
+from collections.abc import Callable, Iterable
 from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+import io
 import logging
+from math import isnan, nan
+import random
+import sys
+import time
+from typing import IO, Any, NamedTuple
 from zipfile import ZipFile
 from zoneinfo import ZoneInfo
 
 import defusedxml.ElementTree as et  # type: ignore[import-untyped]
 import holidays
 
-from .interfaces import Fascia, PunData
+from .bands import (
+    PeriodoFascia,
+    get_fasce_tipo_giorno,
+    get_fascia_ora,
+    get_periodi,
+    tz_pun,
+)
+from .interfaces import Completezza, Fascia, FetchMetrics, PunData, Zona
+
+try:
+    from lxml import etree as lxml_etree  # type: ignore[import-untyped]
+except ImportError:
+    lxml_etree = None
 
 # Ottiene il logger
 _LOGGER = logging.getLogger(__name__)
 
+# Elementi XML con i prezzi zonali
+TAG_ZONE: frozenset[str] = frozenset(Zona.__members__)
 
-def get_fascia_for_xml(data: date, festivo: bool, ora: int) -> Fascia:
-    """Restituisce la fascia oraria di un determinato giorno/ora."""
-    # F1 = lu-ve 8-19
-    # F2 = lu-ve 7-8, lu-ve 19-23, sa 7-23
-    # F3 = lu-sa 0-7, lu-sa 23-24, do, festivi
 
-    # Festivi e domeniche
-    if festivo or (data.weekday() == 6):
-        return Fascia.F3
+class XMLBackend(NamedTuple):
+    """Libreria usata per esaminare i file XML del GME."""
 
-    # Sabato
-    if data.weekday() == 5:
-        if 7 <= ora < 23:
-            return Fascia.F2
-        return Fascia.F3
+    # Nome della libreria (per la diagnostica)
+    nome: str
 
-    # Altri giorni della settimana
-    if ora == 7 or 19 <= ora < 23:
-        return Fascia.F2
-    if 8 <= ora < 19:
-        return Fascia.F1
-    return Fascia.F3
+    # Restituisce l'elemento radice del file XML
+    parse: Callable[[IO[bytes]], Any]
 
+    # Restituisce il testo XML di un elemento (per i messaggi di log)
+    tostring: Callable[[Any], str]
 
-def get_fascia(dataora: datetime) -> tuple[Fascia, datetime]:
-    """Restituisce la fascia della data/ora indicata e la data del prossimo cambiamento."""
-
-    # Verifica se la data corrente è un giorno con festività
-    festivo: bool = dataora in holidays.IT()  # type: ignore[attr-defined]
-
-    # Identifica la fascia corrente
-    # F1 = lu-ve 8-19
-    # F2 = lu-ve 7-8, lu-ve 19-23, sa 7-23
-    # F3 = lu-sa 0-7, lu-sa 23-24, do, festivi
-    # Festivi
-    if festivo:
-        fascia: Fascia = Fascia.F3
-
-        # Prossima fascia: alle 7 di un giorno non domenica o festività
-        prossima: datetime = get_next_date(dataora, 7, 1, True)
-
-        return fascia, prossima
-    match dataora.weekday():
-        # Domenica
-        case 6:
-            fascia = Fascia.F3
-            prossima = get_next_date(dataora, 7, 1, True)
-
-        # Sabato
-        case 5:
-            if 7 <= dataora.hour < 23:
-                # Sabato dalle 7 alle 23
-                fascia = Fascia.F2
-                # Prossima fascia: alle 23 dello stesso giorno
-                prossima = get_next_date(dataora, 23)
-            # abbiamo solo due fasce quindi facciamo solo il check per la prossima fascia
-            else:
-                # Sabato dopo le 23 e prima delle 7
-                fascia = Fascia.F3
-
-                if dataora.hour < 7:
-                    # Prossima fascia: alle 7 dello stesso giorno
-                    prossima = get_next_date(dataora, 7)
-                else:
-                    # Prossima fascia: alle 7 di un giorno non domenica o festività
-                    prossima = get_next_date(dataora, 7, 1, True)
-
-        # Altri giorni della settimana
-        case _:
-            if dataora.hour == 7 or 19 <= dataora.hour < 23:
-                # Lunedì-venerdì dalle 7 alle 8 e dalle 19 alle 23
-                fascia = Fascia.F2
-
-                if dataora.hour == 7:
-                    # Prossima fascia: alle 8 dello stesso giorno
-                    prossima = get_next_date(dataora, 8)
-                else:
-                    # Prossima fascia: alle 23 dello stesso giorno
-                    prossima = get_next_date(dataora, 23)
-
-            elif 8 <= dataora.hour < 19:
-                # Lunedì-venerdì dalle 8 alle 19
-                fascia = Fascia.F1
-                # Prossima fascia: alle 19 dello stesso giorno
-                prossima = get_next_date(dataora, 19)
 
-            else:
-                # Lunedì-venerdì dalle 23 alle 7 del giorno dopo
-                fascia = Fascia.F3
+def parse_lxml(file_xml: IO[bytes]) -> Any:
+    """Esamina il file XML con lxml, senza DTD, entità esterne né accesso alla rete.
+
+    Il parser viene creato a ogni chiamata perché non può essere condiviso
+    tra i thread che esaminano i file in parallelo; commenti e istruzioni di
+    elaborazione vengono scartati come fa ElementTree.
+    """
+    parser = lxml_etree.XMLParser(
+        resolve_entities=False,
+        no_network=True,
+        load_dtd=False,
+        huge_tree=False,
+        remove_comments=True,
+        remove_pis=True,
+    )
+    return lxml_etree.parse(file_xml, parser).getroot()
+
 
-                if dataora.hour < 7:
-                    # Siamo dopo la mezzanotte
-                    # Prossima fascia: alle 7 dello stesso giorno
-                    prossima = get_next_date(dataora, 7)
-                else:
-                    # Prossima fascia: alle 7 di un giorno non domenica o festività
-                    prossima = get_next_date(dataora, 7, 1, True)
+def get_xml_backend(usa_lxml: bool = True) -> XMLBackend:
+    """Restituisce lxml se installato (e richiesto), altrimenti defusedxml.
+
+    lxml non è tra i requisiti del manifest: viene usata solo se è già
+    presente nell'ambiente di Home Assistant. Entrambe producono gli stessi
+    elementi per i file del GME (vedere tests/test_parse.py).
+    """
+    if usa_lxml and (lxml_etree is not None):
+        return XMLBackend(
+            "lxml",
+            parse_lxml,
+            lambda elemento: lxml_etree.tostring(elemento, encoding="unicode"),
+        )
+    return XMLBackend(
+        "defusedxml",
+        lambda file_xml: et.parse(file_xml).getroot(),
+        lambda elemento: et.tostring(elemento, encoding="unicode", method="xml"),
+    )
+
+
+# Libreria usata per esaminare i file XML
+XML_BACKEND: XMLBackend = get_xml_backend()
+
+
+def get_fascia_for_xml(data: date, festivo: bool, ora: int) -> Fascia:
+    """Restituisce la fascia oraria di un determinato giorno/ora.
+
+    Le fasce sono definite una sola volta nelle tabelle di bands.py.
+    """
+    return get_fascia_ora(get_fasce_tipo_giorno(data, festivo), ora)
+
+
+def get_fascia(dataora: datetime) -> tuple[Fascia, datetime]:
+    """Restituisce la fascia della data/ora indicata e la data del prossimo cambiamento.
 
-    return fascia, prossima
+    Il prossimo cambiamento è la fine del periodo della fascia in corso, che
+    comprende già i giorni successivi della stessa fascia (ad esempio il fine
+    settimana o le festività), come calcolato da bands.get_periodi().
+    """
+    dataora = dataora.astimezone(tz_pun)
+    periodo: PeriodoFascia = next(
+        periodo
+        for periodo in get_periodi(dataora.date(), dataora.date())
+        if periodo.fine > dataora
+    )
+    return periodo.fascia, periodo.fine
 
 
 def get_next_date(
@@ -143,6 +145,30 @@ def get_next_date(
     return prossima
 
 
+def get_retry_delay(tentativo: int, base_minuti: int, max_minuti: int) -> timedelta:
+    """Restituisce l'attesa prima del prossimo tentativo (backoff esponenziale con jitter).
+
+    Args:
+    tentativo (int): numero di tentativi falliti finora (da 0).
+    base_minuti (int): attesa in minuti del primo tentativo.
+    max_minuti (int): attesa massima in minuti.
+
+    Returns:
+        timedelta: attesa casuale compresa tra metà e l'intero ritardo esponenziale.
+
+    """
+    # Calcola il ritardo esponenziale, limitato al massimo
+    ritardo: float = min(max_minuti, base_minuti * (2 ** min(tentativo, 16)))
+
+    # Applica il jitter per evitare che tutte le istanze riprovino insieme
+    return timedelta(minutes=random.uniform(ritardo / 2, ritardo))
+
+
+def elapsed_ms(inizio: float) -> float:
+    """Restituisce i millisecondi trascorsi da `inizio` (ottenuto da time.perf_counter)."""
+    return round((time.perf_counter() - inizio) * 1000, 3)
+
+
 def get_hour_datetime(dataora: datetime) -> datetime:
     """Restituisce un datetime con solo la data e l'ora.
 
@@ -166,6 +192,79 @@ def get_hour_datetime(dataora: datetime) -> datetime:
     )
 
 
+class TabellaGiorno(NamedTuple):
+    """Tabella di conversione tra ore/periodi progressivi e orari di un giorno."""
+
+    # Mezzanotte locale del giorno, espressa in UTC
+    mezzanotte_utc: datetime
+
+    # Ore locali effettive del giorno (23, 24 oppure 25)
+    ore_totali: int
+
+    # Orario locale di inizio di ciascuna ora progressiva (1..ore_totali)
+    ore: tuple[datetime, ...]
+
+    # Orario locale di inizio di ciascun periodo di 15 minuti (1..4*ore_totali)
+    periodi_15min: tuple[datetime, ...]
+
+    # Chiavi dei dizionari dei prezzi (str dell'orario) di ore e periodi
+    chiavi_ore: tuple[str, ...]
+    chiavi_15min: tuple[str, ...]
+
+
+@lru_cache(maxsize=32)
+def get_day_table(
+    giorno: date, ref_tz: ZoneInfo = ZoneInfo("Europe/Rome")
+) -> TabellaGiorno:
+    """Restituisce la tabella di conversione del giorno, calcolata una sola volta.
+
+    Le conversioni passano da UTC per considerare i cambi ora solare/legale;
+    le tabelle dei giorni usati più di recente restano in cache.
+
+    Args:
+        giorno: giorno di cui calcolare la tabella
+        ref_tz: timezone di riferimento per il calcolo (di default usa "Europe/Rome")
+
+    Returns:
+        TabellaGiorno: mezzanotte in UTC, ore totali e orari di inizio di ore e periodi
+
+    Example:
+        >>> get_day_table(date(2025, 10, 26)).ore_totali
+        25
+
+        >>> get_day_table(date(2026, 3, 29)).ore[2]
+        datetime.datetime(2026, 3, 29, 3, 0, tzinfo=zoneinfo.ZoneInfo(key='Europe/Rome'))
+
+    """
+    # Calcola in UTC la mezzanotte locale del giorno e quella del giorno successivo
+    domani: date = giorno + timedelta(days=1)
+    start_utc: datetime = datetime(
+        giorno.year, giorno.month, giorno.day, tzinfo=ref_tz
+    ).astimezone(timezone.utc)
+    end_utc: datetime = datetime(
+        domani.year, domani.month, domani.day, tzinfo=ref_tz
+    ).astimezone(timezone.utc)
+
+    # Ore locali effettive trascorse tra le due mezzanotti
+    ore_totali: int = int((end_utc - start_utc).total_seconds() // 3600)
+
+    ore: tuple[datetime, ...] = tuple(
+        (start_utc + timedelta(hours=h)).astimezone(ref_tz) for h in range(ore_totali)
+    )
+    periodi_15min: tuple[datetime, ...] = tuple(
+        (start_utc + timedelta(minutes=15 * p)).astimezone(ref_tz)
+        for p in range(4 * ore_totali)
+    )
+    return TabellaGiorno(
+        mezzanotte_utc=start_utc,
+        ore_totali=ore_totali,
+        ore=ore,
+        periodi_15min=periodi_15min,
+        chiavi_ore=tuple(str(orario) for orario in ore),
+        chiavi_15min=tuple(str(orario) for orario in periodi_15min),
+    )
+
+
 def get_ordinal_hour(dt: datetime, ref_tz: ZoneInfo = ZoneInfo("Europe/Rome")) -> int:
     """Restituisce un numero progressivo dell'ora (1-24 normalmente, 1-23 in primavera, 1-25 in autunno), contando le ore locali effettive trascorse dalla mezzanotte.
 
@@ -193,17 +292,14 @@ def get_ordinal_hour(dt: datetime, ref_tz: ZoneInfo = ZoneInfo("Europe/Rome")) -
             "L'argomento dt deve essere timezone-aware (es. ZoneInfo('Europe/Rome'))."
         )
 
-    # Calcola la mezzanotte locale
-    local_midnight: datetime = datetime(dt.year, dt.month, dt.day, 0, 0, tzinfo=ref_tz)
-
-    # Converte la mezzanotte in UTC
-    start_utc: datetime = local_midnight.astimezone(timezone.utc)
-
-    # Converte l'ora passata in UTC
-    dt_utc: datetime = dt.astimezone(timezone.utc)
+    # Recupera la mezzanotte in UTC dalla tabella del giorno
+    # (la differenza tra datetime con fusi orari diversi è calcolata in UTC)
+    start_utc: datetime = get_day_table(
+        date(dt.year, dt.month, dt.day), ref_tz
+    ).mezzanotte_utc
 
     # Calcola il numero di ore passate dalla mezzanotte in UTC e somma 1
-    return int((dt_utc - start_utc).total_seconds() // 3600) + 1
+    return int((dt - start_utc).total_seconds() // 3600) + 1
 
 
 def get_total_hours(
@@ -232,27 +328,19 @@ def get_total_hours(
     """
     # Verifica se dt è un date
     if type(dt) is date:
-        # Converte la date in datetime alle 23 per la timezone di riferimento e restituisce l'ora progressiva
-        return get_ordinal_hour(
-            datetime(
-                year=dt.year,
-                month=dt.month,
-                day=dt.day,
-                hour=23,
-                minute=0,
-                second=0,
-                microsecond=0,
-                tzinfo=ref_tz,
-            ),
-            ref_tz,
-        )
+        # Restituisce le ore totali dalla tabella del giorno
+        return get_day_table(dt, ref_tz).ore_totali
 
     # Verifica se dt è un datetime
     if type(dt) is datetime:
-        # Se è un datetime (con o senza timezone verrà verificato a valle), resetta l'orario alle 23 e restituisce l'ora progressiva
-        return get_ordinal_hour(
-            dt.replace(hour=23, minute=0, second=0, microsecond=0), ref_tz
-        )
+        # Controllo presenza fuso orario negli argomenti
+        if dt.tzinfo is None:
+            raise ValueError(
+                "L'argomento dt deve essere timezone-aware (es. ZoneInfo('Europe/Rome'))."
+            )
+
+        # Restituisce le ore totali dalla tabella del giorno
+        return get_day_table(dt.date(), ref_tz).ore_totali
 
     # Altrimenti solleva un'eccezione
     raise TypeError("L'argomento dt deve essere datetime o date.")
@@ -325,17 +413,17 @@ def get_datetime_from_ordinal_hour(
     if not (1 <= ordinal_hour <= 25):
         raise ValueError("ordinal_hour deve essere compreso tra 1 e 25")
 
-    # Calcola la mezzanotte locale
-    local_midnight: datetime = datetime(dt.year, dt.month, dt.day, 0, 0, tzinfo=ref_tz)
-
-    # Converte la mezzanotte in UTC
-    start_utc: datetime = local_midnight.astimezone(timezone.utc)
+    # Recupera la tabella del giorno
+    tabella: TabellaGiorno = get_day_table(date(dt.year, dt.month, dt.day), ref_tz)
 
-    # Aggiunge le ore locali effettive trascorse dalla mezzanotte
-    end_utc: datetime = start_utc + timedelta(hours=ordinal_hour - 1)
+    # Ritorna l'orario locale precalcolato
+    if ordinal_hour <= tabella.ore_totali:
+        return tabella.ore[ordinal_hour - 1]
 
-    # Ritorna l'orario locale corrispondente
-    return end_utc.astimezone(ref_tz)
+    # Ora oltre la fine del giorno: aggiunge le ore effettive alla mezzanotte in UTC
+    return (tabella.mezzanotte_utc + timedelta(hours=ordinal_hour - 1)).astimezone(
+        ref_tz
+    )
 
 
 def get_15min_datetime(dataora: datetime) -> datetime:
@@ -381,17 +469,14 @@ def get_periodo_15min(dt: datetime, ref_tz: ZoneInfo = ZoneInfo("Europe/Rome"))
             "L'argomento dt deve essere timezone-aware (es. ZoneInfo('Europe/Rome'))."
         )
 
-    # Calcola la mezzanotte locale
-    local_midnight: datetime = datetime(dt.year, dt.month, dt.day, 0, 0, tzinfo=ref_tz)
-
-    # Converte la mezzanotte in UTC
-    start_utc: datetime = local_midnight.astimezone(timezone.utc)
-
-    # Converte l'ora passata in UTC
-    dt_utc: datetime = dt.astimezone(timezone.utc)
+    # Recupera la mezzanotte in UTC dalla tabella del giorno
+    # (la differenza tra datetime con fusi orari diversi è calcolata in UTC)
+    start_utc: datetime = get_day_table(
+        date(dt.year, dt.month, dt.day), ref_tz
+    ).mezzanotte_utc
 
     # Calcola il numero di quarti d'ora passati dalla mezzanotte in UTC e somma 1
-    return int((dt_utc - start_utc).total_seconds() // 900) + 1
+    return int((dt - start_utc).total_seconds() // 900) + 1
 
 
 def get_datetime_from_periodo_15min(
@@ -414,228 +499,611 @@ def get_datetime_from_periodo_15min(
     if not (1 <= periodo_15min <= 100):
         raise ValueError("periodo_15min deve essere compreso tra 1 e 100")
 
-    # Calcola la mezzanotte locale
-    local_midnight: datetime = datetime(dt.year, dt.month, dt.day, 0, 0, tzinfo=ref_tz)
+    # Recupera la tabella del giorno
+    tabella: TabellaGiorno = get_day_table(date(dt.year, dt.month, dt.day), ref_tz)
 
-    # Converte la mezzanotte in UTC
-    start_utc: datetime = local_midnight.astimezone(timezone.utc)
+    # Ritorna l'orario locale precalcolato
+    if periodo_15min <= len(tabella.periodi_15min):
+        return tabella.periodi_15min[periodo_15min - 1]
 
-    # Aggiunge i periodi di 15 minuti effettivi trascorsi dalla mezzanotte
-    end_utc: datetime = start_utc + timedelta(minutes=15 * (periodo_15min - 1))
+    # Periodo oltre la fine del giorno: aggiunge i minuti effettivi in UTC
+    return (
+        tabella.mezzanotte_utc + timedelta(minutes=15 * (periodo_15min - 1))
+    ).astimezone(ref_tz)
 
-    # Ritorna l'orario locale corrispondente
-    return end_utc.astimezone(ref_tz)
 
+def is_day_complete(pun_data: PunData, data: date) -> bool:
+    """Verifica se sono presenti tutti i prezzi PUN (orari o a 15 minuti) del giorno.
 
-def extract_xml(archive: ZipFile, pun_data: PunData, today: date) -> PunData:
-    """Estrae i valori del pun per ogni fascia da un archivio zip contenente un XML.
+    Args:
+    pun_data (PunData): struttura con i prezzi estratti.
+    data (date): giorno da verificare.
+
+    Returns:
+        bool: True se il giorno ha tutti i prezzi orari oppure tutti quelli a 15 minuti.
+
+    """
+    if (completezza := pun_data.completezza.get(data)) is None:
+        return False
+    return completezza.is_complete("pun_orari") or completezza.is_complete("pun_15min")
+
+
+def get_incomplete_days(
+    pun_data: PunData, date_start: date, date_end: date
+) -> list[date]:
+    """Restituisce i giorni dell'intervallo (estremi inclusi) senza tutti i prezzi PUN."""
+    giorni: list[date] = []
+    giorno: date = date_start
+    while giorno <= date_end:
+        if not is_day_complete(pun_data, giorno):
+            giorni.append(giorno)
+        giorno += timedelta(days=1)
+    return giorni
+
+
+def prune_prices(pun_data: PunData, today: date) -> None:
+    """Rimuove i prezzi orari e a 15 minuti dei giorni precedenti ad oggi.
 
     Args:
-    archive (ZipFile): archivio ZIP con i file XML all'interno.
-    pun_data (PunData): riferimento alla struttura che verrà modificata con i dati da XML.
-    today (date): data di oggi, utilizzata per memorizzare il prezzo zonale.
+    pun_data (PunData): struttura con i prezzi estratti.
+    today (date): data di oggi.
+
+    """
+    oggi: str = today.isoformat()
+    for prezzi in (
+        pun_data.pun_orari,
+        pun_data.prezzi_zonali,
+        pun_data.pun_15min,
+        pun_data.prezzi_zonali_15min,
+    ):
+        for orario in [o for o in prezzi if o[0:10] < oggi]:
+            del prezzi[orario]
+
+
+def pack_prices(
+    prezzi: dict[str, float | None],
+    prezzi_15min: bool = False,
+    inizio: date | None = None,
+    fine: date | None = None,
+) -> dict[str, Any]:
+    """Restituisce i prezzi in formato compatto (per il ripristino dei sensori).
+
+    Il formato contiene il giorno iniziale, il passo in minuti e la lista
+    dei valori di tutte le ore (o dei periodi di 15 minuti) dei giorni successivi,
+    con None per i prezzi mancanti.
+
+    Args:
+    prezzi (dict[str, float | None]): prezzi indicizzati per orario.
+    prezzi_15min (bool = False): se True i prezzi sono a 15 minuti anziché orari.
+    inizio (date | None = None): primo giorno (di default il primo con prezzi).
+    fine (date | None = None): ultimo giorno (di default l'ultimo con prezzi).
 
     Returns:
-    List[ list[MONO: float], list[F1: float], list[F2: float], list[F3: float] ]
+        dict[str, Any]: dizionario con "inizio", "passo" e "valori".
 
     """
-    # Carica le festività
-    it_holidays = holidays.IT()  # type: ignore[attr-defined]
+    if (inizio is None) or (fine is None):
+        giorni: list[date] = sorted({date.fromisoformat(o[0:10]) for o in prezzi})
+        if giorni:
+            inizio = inizio or giorni[0]
+            fine = fine or giorni[-1]
+    valori: list[float | None] = []
+    if (inizio is not None) and (fine is not None):
+        giorno: date = inizio
+        while giorno <= fine:
+            tabella: TabellaGiorno = get_day_table(giorno)
+            valori.extend(
+                prezzi.get(chiave)
+                for chiave in (
+                    tabella.chiavi_15min if prezzi_15min else tabella.chiavi_ore
+                )
+            )
+            giorno += timedelta(days=1)
 
-    # Azzera i dati precedenti
-    for fascia_da_svuotare in pun_data.pun.values():
-        fascia_da_svuotare.clear()
+    return {
+        "inizio": inizio.isoformat() if (inizio is not None) and valori else None,
+        "passo": 15 if prezzi_15min else 60,
+        "valori": valori,
+    }
 
-    # Esamina ogni file XML nello ZIP (ordinandoli prima)
-    for fn in sorted(archive.namelist()):
-        # Scompatta il file XML in memoria
-        xml_tree = et.parse(archive.open(fn))
 
-        # Parsing dell'XML (1 file = 1 giorno)
-        xml_root = xml_tree.getroot()
+def unpack_prices(compatto: dict[str, Any]) -> dict[str, float | None]:
+    """Ricostruisce i prezzi indicizzati per orario dal formato compatto.
 
-        # Prova a cercare i prezzi orari come primo elemento
-        prezzi_15min: bool = False
-        primo_elemento = xml_root.find("Prezzi")
+    Args:
+    compatto (dict[str, Any]): prezzi nel formato restituito da pack_prices.
+
+    Returns:
+        dict[str, float | None]: prezzi disponibili indicizzati per orario.
+
+    """
+    prezzi: dict[str, float | None] = {}
+    if compatto.get("inizio") is None:
+        return prezzi
+
+    giorno: date = date.fromisoformat(compatto["inizio"])
+    valori: list[float | None] = compatto["valori"]
+    indice: int = 0
+    while indice < len(valori):
+        tabella: TabellaGiorno = get_day_table(giorno)
+        orari = tabella.periodi_15min if compatto["passo"] == 15 else tabella.ore
+        for orario, valore in zip(orari, valori[indice : indice + len(orari)]):
+            if valore is not None:
+                prezzi[str(orario)] = valore
+        indice += len(orari)
+        giorno += timedelta(days=1)
+    return prezzi
+
+
+def get_restored_prices(
+    dati: dict[str, Any], chiave: str
+) -> dict[str, float | None] | None:
+    """Restituisce i prezzi salvati da un sensore, in qualsiasi versione del formato.
+
+    Args:
+    dati (dict[str, Any]): dati salvati per il ripristino del sensore.
+    chiave (str): nome dei prezzi da ripristinare.
+
+    Returns:
+        dict[str, float | None] | None: prezzi indicizzati per orario (None se assenti).
+
+    """
+    if (prezzi := dati.get(chiave)) is None:
+        return None
+
+    # Versione 1: dizionario con gli orari completi come chiave
+    if dati.get("versione", 1) < 2:
+        return prezzi
+
+    return unpack_prices(prezzi)
+
+
+def get_deep_size(obj: object) -> int:
+    """Restituisce la dimensione in byte di un oggetto e di quelli che contiene.
+
+    Considera dizionari, liste, tuple e insiemi (oltre agli attributi degli
+    oggetti); gli oggetti condivisi vengono conteggiati una sola volta.
+    """
+    visti: set[int] = set()
+    da_visitare: list[object] = [obj]
+    totale: int = 0
+    while da_visitare:
+        corrente = da_visitare.pop()
+        if id(corrente) in visti:
+            continue
+        visti.add(id(corrente))
+        totale += sys.getsizeof(corrente)
+        if isinstance(corrente, dict):
+            da_visitare.extend(corrente.keys())
+            da_visitare.extend(corrente.values())
+        elif isinstance(corrente, (list, tuple, set, frozenset)):
+            da_visitare.extend(corrente)
+        elif hasattr(corrente, "__dict__") and not isinstance(corrente, type):
+            da_visitare.append(vars(corrente))
+    return totale
+
+
+def save_prezzi(
+    pun_data: PunData,
+    orario: str,
+    prezzo: float | None,
+    prezzo_zonale: float | None,
+    *,
+    passato: bool,
+    prezzi_15min: bool,
+    keep_history: bool,
+) -> None:
+    """Salva il PUN e il prezzo zonale di un'ora (o di un periodo di 15 minuti).
+
+    I prezzi di oggi e domani vanno nei dizionari usati dai sensori, quelli
+    dei giorni passati (se richiesto) nello storico usato per il calcolo dei costi.
+    """
+    if passato:
+        if keep_history:
+            storico = pun_data.storico_15min if prezzi_15min else pun_data.storico_orari
+            storico[orario] = (prezzo, prezzo_zonale)
+        return
+
+    # Salva il PUN (se valido) e il prezzo zonale (se la zona è impostata)
+    if prezzo is not None:
+        (pun_data.pun_15min if prezzi_15min else pun_data.pun_orari)[orario] = prezzo
+    if pun_data.zona is not None:
+        zonali = (
+            pun_data.prezzi_zonali_15min if prezzi_15min else pun_data.prezzi_zonali
+        )
+        zonali[orario] = prezzo_zonale
+
+
+def get_prezzo_xml(campi: dict[str, str], tag: str | None) -> float | None:
+    """Restituisce il prezzo in €/kWh dell'elemento XML indicato (None se assente).
+
+    Args:
+    campi (dict[str, str]): testo degli elementi con i prezzi di un'ora o di un periodo.
+    tag (str | None): nome dell'elemento con il prezzo (PUN o nome della zona).
+
+    Returns:
+        float | None: prezzo convertito da €/MWh (con virgola decimale) a €/kWh.
+
+    """
+    if (tag is None) or ((testo := campi.get(tag)) is None):
+        return None
+    return convert_prezzo_xml(testo)
+
+
+def convert_prezzo_xml(testo: str) -> float:
+    """Restituisce il prezzo in €/kWh dal testo in €/MWh (con virgola decimale)."""
+    return float(testo.replace(".", "").replace(",", ".")) / 1000
+
+
+class GiornoXML(NamedTuple):
+    """Prezzi di un giorno letti da un singolo file XML dell'archivio."""
+
+    # Data dei prezzi
+    data: date
+
+    # True se i prezzi sono a 15 minuti anziché orari
+    prezzi_15min: bool
+
+    # Ora (o periodo) progressivo, orario di inizio, PUN e prezzo zonale
+    prezzi: list[tuple[int, datetime, float | None, float | None]]
+
+    # Numero di record presenti nel file
+    record: int
+
+    # Prezzi di tutte le zone allineati a prezzi (NaN se mancanti), se richiesti
+    zonali: dict[str, array]
+
+    # Avvisi dell'esame del file (per le tracce dei download)
+    avvisi: list[str]
+
+
+def parse_xml_member(
+    archive: ZipFile,
+    fn: str,
+    tag_zona: str | None,
+    tutte_le_zone: bool = False,
+    backend: XMLBackend = XML_BACKEND,
+) -> GiornoXML | None:
+    """Scompatta ed esamina un singolo file XML dell'archivio (1 file = 1 giorno).
+
+    Per esaminare i file in altri thread, leggerne prima il contenuto
+    (lo stesso ZipFile non va usato da più thread) e usare parse_xml_content().
+    """
+    return parse_xml_content(
+        fn, archive.read(fn), tag_zona, tutte_le_zone=tutte_le_zone, backend=backend
+    )
+
+
+def parse_xml_content(
+    fn: str,
+    contenuto: bytes,
+    tag_zona: str | None,
+    tutte_le_zone: bool = False,
+    backend: XMLBackend = XML_BACKEND,
+) -> GiornoXML | None:
+    """Esamina il contenuto di un singolo file XML (1 file = 1 giorno).
+
+    Non modifica alcuna struttura condivisa, quindi può essere eseguita
+    contemporaneamente su più file da thread diversi.
+
+    Args:
+    fn (str): nome del file XML (per i messaggi di log).
+    contenuto (bytes): contenuto del file XML, già scompattato.
+    tag_zona (str | None): elemento XML con il prezzo della zona (se impostata).
+    tutte_le_zone (bool = False): se True conserva anche i prezzi delle altre zone
+        (per cambiare zona senza scaricare di nuovo i dati, vedere select_zona()).
+    backend (XMLBackend = XML_BACKEND): libreria usata per esaminare l'XML.
+
+    Returns:
+        GiornoXML | None: prezzi del giorno, oppure None se il file non contiene prezzi supportati.
+
+    """
+    # Esamina il file XML in memoria
+    xml_root = backend.parse(io.BytesIO(contenuto))
+
+    # Prova a cercare i prezzi orari come primo elemento
+    prezzi_15min: bool = False
+    primo_elemento = xml_root.find("Prezzi")
+    if primo_elemento is None:
+        # Prova a vedere se sono prezzi ogni 15 minuti
+        prezzi_15min = True
+        primo_elemento = xml_root.find("Prezzi15")
         if primo_elemento is None:
-            # Prova a vedere se sono prezzi ogni 15 minuti
-            prezzi_15min = True
-            primo_elemento = xml_root.find("Prezzi15")
-            if primo_elemento is None:
-                _LOGGER.debug("Nessun prezzo supportato trovato nel file XML: %s", fn)
-                continue
-
-        # Estrae la data dal primo elemento (sarà identica per gli altri)
-        dat_string: str = primo_elemento.find("Data").text  # YYYYMMDD
-
-        # Converte la stringa giorno in data
-        dat_date: date = date(
-            int(dat_string[0:4]),
-            int(dat_string[4:6]),
-            int(dat_string[6:8]),
+            _LOGGER.debug("Nessun prezzo supportato trovato nel file XML: %s", fn)
+            return None
+
+    # Estrae la data dal primo elemento (sarà identica per gli altri)
+    dat_string: str = primo_elemento.find("Data").text  # YYYYMMDD
+
+    # Converte la stringa giorno in data
+    dat_date: date = date(
+        int(dat_string[0:4]),
+        int(dat_string[4:6]),
+        int(dat_string[6:8]),
+    )
+
+    # Ottiene il numero massimo di periodi per la data specificata
+    # 1 .. 96 normalmente, ma anche 1..92 o 1..100 nei cambi ora (a 15 minuti)
+    # 1..24 normalmente, ma anche 1..23 o 1..25 nei cambi ora (orari)
+    max_periodi: int = get_total_hours(dat_date) * (4 if prezzi_15min else 1)
+    tipo: str = "a 15 minuti" if prezzi_15min else "orari"
+
+    # Estrae le rimanenti informazioni
+    elementi = xml_root.findall("Prezzi15" if prezzi_15min else "Prezzi")
+    giorno: GiornoXML = GiornoXML(dat_date, prezzi_15min, [], len(elementi), {}, [])
+    for prezzi in elementi:
+        # Legge una sola volta il testo di ogni elemento (il primo, come find())
+        campi: dict[str, str] = {
+            elemento.tag: elemento.text for elemento in reversed(prezzi)
+        }
+
+        # Verifica che il mercato e la granularità siano corretti
+        if (campi["Mercato"] != "MGP") or (
+            prezzi_15min and campi["Granularity"] != "PT15"
+        ):
+            _LOGGER.warning(
+                "Mercato o granularità non supportati per i prezzi %s nel file XML: %s.\n%s",
+                tipo,
+                fn,
+                backend.tostring(prezzi),
+            )
+            giorno.avvisi.append(f"Mercato o granularità non supportati: {fn}")
+            break
+
+        # Estrae il periodo (o l'ora) dall'XML e lo valida
+        periodo_xml: int = int(campi["Periodo" if prezzi_15min else "Ora"])
+        if not (1 <= periodo_xml <= max_periodi):
+            _LOGGER.warning(
+                "Periodo %s non valido per %s (max: %s).",
+                periodo_xml,
+                dat_string,
+                max_periodi,
+            )
+            giorno.avvisi.append(
+                f"Periodo {periodo_xml} non valido per {dat_string} (max: {max_periodi})"
+            )
+
+        # Estrae il prezzo PUN e il prezzo zonale (se la zona è impostata)
+        prezzo: float | None = get_prezzo_xml(campi, "PUN")
+        if prezzo is None:
+            # PUN non valido
+            _LOGGER.warning(
+                "PUN non specificato per %s al periodo: %s.", dat_string, periodo_xml
+            )
+            giorno.avvisi.append(
+                f"PUN non specificato per {dat_string} al periodo {periodo_xml}"
+            )
+
+        # Prezzi di tutte le zone (un array compatto per zona)
+        if tutte_le_zone:
+            for tag, testo in campi.items():
+                if tag in TAG_ZONE:
+                    if (valori := giorno.zonali.get(tag)) is None:
+                        valori = giorno.zonali[tag] = array("d", [nan] * len(elementi))
+                    valori[len(giorno.prezzi)] = convert_prezzo_xml(testo)
+
+        # Converte il periodo in un datetime
+        giorno.prezzi.append(
+            (
+                periodo_xml,
+                get_datetime_from_periodo_15min(dat_date, periodo_xml)
+                if prezzi_15min
+                else get_datetime_from_ordinal_hour(dat_date, periodo_xml),
+                prezzo,
+                get_prezzo_xml(campi, tag_zona),
+            )
         )
 
-        # Verifica la festività
-        festivo: bool = dat_date in it_holidays
-
-        # Verifica se si tratta di prezzi ogni 15 minuti
-        if prezzi_15min:
-            # Ottiene il numero massimo di periodi di 15 minuti per la data specificata
-            max_periodi: int = 4 * get_total_hours(dat_date)
-
-            # Considera solo oggi e domani per i prezzi ogni 15 minuti
-            if dat_date >= today:
-                # Estrae le rimanenti informazioni
-                for prezzi in xml_root.iter("Prezzi15"):
-                    # Verifica che il mercato sia corretto
-                    if prezzi.find("Mercato").text != "MGP":
-                        _LOGGER.warning(
-                            "Mercato non supportato per i prezzi a 15 minuti nel file XML: %s.\n%s",
-                            fn,
-                            et.tostring(prezzi, encoding="unicode", method="xml"),
-                        )
-                        break
-
-                    # Verifica che la granularità sia corretta
-                    if prezzi.find("Granularity").text != "PT15":
-                        _LOGGER.warning(
-                            "Granularità non supportata per i prezzi a 15 minuti nel file XML: %s.\n%s",
-                            fn,
-                            et.tostring(prezzi, encoding="unicode", method="xml"),
-                        )
-                        break
-
-                    # Estrae il periodo dall'XML
-                    periodo_xml: int = int(prezzi.find("Periodo").text)
-
-                    # Valida il periodo XML
-                    # 1 .. 96 normalmente, ma anche 1..92 o 1..100 nei cambi ora
-                    if not (1 <= periodo_xml <= max_periodi):
-                        _LOGGER.warning(
-                            "Periodo %s non valido per %s (max: %s).",
-                            periodo_xml,
-                            dat_string,
-                            max_periodi,
-                        )
-
-                    # Converte il periodo in un datetime
-                    orario_prezzo_15min: datetime = get_datetime_from_periodo_15min(
-                        dat_date, periodo_xml
-                    )
-
-                    # Estrae il prezzo PUN dall'XML in un float
-                    if (prezzo_xml := prezzi.find("PUN")) is not None:
-                        prezzo_string_15min: str = prezzo_xml.text.replace(
-                            ".", ""
-                        ).replace(",", ".")
-                        prezzo_15min: float = float(prezzo_string_15min) / 1000
-
-                        # Salva il prezzo per quell'orario
-                        pun_data.pun_15min[str(orario_prezzo_15min)] = prezzo_15min
-                    else:
-                        # PUN non valido
-                        _LOGGER.warning(
-                            "PUN non specificato per %s al periodo: %s.",
-                            dat_string,
-                            periodo_xml,
-                        )
-
-                    # Controlla che la zona del prezzo zonale sia impostata
-                    if pun_data.zona is not None:
-                        # Estrae il prezzo zonale dall'XML in un float
-                        # basandosi sul nome dell'enum
-                        if (
-                            prezzo_zonale_xml := prezzi.find(pun_data.zona.name)
-                        ) is not None:
-                            prezzo_zonale_string_15min: str = (
-                                prezzo_zonale_xml.text.replace(".", "").replace(
-                                    ",", "."
-                                )
-                            )
-                            pun_data.prezzi_zonali_15min[str(orario_prezzo_15min)] = (
-                                float(prezzo_zonale_string_15min) / 1000
-                            )
-                        else:
-                            pun_data.prezzi_zonali_15min[str(orario_prezzo_15min)] = (
-                                None
-                            )
-        else:
-            # Ottiene il numero massimo di ore per la data specificata
-            max_ore: int = get_total_hours(dat_date)
-
-            # Estrae le rimanenti informazioni
-            for prezzi in xml_root.iter("Prezzi"):
-                # Verifica che il mercato sia corretto
-                if prezzi.find("Mercato").text != "MGP":
-                    _LOGGER.warning(
-                        "Mercato non supportato per i prezzi orari nel file XML: %s.\n%s",
-                        fn,
-                        et.tostring(prezzi, encoding="unicode", method="xml"),
-                    )
-                    break
-
-                # Estrae l'ora dall'XML
-                ora_xml: int = int(prezzi.find("Ora").text)
-
-                # Valida l'orario XML
-                # 1..24 normalmente, ma anche 1..23 o 1..25 nei cambi ora
-                if not (1 <= ora_xml <= max_ore):
-                    _LOGGER.warning(
-                        "Orario %s non valido per %s (max: %s).",
-                        ora_xml,
-                        dat_string,
-                        max_ore,
-                    )
-
-                # Converte l'ora in un datetime
-                orario_prezzo: datetime = get_datetime_from_ordinal_hour(
-                    dat_date, ora_xml
-                )
+    return giorno
+
 
-                # Estrae il prezzo PUN dall'XML in un float
-                if (prezzo_xml := prezzi.find("PUN")) is not None:
-                    prezzo_string: str = prezzo_xml.text.replace(".", "").replace(
-                        ",", "."
-                    )
-                    prezzo: float = float(prezzo_string) / 1000
-
-                    # Per le medie mensili, considera solo i dati fino ad oggi
-                    if dat_date <= today:
-                        # Estrae la fascia oraria
-                        fascia: Fascia = get_fascia_for_xml(
-                            dat_date, festivo, orario_prezzo.hour
-                        )
-
-                        # Calcola le statistiche
-                        pun_data.pun[Fascia.MONO].append(prezzo)
-                        pun_data.pun[fascia].append(prezzo)
-
-                    # Per il PUN orario, considera solo oggi e domani
-                    if dat_date >= today:
-                        # Salva il prezzo per quell'orario
-                        pun_data.pun_orari[str(orario_prezzo)] = prezzo
-                else:
-                    # PUN non valido
-                    _LOGGER.warning(
-                        "PUN non specificato per %s ad orario: %s.", dat_string, ora_xml
-                    )
-
-                # Per i prezzi zonali, considera solo oggi e domani
-                if dat_date >= today:
-                    # Controlla che la zona del prezzo zonale sia impostata
-                    if pun_data.zona is not None:
-                        # Estrae il prezzo zonale dall'XML in un float
-                        # basandosi sul nome dell'enum
-                        if (
-                            prezzo_zonale_xml := prezzi.find(pun_data.zona.name)
-                        ) is not None:
-                            prezzo_zonale_string: str = prezzo_zonale_xml.text.replace(
-                                ".", ""
-                            ).replace(",", ".")
-                            pun_data.prezzi_zonali[str(orario_prezzo)] = (
-                                float(prezzo_zonale_string) / 1000
-                            )
-                        else:
-                            pun_data.prezzi_zonali[str(orario_prezzo)] = None
+def select_zona(giorno: GiornoXML, tag_zona: str | None) -> GiornoXML:
+    """Restituisce il giorno con i prezzi zonali della zona indicata.
+
+    Richiede che il giorno sia stato esaminato con tutte_le_zone=True;
+    se la zona non è presente nel file i prezzi zonali sono None.
+    """
+    valori: array | None = giorno.zonali.get(tag_zona) if tag_zona else None
+    return giorno._replace(
+        prezzi=[
+            (
+                periodo,
+                orario,
+                prezzo,
+                None if (valori is None) or isnan(valori[i]) else valori[i],
+            )
+            for i, (periodo, orario, prezzo, _) in enumerate(giorno.prezzi)
+        ]
+    )
+
+
+def get_prezzi_orari_giorno(giorno: GiornoXML) -> dict[int, tuple[datetime, float]]:
+    """Restituisce l'orario di inizio e il PUN di ogni ora (progressiva) del giorno.
+
+    Per i prezzi a 15 minuti il PUN dell'ora è la media dei quattro quarti d'ora,
+    solo se sono tutti disponibili.
+    """
+    if not giorno.prezzi_15min:
+        return {
+            ora: (orario, prezzo)
+            for ora, orario, prezzo, _ in giorno.prezzi
+            if prezzo is not None
+        }
+
+    # Raggruppa in blocco i quarti d'ora per ora progressiva
+    quarti: dict[int, list[tuple[datetime, float]]] = {}
+    for periodo, orario, prezzo, _ in giorno.prezzi:
+        if prezzo is not None:
+            quarti.setdefault(1 + (periodo - 1) // 4, []).append((orario, prezzo))
+    return {
+        ora: (min(valori)[0], sum(v[1] for v in valori) / 4)
+        for ora, valori in quarti.items()
+        if len(valori) == 4
+    }
+
+
+def add_prezzi_fasce(
+    pun_data: PunData,
+    giorno: GiornoXML,
+    festivo: bool,
+    bitmap_orari: int,
+    bitmap_15min: int,
+    mese_precedente: bool = False,
+) -> None:
+    """Aggiunge i PUN orari del giorno alle medie mensili di ciascuna fascia.
+
+    Le ore già presenti (il prezzo orario o tutti e quattro i quarti d'ora,
+    secondo le bitmap di completezza precedenti) non vengono conteggiate di nuovo,
+    così ogni ora pesa allo stesso modo con qualunque granularità.
+    Con mese_precedente=True i prezzi vengono conteggiati anche in
+    pun_data.prezzi_mese_precedente, altrimenti in pun_data.prezzi_mese
+    (per la previsione di fine mese).
+    """
+    conteggio: dict[Fascia, int] = pun_data.prezzi_mese_precedente
+    totali: dict[Fascia, tuple[int, float]] = pun_data.prezzi_mese
+    for ora, (orario, prezzo) in get_prezzi_orari_giorno(giorno).items():
+        if ((bitmap_orari >> (ora - 1)) & 1) or (
+            (bitmap_15min >> (4 * (ora - 1))) & 0b1111 == 0b1111
+        ):
+            continue
+
+        # Estrae la fascia oraria e calcola le statistiche
+        fascia: Fascia = get_fascia_for_xml(giorno.data, festivo, orario.hour)
+        for f in (Fascia.MONO, fascia):
+            pun_data.pun[f].append(prezzo)
+            if mese_precedente:
+                conteggio[f] = conteggio.get(f, 0) + 1
+            else:
+                ore, somma = totali.get(f, (0, 0.0))
+                totali[f] = (ore + 1, somma + prezzo)
+
+
+def merge_xml_days(
+    pun_data: PunData,
+    giorni: Iterable[GiornoXML | None],
+    today: date,
+    clear_pun: bool = True,
+    metrics: FetchMetrics | None = None,
+    keep_history: bool = True,
+) -> PunData:
+    """Unisce i prezzi dei giorni esaminati nella struttura dei dati.
+
+    I giorni vengono uniti in ordine di data, quindi il risultato non dipende
+    dall'ordine in cui sono stati esaminati i file. I periodi già presenti
+    (secondo la completezza del giorno) non vengono conteggiati di nuovo
+    nelle medie, così è possibile unire più volte lo stesso giorno.
+    """
+    # Carica le festività
+    it_holidays = holidays.IT()  # type: ignore[attr-defined]
+
+    # Azzera i dati precedenti
+    if clear_pun:
+        for fascia_da_svuotare in pun_data.pun.values():
+            fascia_da_svuotare.clear()
+        pun_data.storico_orari.clear()
+        pun_data.storico_15min.clear()
+        pun_data.completezza.clear()
+        pun_data.prezzi_mese_precedente.clear()
+        pun_data.prezzi_mese.clear()
+
+    # Le liste di pun conterranno tutti i prezzi disponibili fino ad oggi
+    pun_data.giorno_fasce = today
+
+    for giorno in sorted(
+        (g for g in giorni if g is not None), key=lambda g: (g.data, g.prezzi_15min)
+    ):
+        # Conteggia i record del file
+        if metrics is not None:
+            metrics.record_elaborati += giorno.record
+
+        # Periodi già disponibili per il giorno
+        completezza: Completezza = pun_data.completezza.setdefault(
+            giorno.data, Completezza(get_total_hours(giorno.data))
+        )
+        nome_pun, nome_zonali = (
+            ("pun_15min", "prezzi_zonali_15min")
+            if giorno.prezzi_15min
+            else ("pun_orari", "prezzi_zonali")
+        )
+        bitmap_pun: int = getattr(completezza, nome_pun)
+        bitmap_zonali: int = getattr(completezza, nome_zonali)
+        max_periodi: int = completezza.get_periodi(nome_pun)
+
+        # Per le medie mensili, considera solo i prezzi fino ad oggi
+        # (le ore già conteggiate, anche con l'altra granularità, vengono ignorate;
+        # i giorni sono in ordine di data, quindi quelli del mese precedente
+        # restano all'inizio delle liste)
+        if giorno.data <= today:
+            add_prezzi_fasce(
+                pun_data,
+                giorno,
+                giorno.data in it_holidays,
+                completezza.pun_orari,
+                completezza.pun_15min,
+                mese_precedente=giorno.data < today.replace(day=1),
+            )
+
+        for periodo, orario, prezzo, prezzo_zonale in giorno.prezzi:
+            # Bit del periodo (nessuno se il periodo non è valido)
+            bit: int = (1 << (periodo - 1)) if 1 <= periodo <= max_periodi else 0
+
+            # Salva i prezzi per quell'orario
+            save_prezzi(
+                pun_data,
+                str(orario),
+                prezzo,
+                prezzo_zonale,
+                passato=giorno.data < today,
+                prezzi_15min=giorno.prezzi_15min,
+                keep_history=keep_history,
+            )
+
+            # Aggiorna i periodi disponibili
+            if prezzo is not None:
+                bitmap_pun |= bit
+            if prezzo_zonale is not None:
+                bitmap_zonali |= bit
+
+        setattr(completezza, nome_pun, bitmap_pun)
+        setattr(completezza, nome_zonali, bitmap_zonali)
 
     return pun_data
+
+
+def extract_xml(
+    archive: ZipFile,
+    pun_data: PunData,
+    today: date,
+    clear_pun: bool = True,
+    metrics: FetchMetrics | None = None,
+    keep_history: bool = True,
+) -> PunData:
+    """Estrae i valori del pun per ogni fascia da un archivio zip contenente un XML.
+
+    Esamina i file uno alla volta; per l'elaborazione nel thread executor usare
+    parse_xml_content() sul contenuto di ciascun file e poi merge_xml_days().
+
+    Args:
+    archive (ZipFile): archivio ZIP con i file XML all'interno.
+    pun_data (PunData): riferimento alla struttura che verrà modificata con i dati da XML.
+    today (date): data di oggi, utilizzata per memorizzare il prezzo zonale.
+    clear_pun (bool = True): se False non azzera i dati delle fasce (unione di giorni aggiuntivi).
+    metrics (FetchMetrics | None = None): se specificato, conteggia i record elaborati.
+    keep_history (bool = True): se False non conserva i prezzi dei giorni passati (solo le medie).
+
+    Returns:
+    List[ list[MONO: float], list[F1: float], list[F2: float], list[F3: float] ]
+
+    """
+    # Elemento XML con il prezzo della zona (se impostata)
+    tag_zona: str | None = pun_data.zona.name if pun_data.zona is not None else None
+
+    # Esamina ogni file XML nello ZIP (ordinandoli prima)
+    return merge_xml_days(
+        pun_data,
+        [parse_xml_member(archive, fn, tag_zona) for fn in sorted(archive.namelist())],
+        today,
+        clear_pun=clear_pun,
+        metrics=metrics,
+        keep_history=keep_history,
+    )
@@ -0,0 +1,146 @@
+"""Comandi websocket per leggere i prezzi dal frontend (ad esempio dalle card dei grafici)."""
+
+from datetime import date
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+from .const import DOMAIN, SIGNAL_PREZZI_AGGIORNATI
+from .coordinator import PUNDataUpdateCoordinator
+from .interfaces import Zona
+from .utils import pack_prices
+
+# Chiave per la registrazione dei comandi (una sola volta)
+WEBSOCKET_REGISTERED: str = f"{DOMAIN}_websocket"
+
+# Parametri comuni alla lettura e alla sottoscrizione dei prezzi
+PRICES_SCHEMA: dict[Any, Any] = {
+    vol.Optional("inizio"): cv.date,
+    vol.Optional("fine"): cv.date,
+    vol.Optional("zona"): vol.In(list(Zona.__members__)),
+    vol.Optional("passo", default=60): vol.In([15, 60]),
+}
+
+
+def get_coordinator(hass: HomeAssistant) -> PUNDataUpdateCoordinator | None:
+    """Restituisce il coordinator (l'integrazione ha una sola configurazione)."""
+    # I comandi non indicano la configurazione: si usa l'unica esistente,
+    # garantita da "single_config_entry" nel manifest (e dall'ID univoco nel
+    # config flow). Se ne fossero ammesse più di una, i messaggi dovrebbero
+    # indicare quale usare.
+    return next(iter(hass.data.get(DOMAIN, {}).values()), None)
+
+
+def build_prices_message(
+    coordinator: PUNDataUpdateCoordinator, msg: dict[str, Any]
+) -> dict[str, Any] | None:
+    """Crea la risposta con i prezzi richiesti in formato compatto.
+
+    I valori di PUN e prezzo zonale sono liste allineate, a partire
+    dalla mezzanotte del giorno "inizio" con passo di 15 o 60 minuti;
+    l'intervallo richiesto viene limitato ai giorni con prezzi disponibili.
+    Restituisce None se i prezzi della zona richiesta non sono disponibili.
+    """
+    zona: Zona | None = (
+        Zona[msg["zona"]] if "zona" in msg else coordinator.pun_data.zona
+    )
+    prezzi_15min: bool = msg["passo"] == 15
+    if (prezzi := coordinator.get_zone_prices(zona, prezzi_15min)) is None:
+        return None
+    pun, zonali = prezzi
+
+    # Limita l'intervallo ai giorni disponibili
+    giorni: list[date] = sorted({date.fromisoformat(o[0:10]) for o in pun})
+    inizio: date | None = None
+    fine: date | None = None
+    if giorni:
+        inizio = max(msg.get("inizio", giorni[0]), giorni[0])
+        fine = min(msg.get("fine", giorni[-1]), giorni[-1])
+
+    # Stesso intervallo per PUN e prezzi zonali (liste allineate)
+    compatto_pun: dict[str, Any] = pack_prices(pun, prezzi_15min, inizio, fine)
+    return {
+        "versione": coordinator.versione_prezzi,
+        "zona": zona.name if zona is not None else None,
+        "inizio": compatto_pun["inizio"],
+        "passo": compatto_pun["passo"],
+        "pun": compatto_pun["valori"],
+        "prezzi_zonali": pack_prices(zonali, prezzi_15min, inizio, fine)["valori"]
+        if compatto_pun["valori"]
+        else [],
+    }
+
+
+@websocket_api.websocket_command(
+    {vol.Required("type"): f"{DOMAIN}/prices", **PRICES_SCHEMA}
+)
+@callback
+def ws_get_prices(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Restituisce i prezzi per l'intervallo, la zona e la risoluzione richiesti."""
+    if (coordinator := get_coordinator(hass)) is None:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "Integrazione non configurata."
+        )
+        return
+    if (messaggio := build_prices_message(coordinator, msg)) is None:
+        connection.send_error(
+            msg["id"],
+            websocket_api.ERR_NOT_FOUND,
+            "Prezzi non disponibili per la zona richiesta.",
+        )
+        return
+    connection.send_result(msg["id"], messaggio)
+
+
+@websocket_api.websocket_command(
+    {vol.Required("type"): f"{DOMAIN}/subscribe_prices", **PRICES_SCHEMA}
+)
+@callback
+def ws_subscribe_prices(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Invia i prezzi richiesti subito e poi a ogni cambio di versione."""
+
+    # Coordinator e versione dei prezzi inviati per ultimi
+    # (il coordinator cambia se l'integrazione viene ricaricata)
+    inviati: tuple[int, int] | None = None
+
+    @callback
+    def async_send_prices() -> None:
+        """Invia i prezzi se la versione è cambiata dall'ultimo invio."""
+        nonlocal inviati
+        if (coordinator := get_coordinator(hass)) is None:
+            return
+        versione: tuple[int, int] = (id(coordinator), coordinator.versione_prezzi)
+        if versione == inviati:
+            return
+        if (messaggio := build_prices_message(coordinator, msg)) is not None:
+            inviati = versione
+            connection.send_message(websocket_api.event_message(msg["id"], messaggio))
+
+    connection.subscriptions[msg["id"]] = async_dispatcher_connect(
+        hass, SIGNAL_PREZZI_AGGIORNATI, async_send_prices
+    )
+    connection.send_result(msg["id"])
+    async_send_prices()
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    """Registra i comandi websocket dell'integrazione (una sola volta)."""
+    if hass.data.get(WEBSOCKET_REGISTERED, False):
+        return
+    websocket_api.async_register_command(hass, ws_get_prices)
+    websocket_api.async_register_command(hass, ws_subscribe_prices)
+    hass.data[WEBSOCKET_REGISTERED] = True
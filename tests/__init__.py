@@ -0,0 +1 @@
+"""Test per l'integrazione pun_sensor."""
@@ -0,0 +1,192 @@
+"""Misure delle prestazioni di pun_sensor con dati sintetici.
+
+Si esegue dalla cartella principale della repository, ad esempio:
+
+    python -m tests.benchmark parse --giorni 62 --ripetizioni 5
+    python -m tests.benchmark fasce --giorni 31
+    python -m tests.benchmark xml
+
+I tempi dipendono dalla macchina: vanno confrontati tra loro, non con valori fissi.
+"""
+
+import argparse
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+import os
+import time
+import zipfile
+
+from custom_components.pun_sensor.datasource import build_archive
+from custom_components.pun_sensor.interfaces import Fascia, PunData, Zona
+from custom_components.pun_sensor.utils import (
+    XML_BACKEND,
+    GiornoXML,
+    XMLBackend,
+    get_xml_backend,
+    merge_xml_days,
+    parse_xml_content,
+    parse_xml_member,
+)
+
+from .common import build_synthetic_xml
+
+
+def build_month_archive(giorni: int, prezzi_15min: bool = True) -> zipfile.ZipFile:
+    """Crea un archivio con i file XML sintetici dei giorni richiesti."""
+    inizio = date(2025, 10, 1)
+    return build_archive(
+        (
+            f"{inizio + timedelta(days=d):%Y%m%d}MGPPrezzi.xml",
+            build_synthetic_xml(inizio + timedelta(days=d), prezzi_15min),
+        )
+        for d in range(giorni)
+    )
+
+
+def measure_ms(funzione: Callable[[], object], ripetizioni: int) -> float:
+    """Restituisce il tempo minimo di esecuzione in millisecondi."""
+    tempi: list[float] = []
+    for _ in range(ripetizioni):
+        inizio: float = time.perf_counter()
+        funzione()
+        tempi.append((time.perf_counter() - inizio) * 1000)
+    return min(tempi)
+
+
+async def async_parse_concurrent(
+    archive: zipfile.ZipFile, workers: int, executor: ThreadPoolExecutor
+) -> list[GiornoXML | None]:
+    """Esamina i file come PUNDataUpdateCoordinator.async_parse_archive().
+
+    Il contenuto viene letto nel loop e l'XML esaminato nel thread executor,
+    al massimo `workers` file alla volta.
+    """
+    loop = asyncio.get_running_loop()
+    limite = asyncio.Semaphore(workers)
+
+    async def async_parse(fn: str) -> GiornoXML | None:
+        async with limite:
+            contenuto: bytes = archive.read(fn)
+            return await loop.run_in_executor(
+                executor, parse_xml_content, fn, contenuto, "NORD", True
+            )
+
+    return await asyncio.gather(*(async_parse(fn) for fn in archive.namelist()))
+
+
+async def async_measure_concurrent_ms(
+    archive: zipfile.ZipFile, workers: int, ripetizioni: int
+) -> float:
+    """Restituisce il tempo minimo dell'esame concorrente, escluso l'avvio dei thread."""
+    tempi: list[float] = []
+    with ThreadPoolExecutor(workers) as executor:
+        for _ in range(ripetizioni):
+            inizio: float = time.perf_counter()
+            await async_parse_concurrent(archive, workers, executor)
+            tempi.append((time.perf_counter() - inizio) * 1000)
+    return min(tempi)
+
+
+def benchmark_parse(args: argparse.Namespace) -> None:
+    """Confronta l'esame sequenziale dei file con quello in parallelo."""
+    archive = build_month_archive(args.giorni)
+    print(
+        f"Libreria XML: {XML_BACKEND.nome}, file: {len(archive.namelist())}, "
+        f"CPU: {os.cpu_count()}"
+    )
+
+    def sequenziale() -> list[GiornoXML | None]:
+        return [
+            parse_xml_content(fn, archive.read(fn), "NORD", True)
+            for fn in archive.namelist()
+        ]
+
+    base: float = measure_ms(sequenziale, args.ripetizioni)
+    print(f"{'sequenziale':>12}: {base:8.1f} ms")
+    for workers in (1, 2, 4, 8):
+        durata: float = asyncio.run(
+            async_measure_concurrent_ms(archive, workers, args.ripetizioni)
+        )
+        print(f"{workers:>4} thread: {durata:8.1f} ms  (x{base / durata:.2f})")
+
+
+def benchmark_fasce(args: argparse.Namespace) -> None:
+    """Misura il calcolo delle medie per fascia con prezzi orari, a 15 minuti e misti.
+
+    Riporta anche le ore conteggiate, che devono coincidere in tutti i casi
+    (le ore presenti in entrambi i file non vengono conteggiate due volte).
+    """
+    inizio = date(2025, 10, 1)
+    today: date = inizio + timedelta(days=args.giorni - 1)
+    giorni: dict[bool, list[GiornoXML | None]] = {}
+    for prezzi_15min in (False, True):
+        archive = build_month_archive(args.giorni, prezzi_15min)
+        giorni[prezzi_15min] = [
+            parse_xml_member(archive, fn, "NORD") for fn in archive.namelist()
+        ]
+    casi: dict[str, list[GiornoXML | None]] = {
+        "orari": giorni[False],
+        "15 minuti": giorni[True],
+        "misti": giorni[False] + giorni[True],
+    }
+    for nome, elenco in casi.items():
+        pun_data: PunData = PunData()
+        pun_data.zona = Zona.NORD
+
+        def calcola(
+            pun_data: PunData = pun_data, elenco: list[GiornoXML | None] = elenco
+        ) -> PunData:
+            return merge_xml_days(pun_data, elenco, today, keep_history=False)
+
+        durata: float = measure_ms(calcola, args.ripetizioni)
+        print(
+            f"{nome:>12}: {durata:8.1f} ms, "
+            f"ore conteggiate: {len(pun_data.pun[Fascia.MONO])}"
+        )
+
+
+def benchmark_xml(args: argparse.Namespace) -> None:
+    """Confronta l'esame dei file XML con lxml e con defusedxml."""
+    archive = build_month_archive(args.giorni)
+    contenuti: list[tuple[str, bytes]] = [
+        (fn, archive.read(fn)) for fn in archive.namelist()
+    ]
+    # Senza lxml installata le due librerie coincidono
+    backends: dict[str, XMLBackend] = {
+        backend.nome: backend
+        for backend in (get_xml_backend(), get_xml_backend(usa_lxml=False))
+    }
+    for backend in backends.values():
+
+        def esamina(backend: XMLBackend = backend) -> list[GiornoXML | None]:
+            return [
+                parse_xml_content(fn, contenuto, "NORD", True, backend=backend)
+                for fn, contenuto in contenuti
+            ]
+
+        durata: float = measure_ms(esamina, args.ripetizioni)
+        print(f"{backend.nome:>12}: {durata:8.1f} ms ({len(contenuti)} file)")
+
+
+def main() -> None:
+    """Esegue la misura richiesta dalla riga di comando."""
+    comuni = argparse.ArgumentParser(add_help=False)
+    comuni.add_argument("--giorni", type=int, default=62)
+    comuni.add_argument("--ripetizioni", type=int, default=5)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    misure = parser.add_subparsers(dest="misura", required=True)
+    misure.add_parser("parse", parents=[comuni], help="esame dei file XML in parallelo")
+    misure.add_parser("fasce", parents=[comuni], help="medie mensili per fascia")
+    misure.add_parser("xml", parents=[comuni], help="lxml rispetto a defusedxml")
+    args = parser.parse_args()
+    {
+        "parse": benchmark_parse,
+        "fasce": benchmark_fasce,
+        "xml": benchmark_xml,
+    }[args.misura](args)
+
+
+if __name__ == "__main__":
+    main()
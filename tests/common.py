@@ -0,0 +1,103 @@
+"""Dati sintetici e sorgenti in memoria per i test di pun_sensor."""
+
+from datetime import date, timedelta
+import random
+import zipfile
+
+from custom_components.pun_sensor.const import CONF_SCAN_MINUTE, CONF_ZONA, DOMAIN
+from custom_components.pun_sensor.datasource import (
+    PUNDataSource,
+    build_archive,
+    is_member_in_range,
+)
+from custom_components.pun_sensor.interfaces import Zona
+from custom_components.pun_sensor.utils import get_total_hours
+from homeassistant.config_entries import ConfigEntry
+
+
+def build_config_entry(**options: object) -> ConfigEntry:
+    """Crea la configurazione dell'integrazione (zona NORD) con le opzioni indicate."""
+    return ConfigEntry(
+        version=1,
+        minor_version=1,
+        domain=DOMAIN,
+        title="PUN",
+        data={CONF_ZONA: Zona.NORD.name, CONF_SCAN_MINUTE: 0},
+        source="user",
+        options=options,
+    )
+
+
+class FixtureDataSource(PUNDataSource):
+    """Archivi in memoria, per test e prove di carico senza accesso alla rete."""
+
+    def __init__(self, files: dict[str, bytes]) -> None:
+        """Inizializza la sorgente con i file XML indicizzati per nome."""
+        self.files: dict[str, bytes] = files
+
+    @classmethod
+    def synthetic(
+        cls, date_start: date, date_end: date, prezzi_15min: bool = False
+    ) -> "FixtureDataSource":
+        """Crea una sorgente con dati sintetici per ogni giorno dell'intervallo."""
+        files: dict[str, bytes] = {}
+        giorno: date = date_start
+        while giorno <= date_end:
+            files[f"{giorno.strftime('%Y%m%d')}MGPPrezzi.xml"] = build_synthetic_xml(
+                giorno, prezzi_15min
+            )
+            giorno += timedelta(days=1)
+        return cls(files)
+
+    async def async_get_archive(
+        self, date_start: date, date_end: date
+    ) -> zipfile.ZipFile:
+        """Restituisce l'archivio con i soli file dei giorni richiesti."""
+        members: dict[str, bytes] = {
+            fn: content
+            for fn, content in self.files.items()
+            if is_member_in_range(fn, date_start, date_end)
+        }
+        self.last_bytes = sum(len(content) for content in members.values())
+        return build_archive(members.items())
+
+
+def build_synthetic_xml(giorno: date, prezzi_15min: bool = False) -> bytes:
+    """Genera un file XML con lo stesso schema del GME e prezzi casuali.
+
+    Args:
+    giorno (date): giorno a cui si riferiscono i prezzi.
+    prezzi_15min (bool = False): se True genera i prezzi a 15 minuti anziché orari.
+
+    Returns:
+        bytes: contenuto del file XML.
+
+    """
+    # Usa un generatore deterministico per ottenere sempre gli stessi dati
+    rnd = random.Random(giorno.toordinal())
+    data_xml: str = giorno.strftime("%Y%m%d")
+    periodi: int = get_total_hours(giorno) * (4 if prezzi_15min else 1)
+
+    righe: list[str] = ['<?xml version="1.0" standalone="yes"?>', "<NewDataSet>"]
+    for periodo in range(1, periodi + 1):
+        if prezzi_15min:
+            righe.append(
+                f"<Prezzi15><Data>{data_xml}</Data><Mercato>MGP</Mercato>"
+                f"<Periodo>{periodo}</Periodo><Granularity>PT15</Granularity>"
+            )
+        else:
+            righe.append(
+                f"<Prezzi><Data>{data_xml}</Data><Mercato>MGP</Mercato>"
+                f"<Ora>{periodo}</Ora>"
+            )
+
+        # Prezzo PUN e prezzi zonali nel formato del GME (€/MWh, virgola decimale)
+        righe.append(f"<PUN>{rnd.uniform(50, 250):.6f}</PUN>".replace(".", ","))
+        righe.extend(
+            f"<{zona.name}>{rnd.uniform(50, 250):.6f}</{zona.name}>".replace(".", ",")
+            for zona in Zona
+        )
+        righe.append("</Prezzi15>" if prezzi_15min else "</Prezzi>")
+    righe.append("</NewDataSet>")
+
+    return "\n".join(righe).encode("utf-8")
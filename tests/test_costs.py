@@ -0,0 +1,150 @@
+"""Test del calcolo del costo dell'energia del mese."""
+
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Any
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from custom_components.pun_sensor.costs import PUNCostEngine, get_prezzi_ora
+from custom_components.pun_sensor.interfaces import Fascia, PunData
+
+tz_pun: ZoneInfo = ZoneInfo("Europe/Rome")
+
+# Martedì 10 giugno 2025: le 10 sono in F1, le 20 in F2 e le 2 in F3
+GIORNO: date = date(2025, 6, 10)
+
+
+def get_ora(giorno: date, ora: int) -> datetime:
+    """Orario locale dell'ora indicata."""
+    return datetime(giorno.year, giorno.month, giorno.day, ora, tzinfo=tz_pun)
+
+
+def build_engine() -> PUNCostEngine:
+    """Calcolo del costo avviato a inizio giugno (senza Home Assistant)."""
+    engine = PUNCostEngine(None, "sensor.energia")  # type: ignore[arg-type]
+    engine.reset(date(2025, 6, 1))
+    return engine
+
+
+def set_prezzi(pun_data: PunData, ora: datetime, pun: float, zonale: float) -> None:
+    """Imposta il PUN e il prezzo zonale dell'ora."""
+    pun_data.pun_orari[str(ora)] = pun
+    pun_data.prezzi_zonali[str(ora)] = zonale
+
+
+def test_add_ora_fasce() -> None:
+    """Ogni ora va nel totale, nella sua fascia e in F23 se è in F2 o F3."""
+    pun_data = PunData()
+    engine = build_engine()
+    for ora, energia in ((10, 1.0), (20, 2.0), (2, 4.0)):
+        set_prezzi(pun_data, get_ora(GIORNO, ora), 0.1, 0.2)
+        engine.add_ora(pun_data, get_ora(GIORNO, ora), energia, festivo=False)
+
+    assert engine.energia == {
+        Fascia.MONO: 7.0,
+        Fascia.F1: 1.0,
+        Fascia.F2: 2.0,
+        Fascia.F3: 4.0,
+        Fascia.F23: 6.0,
+    }
+    assert engine.costo_pun[Fascia.MONO] == pytest.approx(0.7)
+    assert engine.costo_pun[Fascia.F23] == pytest.approx(0.6)
+    assert engine.costo_zonale[Fascia.F1] == pytest.approx(0.2)
+    assert engine.ore_senza_prezzo == {}
+
+
+def test_add_ora_festivo() -> None:
+    """Nei giorni festivi tutte le ore sono in F3."""
+    pun_data = PunData()
+    engine = build_engine()
+    set_prezzi(pun_data, get_ora(GIORNO, 10), 0.1, 0.2)
+    engine.add_ora(pun_data, get_ora(GIORNO, 10), 1.0, festivo=True)
+    assert engine.energia[Fascia.F1] == 0
+    assert engine.energia[Fascia.F3] == 1.0
+    assert engine.energia[Fascia.F23] == 1.0
+
+
+def test_add_ora_15min() -> None:
+    """Senza prezzi orari usa la media dei quattro prezzi a 15 minuti."""
+    pun_data = PunData()
+    ora = get_ora(GIORNO, 10)
+    for quarto, prezzo in enumerate((0.1, 0.2, 0.3, 0.4)):
+        orario = str(ora + timedelta(minutes=15 * quarto))
+        pun_data.pun_15min[orario] = prezzo
+        pun_data.prezzi_zonali_15min[orario] = None if quarto == 3 else prezzo
+    pun, zonale = get_prezzi_ora(pun_data, ora)
+    assert pun == pytest.approx(0.25)
+    assert zonale is None
+
+
+def test_ore_senza_prezzo() -> None:
+    """Il costo delle ore senza PUN viene aggiunto all'arrivo dei prezzi."""
+    pun_data = PunData()
+    engine = build_engine()
+    ora = get_ora(GIORNO, 20)
+    engine.add_ora(pun_data, ora, 2.0, festivo=False)
+    assert engine.energia[Fascia.F2] == 2.0
+    assert engine.costo_pun[Fascia.MONO] == 0
+    assert engine.ore_senza_prezzo == {ora.isoformat(): 2.0}
+
+    # Prezzi ancora mancanti: nessun cambiamento
+    assert not engine.add_prezzi_mancanti(pun_data)
+
+    # Arrivano i prezzi: il costo viene aggiunto una sola volta
+    set_prezzi(pun_data, ora, 0.1, 0.2)
+    assert engine.add_prezzi_mancanti(pun_data)
+    assert not engine.add_prezzi_mancanti(pun_data)
+    assert engine.ore_senza_prezzo == {}
+    assert engine.energia[Fascia.F2] == 2.0
+    assert engine.costo_pun[Fascia.F2] == pytest.approx(0.2)
+    assert engine.costo_pun[Fascia.F23] == pytest.approx(0.2)
+    assert engine.costo_zonale[Fascia.MONO] == pytest.approx(0.4)
+
+
+def test_month_rollover() -> None:
+    """Al cambio di mese i totali ripartono da zero dalla mezzanotte del primo giorno."""
+    pun_data = PunData()
+    engine = build_engine()
+    set_prezzi(pun_data, get_ora(GIORNO, 10), 0.1, 0.2)
+    engine.add_ora(pun_data, get_ora(GIORNO, 10), 1.0, festivo=False)
+    engine.add_ora(pun_data, get_ora(GIORNO, 11), 1.0, festivo=False)
+
+    # Prima ora di luglio non ancora conclusa: non legge le statistiche
+    assert not asyncio.run(
+        engine.async_update(pun_data, datetime(2025, 7, 1, 0, 30, tzinfo=tz_pun))
+    )
+    assert engine.mese == date(2025, 7, 1)
+    assert engine.ultima_ora == datetime(2025, 7, 1, tzinfo=tz_pun)
+    assert engine.energia[Fascia.MONO] == 0
+    assert engine.costo_pun[Fascia.MONO] == 0
+    assert engine.ore_senza_prezzo == {}
+
+
+def test_as_dict_from_dict() -> None:
+    """Lo stato salvato viene ripristinato identico, ore senza prezzo comprese."""
+    pun_data = PunData()
+    engine = build_engine()
+    set_prezzi(pun_data, get_ora(GIORNO, 10), 0.1, 0.2)
+    engine.add_ora(pun_data, get_ora(GIORNO, 10), 1.5, festivo=False)
+    engine.add_ora(pun_data, get_ora(GIORNO, 20), 2.5, festivo=False)
+    engine.ultima_ora = get_ora(GIORNO, 21)
+    dati: dict[str, Any] = engine.as_dict()
+
+    ripristinato = build_engine()
+    ripristinato.from_dict(dati)
+    assert ripristinato.as_dict() == dati
+    assert ripristinato.mese == date(2025, 6, 1)
+    assert ripristinato.ultima_ora == get_ora(GIORNO, 21)
+    assert ripristinato.energia == engine.energia
+    assert ripristinato.costo_zonale == engine.costo_zonale
+    assert ripristinato.ore_senza_prezzo == {get_ora(GIORNO, 20).isoformat(): 2.5}
+
+
+def test_from_dict_invalid() -> None:
+    """Uno stato non valido azzera il calcolo (che ripartirà dal mese corrente)."""
+    engine = build_engine()
+    engine.from_dict({"mese": "giugno"})
+    assert engine.mese is None
+    assert engine.ultima_ora is None
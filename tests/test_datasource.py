@@ -0,0 +1,194 @@
+"""Test del percorso di download ed elaborazione con sorgenti senza rete."""
+
+import asyncio
+from datetime import date, timedelta
+import logging
+from pathlib import Path
+import zipfile
+
+from aiohttp import ClientError
+import pytest
+
+from custom_components.pun_sensor import datasource
+from custom_components.pun_sensor.datasource import (
+    GMEDataSource,
+    LocalDataSource,
+    is_member_in_range,
+    split_date_range,
+)
+from custom_components.pun_sensor.interfaces import Fascia, FetchMetrics, PunData, Zona
+from custom_components.pun_sensor.utils import (
+    get_incomplete_days,
+    get_total_hours,
+    merge_xml_days,
+    parse_xml_member,
+)
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from .common import FixtureDataSource, build_synthetic_xml
+
+
+async def async_collect(
+    sorgente: datasource.PUNDataSource, date_start: date, date_end: date
+) -> list[zipfile.ZipFile]:
+    """Restituisce tutti gli archivi forniti dalla sorgente per l'intervallo."""
+    return [
+        archive async for archive in sorgente.async_iter_archives(date_start, date_end)
+    ]
+
+
+def parse_archives(
+    archivi: list[zipfile.ZipFile], zona: Zona, today: date
+) -> tuple[PunData, FetchMetrics]:
+    """Esamina gli archivi come fa il coordinator e unisce i giorni."""
+    pun_data: PunData = PunData()
+    pun_data.zona = zona
+    metrics: FetchMetrics = FetchMetrics()
+    giorni = [
+        parse_xml_member(archive, fn, zona.name)
+        for archive in archivi
+        for fn in archive.namelist()
+    ]
+    merge_xml_days(pun_data, giorni, today, metrics=metrics)
+    return pun_data, metrics
+
+
+def test_split_date_range() -> None:
+    """I blocchi coprono l'intervallo senza sovrapposizioni."""
+    blocchi = split_date_range(date(2025, 1, 1), date(2025, 3, 5), 31)
+    assert blocchi == [
+        (date(2025, 1, 1), date(2025, 1, 31)),
+        (date(2025, 2, 1), date(2025, 3, 3)),
+        (date(2025, 3, 4), date(2025, 3, 5)),
+    ]
+    assert split_date_range(date(2025, 1, 2), date(2025, 1, 1), 31) == []
+
+
+def test_is_member_in_range() -> None:
+    """I file vengono filtrati in base alla data all'inizio del nome."""
+    inizio, fine = date(2025, 1, 10), date(2025, 1, 20)
+    assert is_member_in_range("20250110MGPPrezzi.xml", inizio, fine)
+    assert is_member_in_range("cartella/20250120MGPPrezzi.xml", inizio, fine)
+    assert not is_member_in_range("20250121MGPPrezzi.xml", inizio, fine)
+    assert is_member_in_range("Prezzi.xml", inizio, fine)
+
+
+def test_fixture_fetch_and_parse() -> None:
+    """Il mese scaricato da una sorgente in memoria ha tutti i prezzi fino a domani."""
+    today = date(2025, 10, 26)
+    sorgente = FixtureDataSource.synthetic(date(2025, 9, 25), date(2025, 11, 5))
+    archivi = asyncio.run(async_collect(sorgente, date(2025, 10, 1), today))
+
+    assert len(archivi) == 1
+    assert len(archivi[0].namelist()) == 26
+    assert sorgente.last_bytes == sum(
+        len(archivi[0].read(fn)) for fn in archivi[0].namelist()
+    )
+    assert len(sorgente.last_latencies_ms) == 1
+
+    pun_data, metrics = parse_archives(archivi, Zona.NORD, today)
+    ore: int = sum(get_total_hours(date(2025, 10, d)) for d in range(1, 27))
+    assert metrics.record_elaborati == ore
+    assert get_incomplete_days(pun_data, date(2025, 10, 1), today) == []
+    assert len(pun_data.pun[Fascia.MONO]) == ore
+    assert sum(len(pun_data.pun[f]) for f in (Fascia.F1, Fascia.F2, Fascia.F3)) == ore
+
+    # Solo i prezzi di oggi (con il cambio dell'ora) restano nei dizionari dei sensori
+    assert len(pun_data.pun_orari) == 25
+    assert len(pun_data.prezzi_zonali) == 25
+
+
+def test_local_folder(tmp_path: Path) -> None:
+    """La cartella locale può contenere file XML e archivi ZIP."""
+    for giorno in (date(2025, 1, 1), date(2025, 1, 2)):
+        (tmp_path / f"{giorno:%Y%m%d}MGPPrezzi.xml").write_bytes(
+            build_synthetic_xml(giorno)
+        )
+    with zipfile.ZipFile(tmp_path / "gennaio.zip", "w") as archive:
+        for giorno in (date(2025, 1, 3), date(2025, 1, 4)):
+            archive.writestr(
+                f"dati/{giorno:%Y%m%d}MGPPrezzi.xml", build_synthetic_xml(giorno)
+            )
+    (tmp_path / "note.txt").write_text("ignorato")
+
+    sorgente = LocalDataSource(None, str(tmp_path))  # type: ignore[arg-type]
+    archive = sorgente._get_archive(date(2025, 1, 2), date(2025, 1, 3))  # noqa: SLF001
+    assert sorted(archive.namelist()) == [
+        "20250102MGPPrezzi.xml",
+        "20250103MGPPrezzi.xml",
+    ]
+    assert archive.read("20250103MGPPrezzi.xml") == build_synthetic_xml(
+        date(2025, 1, 3)
+    )
+
+    mancante = LocalDataSource(None, str(tmp_path / "mancante"))  # type: ignore[arg-type]
+    with pytest.raises(UpdateFailed):
+        mancante._get_archive(date(2025, 1, 1), date(2025, 1, 2))  # noqa: SLF001
+
+
+class FixtureGMEDataSource(GMEDataSource):
+    """Sorgente GME che risponde con i dati sintetici (con errori programmati)."""
+
+    def __init__(self, errori: int = 0, **kwargs) -> None:
+        """Inizializza la sorgente senza sessione HTTP."""
+        super().__init__(None, **kwargs)  # type: ignore[arg-type]
+        self.fixture: FixtureDataSource = FixtureDataSource.synthetic(
+            date(2025, 1, 1), date(2025, 12, 31)
+        )
+        self.errori: int = errori
+        self.richieste: list[tuple[date, date]] = []
+
+    async def async_download(self, date_start: date, date_end: date) -> zipfile.ZipFile:
+        """Restituisce i file dei giorni richiesti, fallendo le prime volte."""
+        self.richieste.append((date_start, date_end))
+        if self.errori > 0:
+            self.errori -= 1
+            raise ClientError("Errore simulato")
+        archive = await self.fixture.async_get_archive(date_start, date_end)
+        self.last_bytes += self.fixture.last_bytes
+        return archive
+
+
+def test_gme_chunks_and_retries(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    """L'intervallo viene scaricato a blocchi, ritentando quelli falliti."""
+    monkeypatch.setattr(datasource, "DOWNLOAD_RETRY_SECONDS", 0)
+    caplog.set_level(logging.DEBUG, logger=datasource.__name__)
+    sorgente = FixtureGMEDataSource(errori=2, chunk_days=10, retries=2)
+    archivi = asyncio.run(async_collect(sorgente, date(2025, 3, 1), date(2025, 3, 31)))
+
+    assert len(archivi) == 4
+    assert sorgente.last_retries == 2
+    assert len(sorgente.last_latencies_ms) == 4
+
+    # I tentativi ripetuti con successo non vengono segnalati come errori
+    assert [r.levelno for r in caplog.records if "fallito" in r.message] == [
+        logging.DEBUG
+    ] * 2
+    nomi: list[str] = sorted(fn for archive in archivi for fn in archive.namelist())
+    assert nomi == [
+        f"{date(2025, 3, 1) + timedelta(days=d):%Y%m%d}MGPPrezzi.xml" for d in range(31)
+    ]
+
+    pun_data, _ = parse_archives(archivi, Zona.SUD, date(2025, 3, 31))
+    assert get_incomplete_days(pun_data, date(2025, 3, 1), date(2025, 3, 31)) == []
+
+
+def test_gme_retries_exhausted(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Un blocco che fallisce più dei tentativi previsti interrompe il download."""
+    monkeypatch.setattr(datasource, "DOWNLOAD_RETRY_SECONDS", 0)
+    caplog.set_level(logging.DEBUG, logger=datasource.__name__)
+    sorgente = FixtureGMEDataSource(errori=3, retries=2)
+    with pytest.raises(ClientError):
+        asyncio.run(async_collect(sorgente, date(2025, 3, 1), date(2025, 3, 5)))
+    assert len(sorgente.richieste) == 3
+
+    # Solo l'ultimo tentativo fallito viene segnalato come errore
+    assert [r.levelno for r in caplog.records if "fallito" in r.message] == [
+        logging.DEBUG,
+        logging.DEBUG,
+        logging.ERROR,
+    ]
@@ -0,0 +1,130 @@
+"""Test dell'anello con i prezzi di oggi e domani."""
+
+from datetime import date, timedelta
+
+import pytest
+
+from custom_components.pun_sensor.dayring import AnelloGiorni
+from custom_components.pun_sensor.utils import get_day_table
+
+
+def build_prices(
+    giorni: list[date], prezzi_15min: bool = False
+) -> dict[str, float | None]:
+    """Prezzi dei giorni indicati: giorno del mese più l'indice dell'ora / 1000."""
+    prezzi: dict[str, float | None] = {}
+    for giorno in giorni:
+        tabella = get_day_table(giorno)
+        chiavi = tabella.chiavi_15min if prezzi_15min else tabella.chiavi_ore
+        for indice, chiave in enumerate(chiavi):
+            prezzi[chiave] = giorno.day + indice / 1000
+    return prezzi
+
+
+def test_advance_across_midnight() -> None:
+    """A mezzanotte domani diventa oggi senza ricaricare i prezzi."""
+    oggi = date(2025, 6, 10)
+    domani = oggi + timedelta(days=1)
+    prezzi = build_prices([oggi, domani])
+    letture: list[int] = []
+
+    def sorgente() -> dict[str, float | None]:
+        letture.append(1)
+        return prezzi
+
+    anello = AnelloGiorni(sorgente)
+    anello.load(oggi)
+    assert len(letture) == 1
+    assert anello.get_prezzo(get_day_table(oggi).ore[23]) == pytest.approx(10.023)
+
+    # Primo prezzo di domani: le posizioni si scambiano
+    assert anello.get_prezzo(get_day_table(domani).ore[0]) == pytest.approx(11.0)
+    assert len(letture) == 1
+    assert anello.oggi.giorno == domani
+    assert anello.domani.giorno == domani + timedelta(days=1)
+    assert anello.domani.valori == []
+
+    # Il nuovo domani non ha ancora prezzi
+    attributi = anello.get_attributes()
+    assert len(attributi) == 48
+    assert attributi[get_day_table(domani).chiavi_ore[5]] == pytest.approx(11.005)
+    assert attributi[get_day_table(domani + timedelta(days=1)).chiavi_ore[5]] is None
+
+
+def test_missing_tomorrow() -> None:
+    """Senza i prezzi di domani l'ora di domani non è disponibile."""
+    oggi = date(2025, 6, 10)
+    domani = oggi + timedelta(days=1)
+    anello = AnelloGiorni(lambda: build_prices([oggi]))
+    anello.load(oggi)
+
+    assert anello.get_prezzo(get_day_table(oggi).ore[12]) == pytest.approx(10.012)
+    assert anello.domani.giorno == domani
+    assert set(anello.domani.valori) == {None}
+    assert anello.get_prezzo(get_day_table(domani).ore[0]) is None
+
+
+def test_reload_from_source() -> None:
+    """Un giorno né oggi né domani viene ricaricato dalla sorgente."""
+    oggi = date(2025, 6, 10)
+    dopodomani = oggi + timedelta(days=2)
+    prezzi = build_prices([oggi])
+    anello = AnelloGiorni(lambda: prezzi)
+    anello.load(oggi)
+
+    # Il coordinator riceve i prezzi nuovi, l'anello li legge al salto di giorno
+    prezzi.update(build_prices([dopodomani]))
+    assert anello.get_prezzo(get_day_table(dopodomani).ore[3]) == pytest.approx(12.003)
+    assert anello.oggi.giorno == dopodomani
+
+
+def test_load_restored_prices() -> None:
+    """I prezzi indicati a load() sostituiscono quelli della sorgente."""
+    oggi = date(2025, 6, 10)
+    anello = AnelloGiorni(dict)
+    anello.load(oggi, build_prices([oggi]))
+    assert anello.get_prezzo(get_day_table(oggi).ore[1]) == pytest.approx(10.001)
+
+
+@pytest.mark.parametrize(
+    ("giorno", "ore_totali"),
+    [(date(2025, 3, 30), 23), (date(2025, 10, 26), 25)],
+)
+@pytest.mark.parametrize("prezzi_15min", [False, True])
+def test_dst_days(giorno: date, ore_totali: int, prezzi_15min: bool) -> None:
+    """Nei giorni di cambio ora l'anello contiene 23 o 25 ore (e i relativi periodi)."""
+    vigilia = giorno - timedelta(days=1)
+    prezzi = build_prices([vigilia, giorno], prezzi_15min)
+    anello = AnelloGiorni(lambda: prezzi, prezzi_15min)
+    anello.load(vigilia)
+
+    # Passa al giorno di cambio ora (domani)
+    tabella = get_day_table(giorno)
+    orari = tabella.periodi_15min if prezzi_15min else tabella.ore
+    valori_attesi = len(orari)
+    assert valori_attesi == ore_totali * (4 if prezzi_15min else 1)
+    assert anello.get_prezzo(orari[0]) == pytest.approx(giorno.day)
+    assert len(anello.oggi.valori) == valori_attesi
+
+    # Tutti gli orari del giorno, compresa l'ora ripetuta in autunno
+    for indice, orario in enumerate(orari):
+        assert anello.get_prezzo(orario) == pytest.approx(giorno.day + indice / 1000)
+    assert anello.oggi.giorno == giorno
+
+
+def test_shared_ring_reads_source() -> None:
+    """L'anello condiviso non copia i prezzi e legge quelli nuovi della sorgente."""
+    oggi = date(2025, 6, 10)
+    domani = oggi + timedelta(days=1)
+    prezzi = build_prices([oggi])
+    anello = AnelloGiorni(lambda: prezzi, condiviso=True)
+    anello.load(oggi)
+    assert anello.oggi.valori == []
+    assert anello.get_prezzo(get_day_table(domani).ore[2]) is None
+
+    # I prezzi di domani arrivano nel coordinator dopo il caricamento
+    prezzi.update(build_prices([domani]))
+    assert anello.get_prezzo(get_day_table(domani).ore[2]) == pytest.approx(11.002)
+    assert anello.get_attributes()[get_day_table(domani).chiavi_ore[2]] == (
+        pytest.approx(11.002)
+    )
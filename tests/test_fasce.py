@@ -0,0 +1,145 @@
+"""Test del calcolo delle medie mensili per fascia."""
+
+from datetime import date, datetime, timedelta, timezone
+from statistics import fmean
+
+import pytest
+
+from custom_components.pun_sensor.bands import get_fasce_giorno, get_festivi, tz_pun
+from custom_components.pun_sensor.interfaces import Fascia, PunData, Zona
+from custom_components.pun_sensor.utils import (
+    GiornoXML,
+    get_fascia,
+    get_fascia_for_xml,
+    get_total_hours,
+    merge_xml_days,
+    parse_xml_content,
+)
+
+from .common import build_synthetic_xml
+
+
+def parse_giorno(giorno: date, prezzi_15min: bool) -> GiornoXML:
+    """Esamina il file XML sintetico del giorno."""
+    risultato = parse_xml_content(
+        f"{giorno:%Y%m%d}MGPPrezzi{'15' if prezzi_15min else ''}.xml",
+        build_synthetic_xml(giorno, prezzi_15min),
+        Zona.NORD.name,
+    )
+    assert risultato is not None
+    return risultato
+
+
+def merge(giorni: list[GiornoXML], today: date) -> PunData:
+    """Unisce i giorni in una nuova struttura dei dati."""
+    pun_data: PunData = PunData()
+    pun_data.zona = Zona.NORD
+    return merge_xml_days(pun_data, giorni, today)
+
+
+def count_fasce(pun_data: PunData) -> int:
+    """Restituisce il numero di prezzi conteggiati in F1, F2 e F3."""
+    return sum(len(pun_data.pun[f]) for f in (Fascia.F1, Fascia.F2, Fascia.F3))
+
+
+def test_fasce_15min_only() -> None:
+    """Con i soli prezzi a 15 minuti ogni ora viene conteggiata una volta."""
+    giorni: list[date] = [date(2025, 10, 24) + timedelta(days=d) for d in range(5)]
+    ore: int = sum(get_total_hours(giorno) for giorno in giorni)
+    pun_data = merge([parse_giorno(giorno, True) for giorno in giorni], giorni[-1])
+
+    assert len(pun_data.pun[Fascia.MONO]) == ore == 24 * 5 + 1
+    assert count_fasce(pun_data) == ore
+
+    # Il prezzo di ogni ora è la media dei suoi quattro quarti d'ora
+    quarti: list[float] = [
+        prezzo
+        for giorno in giorni
+        for _, _, prezzo, _ in parse_giorno(giorno, True).prezzi
+        if prezzo is not None
+    ]
+    assert fmean(pun_data.pun[Fascia.MONO]) == pytest.approx(fmean(quarti))
+
+
+def test_fasce_mixed_day() -> None:
+    """Con prezzi orari e a 15 minuti dello stesso giorno ogni ora vale una volta."""
+    giorno = date(2025, 10, 1)
+    orari: GiornoXML = parse_giorno(giorno, False)
+    quarti: GiornoXML = parse_giorno(giorno, True)
+
+    # Prezzi orari fino alle 12 e quarti d'ora dalla metà delle 7 (ora 7) in poi
+    parziale_orari = orari._replace(prezzi=[p for p in orari.prezzi if p[0] <= 12])
+    parziale_15min = quarti._replace(prezzi=[p for p in quarti.prezzi if p[0] >= 26])
+
+    for ordine in (
+        [parziale_orari, parziale_15min],
+        [parziale_15min, parziale_orari],
+    ):
+        pun_data = merge(ordine, giorno)
+        assert len(pun_data.pun[Fascia.MONO]) == 24
+        assert count_fasce(pun_data) == 24
+
+        # Le ore già conteggiate non vengono aggiunte unendo di nuovo gli stessi file
+        merge_xml_days(pun_data, [orari, quarti], giorno, clear_pun=False)
+        assert len(pun_data.pun[Fascia.MONO]) == 24
+        assert count_fasce(pun_data) == 24
+
+    # Le ore 1-12 usano il prezzo orario, le ore 13-24 la media dei quarti d'ora
+    pun_data = merge([parziale_orari, parziale_15min], giorno)
+    attesi: list[float] = [p[2] for p in orari.prezzi[:12]] + [
+        fmean(p[2] for p in quarti.prezzi[4 * (ora - 1) : 4 * ora])
+        for ora in range(13, 25)
+    ]
+    assert sorted(pun_data.pun[Fascia.MONO]) == pytest.approx(sorted(attesi))
+
+
+def get_fascia_reference(dataora: datetime) -> Fascia:
+    """Restituisce la fascia dell'ora locale indicata, secondo le tabelle di bands.py."""
+    for ora_inizio, ora_fine, fascia in get_fasce_giorno(dataora.date()):
+        if ora_inizio <= dataora.hour < ora_fine:
+            return fascia
+    raise AssertionError(dataora)
+
+
+def test_fascia_for_xml_matches_tables() -> None:
+    """Le fasce dei prezzi coincidono con le tabelle dei giorni di bands.py."""
+    giorno = date(2025, 1, 1)
+    while giorno < date(2026, 1, 1):
+        festivo: bool = giorno in get_festivi(giorno.year)
+        for ora in range(24):
+            assert get_fascia_for_xml(giorno, festivo, ora) == get_fascia_reference(
+                datetime(giorno.year, giorno.month, giorno.day, ora, tzinfo=tz_pun)
+            )
+        giorno += timedelta(days=1)
+
+
+def test_fascia_next_change() -> None:
+    """Il prossimo cambio di fascia è la prima ora con una fascia diversa."""
+    # Ogni ora dalla settimana di Pasqua 2025 (lunedì festivo e 25 aprile di venerdì)
+    # e dalle settimane dei cambi ora, passando per UTC
+    for inizio in (
+        datetime(2025, 4, 17, tzinfo=tz_pun),
+        datetime(2025, 3, 27, tzinfo=tz_pun),
+        datetime(2025, 10, 23, tzinfo=tz_pun),
+    ):
+        istante: datetime = inizio.astimezone(timezone.utc)
+        while istante < inizio.astimezone(timezone.utc) + timedelta(days=11):
+            dataora: datetime = (istante + timedelta(minutes=30)).astimezone(tz_pun)
+            fascia, prossima = get_fascia(dataora)
+            assert fascia == get_fascia_reference(dataora)
+            assert prossima > dataora
+            assert prossima.minute == 0
+            assert get_fascia_reference(prossima) != fascia
+
+            # Tutte le ore fino al cambio sono della stessa fascia
+            ora: datetime = istante
+            while ora + timedelta(hours=1) < prossima:
+                ora += timedelta(hours=1)
+                assert get_fascia_reference(ora.astimezone(tz_pun)) == fascia
+            istante += timedelta(hours=1)
+
+    # Giovedì 24 aprile 2025 sera: il 25 è festivo, quindi F3 fino a sabato alle 7
+    assert get_fascia(datetime(2025, 4, 24, 23, 30, tzinfo=tz_pun)) == (
+        Fascia.F3,
+        datetime(2025, 4, 26, 7, tzinfo=tz_pun),
+    )
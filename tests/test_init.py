@@ -0,0 +1,115 @@
+"""Test dell'impostazione e della rimozione dell'integrazione."""
+
+import asyncio
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from custom_components.pun_sensor import async_setup_entry
+from custom_components.pun_sensor.const import DOMAIN
+from custom_components.pun_sensor.coordinator import PUNDataUpdateCoordinator
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .common import build_config_entry
+
+
+def build_hass(config_dir: Path, errore: Exception | None = None) -> HomeAssistant:
+    """Crea Home Assistant, con la creazione delle piattaforme simulata."""
+
+    async def async_forward_entry_setups(*args: Any) -> None:
+        """Crea le piattaforme (o solleva l'errore indicato)."""
+        if errore is not None:
+            raise errore
+
+    hass = HomeAssistant(str(config_dir))
+    hass.http = SimpleNamespace(register_view=lambda view: None)
+    hass.config_entries = SimpleNamespace(
+        async_forward_entry_setups=async_forward_entry_setups
+    )
+    return hass
+
+
+def test_unload_cancels_timers(tmp_path: Path) -> None:
+    """Alla rimozione dell'integrazione il registro dei timer resta vuoto."""
+
+    async def async_test() -> None:
+        hass: HomeAssistant = build_hass(tmp_path)
+        config: ConfigEntry = build_config_entry()
+        assert await async_setup_entry(hass, config)
+        coordinator: PUNDataUpdateCoordinator = hass.data[DOMAIN][config.entry_id]
+        assert {"pun", "fascia", "prezzo_zonale"} <= set(coordinator.timers)
+
+        # Esegue i callback registrati con async_on_unload
+        await config._async_process_on_unload(hass)  # noqa: SLF001
+        assert coordinator.timers == {}
+        await hass.async_stop(force=True)
+
+    asyncio.run(async_test())
+
+
+def test_failed_setup_cancels_timers(tmp_path: Path) -> None:
+    """Se la creazione delle piattaforme fallisce, i timer già partiti vengono annullati."""
+
+    async def async_test() -> None:
+        hass: HomeAssistant = build_hass(tmp_path, RuntimeError("piattaforme"))
+        config: ConfigEntry = build_config_entry()
+        with pytest.raises(RuntimeError):
+            await async_setup_entry(hass, config)
+        coordinator: PUNDataUpdateCoordinator = hass.data[DOMAIN][config.entry_id]
+        assert coordinator.timers
+
+        # Home Assistant esegue i callback di rimozione dopo l'errore
+        await config._async_process_on_unload(hass)  # noqa: SLF001
+        assert coordinator.timers == {}
+        await hass.async_stop(force=True)
+
+    asyncio.run(async_test())
+
+
+def test_reschedule_cancels_previous(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Schedulare di nuovo un timer annulla quello precedente con lo stesso nome."""
+    annullati: list[int] = []
+
+    def track_point_in_time(hass: HomeAssistant, azione: Any, quando: Any) -> Any:
+        """Registra il timer e restituisce la funzione che lo annulla."""
+        numero: int = len(timer)
+        timer.append(azione)
+        return lambda: annullati.append(numero)
+
+    timer: list[Any] = []
+    monkeypatch.setattr(
+        "custom_components.pun_sensor.coordinator.async_track_point_in_time",
+        track_point_in_time,
+    )
+
+    async def azione(now: Any) -> None:
+        """Azione del timer."""
+
+    async def async_test() -> None:
+        hass = HomeAssistant(str(tmp_path))
+        coordinator = PUNDataUpdateCoordinator(hass, build_config_entry())
+        coordinator.schedule_timer("prova", azione, timedelta(hours=1))
+        coordinator.schedule_timer("prova", azione, timedelta(hours=2))
+        assert annullati == [0]
+        assert len(coordinator.timers) == 1
+
+        # Alla scadenza il timer esce dal registro
+        await timer[1](None)
+        assert coordinator.timers == {}
+
+        # Il timer precedente, se scadesse comunque, non rimuove quello attuale
+        coordinator.schedule_timer("prova", azione, timedelta(hours=3))
+        await timer[0](None)
+        assert set(coordinator.timers) == {"prova"}
+        coordinator.cancel_timers()
+        assert annullati == [0, 2]
+        assert coordinator.timers == {}
+        await hass.async_stop(force=True)
+
+    asyncio.run(async_test())
@@ -0,0 +1,91 @@
+"""Test della memoria occupata dai dati in modalità a basso consumo."""
+
+from datetime import date, timedelta
+
+from custom_components.pun_sensor.datasource import build_archive
+from custom_components.pun_sensor.dayring import AnelloGiorni
+from custom_components.pun_sensor.interfaces import PunData, Zona
+from custom_components.pun_sensor.utils import (
+    get_day_table,
+    get_deep_size,
+    merge_xml_days,
+    parse_xml_member,
+    prune_prices,
+)
+
+from .common import build_synthetic_xml
+
+# Limite della memoria occupata dai dati di un mese (prezzi orari e a 15 minuti)
+# in modalità a basso consumo di memoria: circa 100 kB, con margine per le
+# differenze tra le versioni di Python
+MEMORY_BUDGET_MAX_BYTE: int = 160_000
+
+# Limite della memoria propria dell'anello di un sensore dei prezzi in modalità
+# a basso consumo di memoria (i prezzi restano solo nel coordinator)
+ENTITA_MAX_BYTE: int = 1_000
+
+
+def build_month(memory_budget: bool) -> PunData:
+    """Elabora un mese intero (più domani) come fa il coordinator."""
+    today = date(2025, 10, 31)
+    files: dict[str, bytes] = {}
+    giorno = date(2025, 9, 28)
+    while giorno <= today + timedelta(days=1):
+        files[f"{giorno:%Y%m%d}MGPPrezzi.xml"] = build_synthetic_xml(giorno)
+        files[f"{giorno:%Y%m%d}MGPPrezzi15.xml"] = build_synthetic_xml(giorno, True)
+        giorno += timedelta(days=1)
+
+    pun_data: PunData = PunData()
+    pun_data.zona = Zona.NORD
+    with build_archive(files.items()) as archive:
+        giorni = [
+            parse_xml_member(archive, fn, Zona.NORD.name, not memory_budget)
+            for fn in archive.namelist()
+        ]
+    merge_xml_days(pun_data, giorni, today, keep_history=not memory_budget)
+    prune_prices(pun_data, today)
+    return pun_data
+
+
+def test_memory_budget_upper_bound() -> None:
+    """In modalità a basso consumo i dati del mese restano sotto il limite."""
+    dimensione: int = get_deep_size(build_month(memory_budget=True))
+    assert dimensione < MEMORY_BUDGET_MAX_BYTE
+    assert dimensione * 4 < get_deep_size(build_month(memory_budget=False))
+
+
+def test_memory_budget_entity_rings() -> None:
+    """In modalità a basso consumo i sensori leggono i prezzi dal coordinator."""
+    pun_data: PunData = build_month(memory_budget=True)
+    oggi = date(2025, 10, 31)
+    tabella = get_day_table(oggi)
+    for nome, prezzi_15min in (
+        ("pun_orari", False),
+        ("pun_15min", True),
+        ("prezzi_zonali", False),
+        ("prezzi_zonali_15min", True),
+    ):
+        prezzi: dict[str, float | None] = getattr(pun_data, nome)
+        condiviso = AnelloGiorni(lambda p=prezzi: p, prezzi_15min, condiviso=True)
+        copia = AnelloGiorni(lambda p=prezzi: p, prezzi_15min)
+        condiviso.load(oggi)
+        copia.load(oggi)
+
+        # Stessi prezzi, sia per lo stato sia per gli attributi
+        orario = tabella.periodi_15min[41] if prezzi_15min else tabella.ore[10]
+        assert condiviso.get_prezzo(orario) is not None
+        assert condiviso.get_prezzo(orario) == copia.get_prezzo(orario)
+        assert condiviso.get_attributes() == copia.get_attributes()
+
+        # Memoria propria del sensore: i valori copiati nell'anello
+        # (le chiavi appartengono alle tabelle dei giorni in cache)
+        propria: int = get_deep_size([p.valori for p in condiviso.posizioni])
+        assert propria < ENTITA_MAX_BYTE
+        assert propria * 5 < get_deep_size([p.valori for p in copia.posizioni])
+
+
+def test_deep_size_shared_objects() -> None:
+    """Gli oggetti condivisi vengono conteggiati una sola volta."""
+    valori = list(range(1000))
+    assert get_deep_size([valori, valori]) < 2 * get_deep_size(valori)
+    assert get_deep_size({"a": valori}) > get_deep_size(valori)
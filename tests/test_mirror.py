@@ -0,0 +1,112 @@
+"""Test della condivisione dei prezzi tra più istanze."""
+
+import asyncio
+from datetime import date
+from types import SimpleNamespace
+from typing import Any
+
+from aiohttp import ClientSession, ServerConnectionError, web
+from aiohttp.test_utils import TestServer
+import pytest
+
+from custom_components.pun_sensor.const import DOMAIN
+from custom_components.pun_sensor.interfaces import PunData, Zona
+from custom_components.pun_sensor.mirror import (
+    PUNMirrorClient,
+    PUNSnapshotView,
+    apply_snapshot,
+    is_mirror_url,
+    parse_members,
+)
+
+from .common import build_synthetic_xml
+
+TODAY: date = date(2025, 10, 26)
+
+
+class FakeHass:
+    """Istanza minima di Home Assistant con un solo coordinator."""
+
+    def __init__(self, coordinator: Any) -> None:
+        """Registra il coordinator come unica configurazione."""
+        self.data: dict[str, Any] = {DOMAIN: {"entry": coordinator}}
+        self.lavori: int = 0
+
+    async def async_add_executor_job(self, funzione, *args) -> Any:
+        """Esegue il lavoro in un thread, contando le chiamate."""
+        self.lavori += 1
+        return await asyncio.get_running_loop().run_in_executor(None, funzione, *args)
+
+
+def build_server_coordinator() -> SimpleNamespace:
+    """Crea un'istanza che condivide i prezzi della zona NORD."""
+    members: dict[str, bytes] = {
+        f"{giorno:%Y%m%d}MGPPrezzi.xml": build_synthetic_xml(giorno)
+        for giorno in (date(2025, 10, 25), TODAY, date(2025, 10, 27))
+    }
+    return SimpleNamespace(
+        mirror_server=True,
+        pun_data=parse_members(members, Zona.NORD, TODAY),
+        mirror_cache={},
+        mirror_members=members,
+        mirror_today=TODAY,
+    )
+
+
+async def async_fetch(
+    coordinator: SimpleNamespace, zone: list[Zona]
+) -> tuple[list[PunData | None], int]:
+    """Scarica i prezzi delle zone indicate da un client collegato all'istanza."""
+    hass = FakeHass(coordinator)
+    view = PUNSnapshotView(hass)  # type: ignore[arg-type]
+    app = web.Application()
+    app.router.add_get(view.url, view.get)
+    async with TestServer(app) as server, ClientSession() as session:
+        client = PUNMirrorClient(session, str(server.make_url("/")))
+        risultati: list[PunData | None] = []
+        for zona in zone:
+            snapshot = await client.async_get_snapshot(zona)
+            risultati.append(
+                None if snapshot is None else apply_snapshot(PunData(), snapshot)
+            )
+    return risultati, hass.lavori
+
+
+def test_mirror_other_zone() -> None:
+    """Un'istanza collegata con una zona diversa riceve i prezzi della propria zona."""
+    coordinator = build_server_coordinator()
+    (sud, sud_ripetuto, nord), lavori = asyncio.run(
+        async_fetch(coordinator, [Zona.SUD, Zona.SUD, Zona.NORD])
+    )
+
+    atteso: PunData = parse_members(coordinator.mirror_members, Zona.SUD, TODAY)
+    assert sud is not None
+    assert sud.prezzi_zonali == atteso.prezzi_zonali
+    assert sud.prezzi_zonali != coordinator.pun_data.prezzi_zonali
+    assert sud.pun_orari == coordinator.pun_data.pun_orari
+
+    # La seconda richiesta della stessa zona è condizionale (dati non cambiati)
+    # e i file vengono esaminati di nuovo una sola volta per zona
+    assert sud_ripetuto is None
+    assert lavori == 1
+    assert set(coordinator.mirror_cache) == {Zona.SUD, Zona.NORD}
+
+    assert nord is not None
+    assert nord.prezzi_zonali == coordinator.pun_data.prezzi_zonali
+
+
+def test_mirror_other_zone_without_files() -> None:
+    """Senza i file conservati le altre zone non sono disponibili."""
+    coordinator = build_server_coordinator()
+    coordinator.mirror_members = {}
+    with pytest.raises(ServerConnectionError, match="404"):
+        asyncio.run(async_fetch(coordinator, [Zona.SUD]))
+
+
+def test_is_mirror_url() -> None:
+    """Solo gli indirizzi HTTP e HTTPS sono indirizzi di altre istanze."""
+    assert is_mirror_url("http://homeassistant.local:8123")
+    assert is_mirror_url("HTTPS://ha")
+    assert not is_mirror_url("/config/pun")
+    assert not is_mirror_url("")
+    assert not is_mirror_url(None)
@@ -0,0 +1,133 @@
+"""Test dell'esame dei file XML del GME."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from math import isnan
+import re
+import zipfile
+
+import pytest
+
+from custom_components.pun_sensor.datasource import build_archive
+from custom_components.pun_sensor.interfaces import Fascia, PunData, Zona
+from custom_components.pun_sensor.utils import (
+    GiornoXML,
+    XMLBackend,
+    get_xml_backend,
+    merge_xml_days,
+    parse_xml_content,
+    parse_xml_member,
+)
+
+from .common import build_synthetic_xml
+
+
+def build_test_archive() -> zipfile.ZipFile:
+    """Crea un archivio con prezzi orari e a 15 minuti, compreso un cambio ora."""
+    files: dict[str, bytes] = {}
+    for d in range(24, 29):
+        giorno = date(2025, 10, d)
+        files[f"{giorno:%Y%m%d}MGPPrezzi.xml"] = build_synthetic_xml(giorno)
+        files[f"{giorno:%Y%m%d}MGPPrezzi15.xml"] = build_synthetic_xml(giorno, True)
+    return build_archive(files.items())
+
+
+async def async_parse_concurrent(
+    archive: zipfile.ZipFile, workers: int
+) -> list[GiornoXML | None]:
+    """Esamina i file nei thread come PUNDataUpdateCoordinator.async_parse_archive()."""
+    loop = asyncio.get_running_loop()
+    limite = asyncio.Semaphore(workers)
+    with ThreadPoolExecutor(workers) as executor:
+
+        async def async_parse(fn: str) -> GiornoXML | None:
+            async with limite:
+                contenuto: bytes = archive.read(fn)
+                return await loop.run_in_executor(
+                    executor, parse_xml_content, fn, contenuto, "NORD", True
+                )
+
+        return await asyncio.gather(*(async_parse(fn) for fn in archive.namelist()))
+
+
+def test_parse_concurrent_matches_sequential() -> None:
+    """L'esame nei thread dà gli stessi giorni dell'esame sequenziale."""
+    archive = build_test_archive()
+    sequenziale = [
+        parse_xml_member(archive, fn, "NORD", True) for fn in archive.namelist()
+    ]
+    assert all(giorno is not None for giorno in sequenziale)
+    assert asyncio.run(async_parse_concurrent(archive, 4)) == sequenziale
+
+    # Il giorno del cambio ora ha 25 ore (100 periodi di 15 minuti)
+    giorni = {(g.data, g.prezzi_15min): g for g in sequenziale if g is not None}
+    assert len(giorni[(date(2025, 10, 26), False)].prezzi) == 25
+    assert len(giorni[(date(2025, 10, 26), True)].prezzi) == 100
+
+
+def build_edge_case_xml(giorno: date) -> bytes:
+    """Genera un file sintetico con commenti, spazi, una zona mancante e un PUN vuoto."""
+    testo: str = build_synthetic_xml(giorno).decode("utf-8")
+    testo = testo.replace(
+        "<NewDataSet>", "<NewDataSet>\n  <!-- commento -->\n  <?elaborazione test?>", 1
+    )
+    testo = testo.replace("<Mercato>", "\n    <!-- commento --><Mercato>", 1)
+    testo = re.sub(r"<NORD>[^<]*</NORD>", "", testo, count=1)
+    testo = re.sub(r"<PUN>[^<]*</PUN>", "<PUN></PUN>", testo, count=2)
+    return testo.replace("</Prezzi>", "\n  </Prezzi>").encode("utf-8")
+
+
+def get_pun_data_fields(pun_data: PunData) -> dict[str, object]:
+    """Restituisce i dati unificati in una forma confrontabile."""
+    campi: dict[str, object] = {
+        nome: valore for nome, valore in vars(pun_data).items() if nome != "completezza"
+    }
+    campi["completezza"] = {
+        giorno: vars(completezza)
+        for giorno, completezza in pun_data.completezza.items()
+    }
+    return campi
+
+
+def get_zonali_fields(giorno: GiornoXML) -> dict[str, list[float | None]]:
+    """Restituisce i prezzi di tutte le zone con None al posto di NaN."""
+    return {
+        zona: [None if isnan(valore) else valore for valore in valori]
+        for zona, valori in giorno.zonali.items()
+    }
+
+
+@pytest.mark.parametrize(
+    ("fn", "contenuto"),
+    [
+        ("20251026MGPPrezzi.xml", build_synthetic_xml(date(2025, 10, 26))),
+        ("20251026MGPPrezzi15.xml", build_synthetic_xml(date(2025, 10, 26), True)),
+        ("20250330MGPPrezzi15.xml", build_synthetic_xml(date(2025, 3, 30), True)),
+        ("20251027MGPPrezzi.xml", build_edge_case_xml(date(2025, 10, 27))),
+    ],
+)
+def test_lxml_matches_defusedxml(fn: str, contenuto: bytes) -> None:
+    """Le librerie lxml e defusedxml danno gli stessi prezzi per gli stessi file."""
+    pytest.importorskip("lxml")
+    backends: list[XMLBackend] = [get_xml_backend(), get_xml_backend(usa_lxml=False)]
+    assert [backend.nome for backend in backends] == ["lxml", "defusedxml"]
+
+    giorni: list[GiornoXML] = []
+    for backend in backends:
+        giorno = parse_xml_content(fn, contenuto, "NORD", True, backend=backend)
+        assert giorno is not None
+        giorni.append(giorno)
+
+    assert giorni[0].prezzi == giorni[1].prezzi
+    assert giorni[0].record == giorni[1].record
+    assert get_zonali_fields(giorni[0]) == get_zonali_fields(giorni[1])
+
+    risultati: list[dict[str, object]] = []
+    for giorno in giorni:
+        pun_data: PunData = PunData()
+        pun_data.zona = Zona.NORD
+        merge_xml_days(pun_data, [giorno], giorno.data)
+        assert pun_data.pun[Fascia.MONO]
+        risultati.append(get_pun_data_fields(pun_data))
+    assert risultati[0] == risultati[1]
@@ -0,0 +1,134 @@
+"""Test della previsione delle medie del PUN a fine mese."""
+
+from datetime import date, timedelta
+
+import pytest
+
+from custom_components.pun_sensor.interfaces import Fascia, PunData, Zona
+from custom_components.pun_sensor.mirror import apply_snapshot, build_snapshot
+from custom_components.pun_sensor.projection import (
+    FASCE_ORARIE,
+    build_month_projection,
+    get_ore_fasce_giorno,
+    get_prezzi_noti_mese,
+)
+from custom_components.pun_sensor.utils import (
+    GiornoXML,
+    merge_xml_days,
+    parse_xml_content,
+    prune_prices,
+)
+
+from .common import build_synthetic_xml
+
+
+def build_pun_data(inizio: date, today: date) -> tuple[PunData, dict[Fascia, float]]:
+    """Unisce i giorni da inizio a domani come fa il coordinator, con le medie."""
+    giorni: list[GiornoXML | None] = []
+    giorno: date = inizio
+    while giorno <= today + timedelta(days=1):
+        giorni.append(
+            parse_xml_content(
+                f"{giorno:%Y%m%d}MGPPrezzi.xml", build_synthetic_xml(giorno), "NORD"
+            )
+        )
+        giorno += timedelta(days=1)
+
+    pun_data: PunData = PunData()
+    pun_data.zona = Zona.NORD
+    merge_xml_days(pun_data, giorni, today)
+    prune_prices(pun_data, today)
+    medie: dict[Fascia, float] = {
+        fascia: sum(valori) / len(valori)
+        for fascia, valori in pun_data.pun.items()
+        if valori
+    }
+    return pun_data, medie
+
+
+def get_ore_fasce(inizio: date, fine: date) -> dict[Fascia, int]:
+    """Restituisce le ore per fascia dei giorni compresi tra inizio e fine."""
+    ore: dict[Fascia, int] = dict.fromkeys(FASCE_ORARIE, 0)
+    giorno: date = inizio
+    while giorno <= fine:
+        for fascia, ore_giorno in zip(
+            FASCE_ORARIE, get_ore_fasce_giorno(giorno), strict=True
+        ):
+            ore[fascia] += ore_giorno
+        giorno += timedelta(days=1)
+    return ore
+
+
+def test_projection_excludes_previous_month() -> None:
+    """I prezzi del mese precedente non vengono conteggiati tra le ore note."""
+    oggi = date(2025, 11, 2)
+    completo, medie = build_pun_data(date(2025, 10, 29), oggi)
+    solo_mese, _ = build_pun_data(date(2025, 11, 1), oggi)
+    assert len(completo.pun[Fascia.MONO]) == 24 * 5
+    assert (
+        sum(completo.prezzi_mese_precedente.get(f, 0) for f in FASCE_ORARIE) == 24 * 3
+    )
+
+    # Ore e somme note coincidono con quelle dei soli giorni del mese
+    note, ultimo_giorno = get_prezzi_noti_mese(completo, oggi)
+    note_mese, _ = get_prezzi_noti_mese(solo_mese, oggi)
+    assert ultimo_giorno == date(2025, 11, 3)
+    ore_note: dict[Fascia, int] = get_ore_fasce(date(2025, 11, 1), date(2025, 11, 3))
+    for fascia in FASCE_ORARIE:
+        assert note[fascia][0] == note_mese[fascia][0] == ore_note[fascia]
+        assert note[fascia][1] == pytest.approx(note_mese[fascia][1])
+
+    # Le ore rimanenti vengono stimate con la media della fascia
+    previsione = build_month_projection(completo, medie, oggi)
+    ore_rimanenti: dict[Fascia, int] = get_ore_fasce(
+        date(2025, 11, 4), date(2025, 11, 30)
+    )
+    for fascia in FASCE_ORARIE:
+        assert previsione.ore_rimanenti[fascia] == ore_rimanenti[fascia]
+        assert previsione.medie[fascia] == pytest.approx(
+            (note[fascia][1] + medie[fascia] * ore_rimanenti[fascia])
+            / (ore_note[fascia] + ore_rimanenti[fascia])
+        )
+    assert previsione.ore_rimanenti[Fascia.MONO] == 27 * 24
+    assert previsione.oggi == oggi
+
+
+def test_projection_day_rollover() -> None:
+    """Dopo la mezzanotte i prezzi di oggi restano tra le ore note."""
+    pun_data, medie = build_pun_data(date(2025, 10, 1), date(2025, 10, 14))
+    ieri = build_month_projection(pun_data, medie, date(2025, 10, 14))
+
+    # Prima del nuovo aggiornamento le liste arrivano a ieri, ma oggi è completo
+    oggi = build_month_projection(pun_data, medie, date(2025, 10, 15))
+    assert oggi.ore_rimanenti == ieri.ore_rimanenti
+    assert oggi.medie == ieri.medie
+    assert oggi.oggi == date(2025, 10, 15)
+
+    # Le ore rimanenti partono da domani (16-31 ottobre, con il cambio dell'ora)
+    assert oggi.ore_rimanenti[Fascia.MONO] == 24 * 16 + 1
+
+
+def test_projection_month_rollover() -> None:
+    """Il primo giorno del mese conta solo i prezzi del nuovo mese."""
+    pun_data, medie = build_pun_data(date(2025, 10, 1), date(2025, 10, 31))
+    note, ultimo_giorno = get_prezzi_noti_mese(pun_data, date(2025, 11, 1))
+    assert ultimo_giorno == date(2025, 11, 1)
+    assert {fascia: ore for fascia, (ore, _) in note.items()} == get_ore_fasce(
+        date(2025, 11, 1), date(2025, 11, 1)
+    )
+    previsione = build_month_projection(pun_data, medie, date(2025, 11, 1))
+    assert previsione.ore_rimanenti[Fascia.MONO] == 29 * 24
+
+
+def test_running_totals() -> None:
+    """I totali del mese per fascia coincidono con le liste senza il mese precedente."""
+    pun_data, _ = build_pun_data(date(2025, 10, 29), date(2025, 11, 2))
+
+    # L'1 e il 2 novembre (festivo e domenica) non hanno ore in F1
+    for fascia in (Fascia.MONO, *FASCE_ORARIE):
+        valori = pun_data.pun[fascia][pun_data.prezzi_mese_precedente[fascia] :]
+        assert pun_data.prezzi_mese.get(fascia, (0, 0.0)) == (len(valori), sum(valori))
+
+    # I totali vengono ricalcolati dai dati condivisi da un'altra istanza
+    copia: PunData = apply_snapshot(PunData(), build_snapshot(pun_data))
+    assert copia.prezzi_mese == pun_data.prezzi_mese
@@ -0,0 +1,108 @@
+"""Test della posizione dei prezzi nel giorno e nelle 24 ore successive."""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from custom_components.pun_sensor.ranks import (
+    build_price_ranks,
+    get_percentile,
+    get_rank_attributes,
+)
+from custom_components.pun_sensor.utils import get_day_table
+
+
+def build_prices(
+    giorni: list[date], prezzi_15min: bool = False
+) -> dict[str, float | None]:
+    """Prezzi dei giorni indicati, con valori ripetuti (ogni prezzo compare più volte)."""
+    prezzi: dict[str, float | None] = {}
+    for giorno in giorni:
+        tabella = get_day_table(giorno)
+        for indice, orario in enumerate(
+            tabella.periodi_15min if prezzi_15min else tabella.ore
+        ):
+            prezzi[str(orario)] = round(((indice * 7 + giorno.day) % 10) / 100, 2)
+    return prezzi
+
+
+def test_percentile() -> None:
+    """Il più economico è allo 0%, il più caro al 100%."""
+    assert get_percentile(1, 5) == 0.0
+    assert get_percentile(5, 5) == 100.0
+    assert get_percentile(2, 4) == 33.3
+    assert get_percentile(1, 1) == 0.0
+
+
+def test_day_ranks_ties() -> None:
+    """I prezzi uguali hanno la stessa posizione (la migliore)."""
+    ore = get_day_table(date(2025, 6, 10)).ore
+    classifica = build_price_ranks(
+        {str(ore[0]): 0.3, str(ore[1]): 0.2, str(ore[2]): 0.2, str(ore[3]): 0.1}
+    )
+    assert [classifica[str(ora)].posizione for ora in ore[0:4]] == [4, 2, 2, 1]
+    assert classifica[str(ore[1])].percentile == 33.3
+    assert classifica[str(ore[3])].percentile == 0.0
+    assert classifica[str(ore[0])].minimo == 0.1
+    assert classifica[str(ore[0])].massimo == 0.3
+    assert classifica[str(ore[0])].media == pytest.approx(0.2)
+
+    # Le 24 ore successive comprendono solo i prezzi da quell'ora in poi
+    assert [classifica[str(ora)].posizione_24h for ora in ore[0:4]] == [4, 2, 2, 1]
+    assert classifica[str(ore[2])].percentile_24h == 100.0
+
+
+@pytest.mark.parametrize(
+    "giorni",
+    [
+        [date(2025, 3, 29), date(2025, 3, 30), date(2025, 3, 31)],
+        [date(2025, 10, 25), date(2025, 10, 26), date(2025, 10, 27)],
+    ],
+)
+@pytest.mark.parametrize("prezzi_15min", [False, True])
+def test_ranks_dst(giorni: list[date], prezzi_15min: bool) -> None:
+    """Nei cambi ora la finestra dura 24 ore effettive e ogni giorno ha le sue ore."""
+    prezzi = build_prices(giorni, prezzi_15min)
+    prezzi[next(iter(prezzi))] = None
+    classifica = build_price_ranks(prezzi)
+    assert len(classifica) == len(prezzi) - 1
+
+    # Confronto con il calcolo diretto su tutti i prezzi
+    serie = [
+        (datetime.fromisoformat(orario), orario, prezzo)
+        for orario, prezzo in prezzi.items()
+        if prezzo is not None
+    ]
+    for istante, orario, prezzo in serie:
+        giorno = [p for _, o, p in serie if o[0:10] == orario[0:10]]
+        finestra = [
+            p for i, _, p in serie if istante <= i < istante + timedelta(hours=24)
+        ]
+        attesa = classifica[orario]
+        assert attesa.posizione == 1 + sum(1 for p in giorno if p < prezzo)
+        assert attesa.posizione_24h == 1 + sum(1 for p in finestra if p < prezzo)
+        assert attesa.percentile_24h == get_percentile(
+            attesa.posizione_24h, len(finestra)
+        )
+        assert attesa.massimo == max(giorno)
+
+    # Il giorno di cambio ora ha 23 o 25 ore (92 o 100 periodi)
+    giorno_dst = giorni[1].isoformat()
+    valori = len(get_day_table(giorni[1]).ore) * (4 if prezzi_15min else 1)
+    assert sum(1 for orario in classifica if orario[0:10] == giorno_dst) == valori
+
+
+def test_rank_attributes() -> None:
+    """Gli attributi di stato riportano la classifica dell'orario corrente."""
+    assert get_rank_attributes(None) == {}
+    ore = get_day_table(date(2025, 6, 10)).ore
+    classifica = build_price_ranks({str(ore[0]): 0.2, str(ore[1]): 0.1})
+    assert get_rank_attributes(classifica[str(ore[0])]) == {
+        "posizione_oggi": 2,
+        "percentile_oggi": 100.0,
+        "posizione_24h": 2,
+        "percentile_24h": 100.0,
+        "minimo_oggi": 0.1,
+        "massimo_oggi": 0.2,
+        "media_oggi": 0.15,
+    }
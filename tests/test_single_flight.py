@@ -0,0 +1,140 @@
+"""Test degli aggiornamenti dei prezzi eseguiti senza sovrapposizioni."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from custom_components.pun_sensor.coordinator import PUNDataUpdateCoordinator
+from homeassistant.core import HomeAssistant
+
+from .common import build_config_entry
+
+
+class AggiornamentoProva:
+    """Aggiornamento che termina (o fallisce) solo quando viene sbloccato."""
+
+    def __init__(self, errore: Exception | None = None) -> None:
+        """Inizializza l'aggiornamento."""
+        self.errore: Exception | None = errore
+        self.esecuzioni: int = 0
+        self.sblocco: asyncio.Event = asyncio.Event()
+
+    async def __call__(self) -> None:
+        """Esegue l'aggiornamento."""
+        self.esecuzioni += 1
+        await self.sblocco.wait()
+        if self.errore is not None:
+            raise self.errore
+
+
+def test_concurrent_callers_share_fetch(tmp_path: Path) -> None:
+    """Chi arriva durante l'aggiornamento si unisce a quello in corso."""
+
+    async def async_test() -> None:
+        hass = HomeAssistant(str(tmp_path))
+        coordinator = PUNDataUpdateCoordinator(hass, build_config_entry())
+        aggiornamento = AggiornamentoProva()
+        chiamate = [
+            asyncio.create_task(coordinator.async_single_flight("pun", aggiornamento))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        assert coordinator.get_fetch_in_corso("pun") is coordinator.fetch_corrente
+
+        aggiornamento.sblocco.set()
+        assert await asyncio.gather(*chiamate) == [True, False, False]
+        assert aggiornamento.esecuzioni == 1
+        assert coordinator.metrics.aggiornamenti_uniti == 2
+        assert coordinator.fetch_corrente is None
+        assert coordinator.fetch_params is None
+        await hass.async_stop(force=True)
+
+    asyncio.run(async_test())
+
+
+def test_error_reaches_every_waiter(tmp_path: Path) -> None:
+    """L'errore arriva a tutti quelli che attendono e libera l'aggiornamento."""
+
+    async def async_test() -> None:
+        hass = HomeAssistant(str(tmp_path))
+        coordinator = PUNDataUpdateCoordinator(hass, build_config_entry())
+        errore = RuntimeError("download")
+        aggiornamento = AggiornamentoProva(errore)
+        chiamate = [
+            asyncio.create_task(coordinator.async_single_flight("pun", aggiornamento))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        aggiornamento.sblocco.set()
+        risultati = await asyncio.gather(*chiamate, return_exceptions=True)
+        assert all(risultato is errore for risultato in risultati)
+        assert aggiornamento.esecuzioni == 1
+        assert coordinator.fetch_corrente is None
+        assert coordinator.fetch_params is None
+        assert coordinator.get_fetch_in_corso("pun") is None
+
+        # L'aggiornamento successivo viene eseguito di nuovo
+        aggiornamento.errore = None
+        assert await coordinator.async_single_flight("pun", aggiornamento)
+        assert aggiornamento.esecuzioni == 2
+        await hass.async_stop(force=True)
+
+    asyncio.run(async_test())
+
+
+def test_queued_fetch_runs_after_error(tmp_path: Path) -> None:
+    """Le richieste con parametri diversi vengono accodate e unite tra loro."""
+
+    async def async_test() -> None:
+        hass = HomeAssistant(str(tmp_path))
+        coordinator = PUNDataUpdateCoordinator(hass, build_config_entry())
+        pun = AggiornamentoProva(RuntimeError("download"))
+        domani = AggiornamentoProva()
+        domani.sblocco.set()
+        chiamata_pun = asyncio.create_task(coordinator.async_single_flight("pun", pun))
+        await asyncio.sleep(0)
+        chiamate_domani = [
+            asyncio.create_task(coordinator.async_single_flight("domani", domani))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        assert set(coordinator.fetch_coda) == {"domani"}
+        assert domani.esecuzioni == 0
+
+        # L'errore del primo aggiornamento non blocca quello in coda
+        pun.sblocco.set()
+        with pytest.raises(RuntimeError):
+            await chiamata_pun
+        assert await asyncio.gather(*chiamate_domani) == [True, False]
+        assert domani.esecuzioni == 1
+        assert coordinator.metrics.aggiornamenti_accodati == 1
+        assert coordinator.metrics.aggiornamenti_uniti == 1
+        assert coordinator.fetch_coda == {}
+        assert coordinator.fetch_corrente is None
+        await hass.async_stop(force=True)
+
+    asyncio.run(async_test())
+
+
+def test_update_pun_joined_error(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """I nuovi tentativi dopo un errore li schedula solo chi ha eseguito l'aggiornamento."""
+
+    async def async_test() -> None:
+        hass = HomeAssistant(str(tmp_path))
+        coordinator = PUNDataUpdateCoordinator(hass, build_config_entry())
+        aggiornamento = AggiornamentoProva(RuntimeError("download"))
+        monkeypatch.setattr(coordinator, "_async_update_data", aggiornamento)
+        chiamate = [asyncio.create_task(coordinator.update_pun()) for _ in range(2)]
+        await asyncio.sleep(0)
+        aggiornamento.sblocco.set()
+        await asyncio.gather(*chiamate)
+        assert aggiornamento.esecuzioni == 1
+        assert coordinator.web_retry_count == 1
+        assert "pun" in coordinator.timers
+        coordinator.cancel_timers()
+        await hass.async_stop(force=True)
+
+    asyncio.run(async_test())
@@ -0,0 +1,153 @@
+"""Test della pubblicazione dei prezzi nelle statistiche a lungo termine."""
+
+import asyncio
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from awesomeversion.awesomeversion import AwesomeVersion
+import pytest
+
+from custom_components.pun_sensor.interfaces import PunData, Zona
+from custom_components.pun_sensor.stats import (
+    async_publish_statistics,
+    build_metadata,
+    build_statistics,
+    get_prezzi_per_ora,
+    group_by_hour,
+)
+from custom_components.pun_sensor.utils import get_day_table
+from homeassistant.const import __version__ as HA_VERSION
+from homeassistant.core import HomeAssistant
+
+# Giorno con 25 ore: le 02:00 (ora legale) e le 02:00 (ora solare) sono ore diverse
+GIORNO_DST: date = date(2025, 10, 26)
+GIORNO: date = date(2025, 6, 10)
+
+
+def get_ora_utc(anno: int, mese: int, giorno: int, ora: int) -> datetime:
+    """Inizio dell'ora indicata in UTC."""
+    return datetime(anno, mese, giorno, ora, tzinfo=timezone.utc)
+
+
+def test_group_by_hour_15min() -> None:
+    """I prezzi a 15 minuti vengono raggruppati nell'ora a cui appartengono."""
+    periodi = get_day_table(GIORNO_DST).periodi_15min
+    prezzi: list[tuple[str, float | None]] = [
+        (str(periodo), float(indice)) for indice, periodo in enumerate(periodi[8:16])
+    ]
+    prezzi.append((str(periodi[16]), None))
+    ore = group_by_hour(prezzi)
+
+    # Le due ore delle 02:00 locali sono distinte in UTC (00:00 e 01:00)
+    assert ore == {
+        get_ora_utc(2025, 10, 26, 0): [0.0, 1.0, 2.0, 3.0],
+        get_ora_utc(2025, 10, 26, 1): [4.0, 5.0, 6.0, 7.0],
+    }
+
+
+def test_prezzi_per_ora() -> None:
+    """I prezzi orari hanno la precedenza; le ore parziali usano i periodi presenti."""
+    pun_data = PunData()
+    ore = get_day_table(GIORNO).ore
+    periodi = get_day_table(GIORNO).periodi_15min
+
+    # Ora 0 dallo storico orario, ora 1 da oggi
+    pun_data.storico_orari[str(ore[0])] = (0.1, 0.11)
+    pun_data.pun_orari[str(ore[1])] = 0.2
+    pun_data.prezzi_zonali[str(ore[1])] = None
+
+    # Periodi a 15 minuti: l'ora 1 (già oraria) viene ignorata, l'ora 2 è parziale
+    for periodo in periodi[4:8]:
+        pun_data.pun_15min[str(periodo)] = 9.0
+    pun_data.storico_15min[str(periodi[8])] = (0.3, 0.31)
+    pun_data.pun_15min[str(periodi[9])] = 0.5
+    pun_data.prezzi_zonali_15min[str(periodi[9])] = 0.51
+
+    pun, zonali = get_prezzi_per_ora(pun_data)
+    assert pun == {
+        get_ora_utc(2025, 6, 9, 22): [0.1],
+        get_ora_utc(2025, 6, 9, 23): [0.2],
+        get_ora_utc(2025, 6, 10, 0): [0.3, 0.5],
+    }
+    # Ora 1 senza prezzo zonale (né orario né a 15 minuti)
+    assert zonali == {
+        get_ora_utc(2025, 6, 9, 22): [0.11],
+        get_ora_utc(2025, 6, 10, 0): [0.31, 0.51],
+    }
+
+
+def test_build_statistics() -> None:
+    """Le righe orarie hanno media, minimo e massimo, in ordine di tempo."""
+    statistiche = build_statistics(
+        {
+            get_ora_utc(2025, 6, 10, 1): [0.2, 0.4, 0.3, 0.1],
+            get_ora_utc(2025, 6, 10, 0): [0.5],
+        }
+    )
+    assert statistiche[0] == {
+        "start": get_ora_utc(2025, 6, 10, 0),
+        "mean": 0.5,
+        "min": 0.5,
+        "max": 0.5,
+    }
+    assert statistiche[1]["start"] == get_ora_utc(2025, 6, 10, 1)
+    assert statistiche[1]["mean"] == pytest.approx(0.25)
+    assert (statistiche[1]["min"], statistiche[1]["max"]) == (0.1, 0.4)
+
+
+def test_build_metadata() -> None:
+    """I metadati identificano la statistica esterna con l'unità €/kWh."""
+    metadata = build_metadata("pun_sensor:pun_orario", "PUN orario")
+    assert metadata["statistic_id"] == "pun_sensor:pun_orario"
+    assert metadata["source"] == "pun_sensor"
+    assert metadata["name"] == "PUN orario"
+    assert metadata["unit_of_measurement"] == "€/kWh"
+    assert metadata["has_sum"] is False
+    if AwesomeVersion(HA_VERSION) < AwesomeVersion("2025.4.0"):
+        assert metadata["has_mean"] is True
+        assert "mean_type" not in metadata
+
+
+def test_publish_without_recorder(tmp_path: Path) -> None:
+    """Senza il recorder non viene importato nulla."""
+
+    async def async_test() -> None:
+        hass = HomeAssistant(str(tmp_path))
+        pun_data = PunData()
+        pun_data.pun_orari[str(get_day_table(GIORNO).ore[0])] = 0.1
+        assert async_publish_statistics(hass, pun_data) == 0
+        await hass.async_stop(force=True)
+
+    asyncio.run(async_test())
+
+
+def test_publish_statistics(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """PUN e prezzo zonale vengono importati con un'unica chiamata per serie."""
+    statistics = pytest.importorskip("homeassistant.components.recorder.statistics")
+    importate: list[tuple[Any, list[Any]]] = []
+    monkeypatch.setattr(
+        statistics,
+        "async_add_external_statistics",
+        lambda hass, metadata, righe: importate.append((metadata, righe)),
+    )
+
+    async def async_test() -> None:
+        hass = HomeAssistant(str(tmp_path))
+        hass.config.components.add("recorder")
+        pun_data = PunData()
+        pun_data.zona = Zona.CALA
+        for indice, ora in enumerate(get_day_table(GIORNO).ore):
+            pun_data.pun_orari[str(ora)] = indice / 100
+            pun_data.prezzi_zonali[str(ora)] = None if indice < 4 else indice / 100
+        assert async_publish_statistics(hass, pun_data) == 24 + 20
+        await hass.async_stop(force=True)
+
+    asyncio.run(async_test())
+    assert [metadata["statistic_id"] for metadata, _ in importate] == [
+        "pun_sensor:pun_orario",
+        "pun_sensor:prezzo_zonale_cala",
+    ]
+    assert importate[1][0]["name"] == f"Prezzo zonale ({Zona.CALA.value})"
+    # Prima ora con prezzo zonale: le 04:00 locali
+    assert importate[1][1][0]["start"] == get_ora_utc(2025, 6, 10, 2)
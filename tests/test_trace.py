@@ -0,0 +1,103 @@
+"""Test delle tracce dei download conservate per la diagnostica."""
+
+import asyncio
+from datetime import date, datetime
+from pathlib import Path
+import re
+
+from aiohttp import ClientSession, ServerConnectionError, web
+from aiohttp.test_utils import TestServer
+import pytest
+
+from custom_components.pun_sensor import datasource
+from custom_components.pun_sensor.const import FETCH_TRACE_AVVISI, FETCH_TRACE_SIZE
+from custom_components.pun_sensor.coordinator import PUNDataUpdateCoordinator
+from custom_components.pun_sensor.datasource import GMEDataSource
+from custom_components.pun_sensor.interfaces import FetchTrace
+from custom_components.pun_sensor.utils import parse_xml_content
+from homeassistant.core import HomeAssistant
+
+from .common import build_config_entry, build_synthetic_xml
+
+GIORNO: date = date(2025, 3, 10)
+
+
+def test_trace_as_dict() -> None:
+    """La traccia conserva al massimo FETCH_TRACE_AVVISI avvisi e conta gli altri."""
+    traccia = FetchTrace(
+        "pun", "GMEDataSource", date(2025, 3, 1), GIORNO, datetime(2025, 3, 9, 1, 5)
+    )
+    traccia.add_avvisi(f"Avviso {i}" for i in range(FETCH_TRACE_AVVISI + 3))
+    traccia.stato_http = 200
+    traccia.giorni_incompleti = [GIORNO]
+
+    dati = traccia.as_dict()
+    assert dati["intervallo"] == ["2025-03-01", "2025-03-10"]
+    assert dati["inizio"] == "2025-03-09T01:05:00"
+    assert dati["esito"] == "in_corso"
+    assert dati["stato_http"] == 200
+    assert dati["giorni_incompleti"] == ["2025-03-10"]
+    assert dati["avvisi"] == [f"Avviso {i}" for i in range(FETCH_TRACE_AVVISI)]
+    assert dati["avvisi_scartati"] == 3
+
+
+def test_parse_warnings() -> None:
+    """L'esame del file riporta i periodi non validi e i PUN mancanti."""
+    contenuto: str = build_synthetic_xml(GIORNO).decode()
+    contenuto = contenuto.replace("<Ora>3</Ora>", "<Ora>25</Ora>")
+    contenuto = re.sub(r"<PUN>[^<]*</PUN>", "", contenuto, count=1)
+    giorno = parse_xml_content(
+        f"{GIORNO:%Y%m%d}MGPPrezzi.xml", contenuto.encode(), "NORD"
+    )
+    assert giorno is not None
+    assert giorno.avvisi == [
+        "PUN non specificato per 20250310 al periodo 1",
+        "Periodo 25 non valido per 20250310 (max: 24)",
+    ]
+
+
+def test_trace_ring(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Il coordinator conserva solo le ultime FETCH_TRACE_SIZE tracce, con l'esito."""
+
+    async def async_risposta(request: web.Request) -> web.Response:
+        """Risponde come il sito del GME quando non è disponibile."""
+        return web.Response(status=503)
+
+    async def async_test() -> None:
+        hass = HomeAssistant(str(tmp_path))
+        coordinator = PUNDataUpdateCoordinator(hass, build_config_entry())
+        for i in range(FETCH_TRACE_SIZE + 5):
+            with coordinator.trace_fetch(f"prova {i}", GIORNO, GIORNO):
+                pass
+        assert len(coordinator.tracce) == FETCH_TRACE_SIZE
+        assert coordinator.tracce[0].tipo == "prova 5"
+        assert coordinator.tracce[-1].esito == "ok"
+
+        # Download fallito: esito, errore e stato HTTP della risposta
+        app = web.Application()
+        app.router.add_get("/download", async_risposta)
+        async with TestServer(app) as server, ClientSession() as session:
+            monkeypatch.setattr(
+                datasource,
+                "GME_DOWNLOAD_URL",
+                str(server.make_url("/download")) + "?inizio={inizio}&fine={fine}",
+            )
+            coordinator.data_source = GMEDataSource(session, retries=0)
+            with (
+                pytest.raises(ServerConnectionError),
+                coordinator.trace_fetch("domani", GIORNO, GIORNO),
+            ):
+                await coordinator.data_source.async_get_archive(GIORNO, GIORNO)
+
+        dati = coordinator.tracce[-1].as_dict()
+        assert len(coordinator.tracce) == FETCH_TRACE_SIZE
+        assert dati["tipo"] == "domani"
+        assert dati["sorgente"] == "GMEDataSource"
+        assert dati["esito"] == "errore"
+        assert (
+            dati["errore"] == "ServerConnectionError: Richiesta fallita con errore 503"
+        )
+        assert dati["stato_http"] == 503
+        await hass.async_stop(force=True)
+
+    asyncio.run(async_test())
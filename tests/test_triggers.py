@@ -0,0 +1,126 @@
+"""Test degli eventi all'attraversamento delle soglie di prezzo."""
+
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from custom_components.pun_sensor.interfaces import PunData
+from custom_components.pun_sensor.triggers import build_price_events, parse_number_list
+from custom_components.pun_sensor.utils import get_day_table
+
+tz_pun: ZoneInfo = ZoneInfo("Europe/Rome")
+
+GIORNO: date = date(2025, 6, 10)
+DOMANI: date = GIORNO + timedelta(days=1)
+
+# Prima dell'inizio di GIORNO: tutti gli eventi sono futuri
+ADESSO: datetime = datetime(2025, 6, 9, 23, 0, tzinfo=tz_pun)
+
+
+def build_pun_data(prezzi: dict[date, list[float | None]]) -> PunData:
+    """PUN orari dei giorni indicati (None per le ore senza prezzo)."""
+    pun_data = PunData()
+    for giorno, valori in prezzi.items():
+        for orario, prezzo in zip(get_day_table(giorno).ore, valori):
+            if prezzo is not None:
+                pun_data.pun_orari[str(orario)] = prezzo
+    return pun_data
+
+
+def get_ora(giorno: date, ora: int) -> datetime:
+    """Orario locale dell'ora indicata."""
+    return datetime(giorno.year, giorno.month, giorno.day, ora, tzinfo=tz_pun)
+
+
+def test_parse_number_list() -> None:
+    """Gli elenchi accettano virgola e punto, senza duplicati e ordinati."""
+    assert parse_number_list("0,15; 0.10;;0.15 ") == [0.10, 0.15]
+    assert parse_number_list(None) == []
+    assert parse_number_list("4;2", interi=True) == [2, 4]
+    with pytest.raises(ValueError):
+        parse_number_list("3.5", interi=True)
+
+
+def test_threshold_crossings() -> None:
+    """Un evento a ogni attraversamento della soglia, anche a mezzanotte."""
+    oggi: list[float | None] = [0.2] * 24
+    oggi[5] = 0.05
+    domani: list[float | None] = [0.05] + [0.2] * 23
+    pun_data = build_pun_data({GIORNO: oggi, DOMANI: domani})
+
+    eventi = build_price_events(pun_data, [0.1], [], ADESSO)
+    assert [(e.istante, e.dati["direzione"]) for e in eventi] == [
+        (get_ora(GIORNO, 5), "sotto"),
+        (get_ora(GIORNO, 6), "sopra"),
+        (get_ora(DOMANI, 0), "sotto"),
+        (get_ora(DOMANI, 1), "sopra"),
+    ]
+    assert eventi[0].dati == {
+        "tipo": "soglia",
+        "soglia": 0.1,
+        "direzione": "sotto",
+        "prezzo": 0.05,
+        "orario": get_ora(GIORNO, 5).isoformat(),
+    }
+
+    # Solo gli eventi successivi all'istante attuale
+    eventi = build_price_events(pun_data, [0.1], [], get_ora(GIORNO, 12))
+    assert [e.istante for e in eventi] == [get_ora(DOMANI, 0), get_ora(DOMANI, 1)]
+
+
+def test_threshold_equal() -> None:
+    """Un prezzo uguale alla soglia non è sotto la soglia."""
+    valori: list[float | None] = [0.2] * 24
+    valori[3] = 0.1
+    valori[4] = 0.09
+    pun_data = build_pun_data({GIORNO: valori})
+    eventi = build_price_events(pun_data, [0.1], [], ADESSO)
+    assert [(e.istante, e.dati["direzione"]) for e in eventi] == [
+        (get_ora(GIORNO, 4), "sotto"),
+        (get_ora(GIORNO, 5), "sopra"),
+    ]
+
+
+def test_cheapest_hours() -> None:
+    """Inizio e fine degli intervalli tra le N ore più economiche del giorno."""
+    valori: list[float | None] = [0.3] * 24
+    for ora in (2, 3, 14):
+        valori[ora] = 0.1
+    valori[23] = 0.05
+    pun_data = build_pun_data({GIORNO: valori})
+
+    eventi = build_price_events(pun_data, [], [4], ADESSO)
+    assert [(e.istante, e.dati["direzione"]) for e in eventi] == [
+        (get_ora(GIORNO, 2), "inizio"),
+        (get_ora(GIORNO, 4), "fine"),
+        (get_ora(GIORNO, 14), "inizio"),
+        (get_ora(GIORNO, 15), "fine"),
+        (get_ora(GIORNO, 23), "inizio"),
+        (get_ora(DOMANI, 0), "fine"),
+    ]
+    assert eventi[-1].dati["prezzo"] is None
+    assert {e.dati["ore"] for e in eventi} == {4}
+
+
+def test_cheapest_hours_missing_hour() -> None:
+    """Un'ora senza prezzo interrompe l'intervallo delle ore economiche."""
+    valori: list[float | None] = [0.3] * 24
+    valori[2] = valori[4] = 0.1
+    valori[3] = None
+    pun_data = build_pun_data({GIORNO: valori})
+
+    eventi = build_price_events(pun_data, [], [2], ADESSO)
+    assert [(e.istante, e.dati["direzione"]) for e in eventi] == [
+        (get_ora(GIORNO, 2), "inizio"),
+        (get_ora(GIORNO, 3), "fine"),
+        (get_ora(GIORNO, 4), "inizio"),
+        (get_ora(GIORNO, 5), "fine"),
+    ]
+
+    # L'attraversamento della soglia confronta i prezzi disponibili
+    eventi = build_price_events(pun_data, [0.2], [], ADESSO)
+    assert [(e.istante, e.dati["direzione"]) for e in eventi] == [
+        (get_ora(GIORNO, 2), "sotto"),
+        (get_ora(GIORNO, 5), "sopra"),
+    ]
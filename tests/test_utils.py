@@ -0,0 +1,175 @@
+"""Test delle funzioni di utilità di pun_sensor."""
+
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from custom_components.pun_sensor.interfaces import Fascia
+from custom_components.pun_sensor.utils import (
+    get_datetime_from_ordinal_hour,
+    get_datetime_from_periodo_15min,
+    get_day_table,
+    get_fascia_for_xml,
+    get_ordinal_hour,
+    get_periodo_15min,
+    get_restored_prices,
+    get_total_hours,
+    pack_prices,
+    unpack_prices,
+)
+
+tz_pun: ZoneInfo = ZoneInfo("Europe/Rome")
+
+# Giorni normali e di cambio ora (ultima domenica di marzo e di ottobre)
+GIORNI_DST: list[tuple[date, int]] = [
+    (date(2025, 3, 29), 24),
+    (date(2025, 3, 30), 23),
+    (date(2025, 10, 26), 25),
+    (date(2026, 3, 29), 23),
+    (date(2026, 10, 25), 25),
+    (date(2026, 10, 26), 24),
+]
+
+
+def get_reference_datetime(giorno: date, minuti: int) -> datetime:
+    """Calcola l'orario locale dopo i minuti effettivi dalla mezzanotte, senza cache.
+
+    È il calcolo eseguito in precedenza a ogni chiamata: mezzanotte locale,
+    conversione in UTC, somma dei minuti e conversione nell'ora locale.
+    """
+    mezzanotte: datetime = datetime(
+        giorno.year, giorno.month, giorno.day, tzinfo=tz_pun
+    )
+    return (mezzanotte.astimezone(timezone.utc) + timedelta(minutes=minuti)).astimezone(
+        tz_pun
+    )
+
+
+@pytest.mark.parametrize(("giorno", "ore_totali"), GIORNI_DST)
+def test_day_table_hours(giorno: date, ore_totali: int) -> None:
+    """Le ore progressive della tabella coincidono con il calcolo senza cache."""
+    tabella = get_day_table(giorno)
+    assert tabella.ore_totali == ore_totali
+    assert get_total_hours(giorno) == ore_totali
+    assert len(tabella.ore) == len(tabella.chiavi_ore) == ore_totali
+    assert tabella.mezzanotte_utc == get_reference_datetime(giorno, 0).astimezone(
+        timezone.utc
+    )
+
+    festivo: bool = giorno.weekday() == 6
+    for ora in range(1, ore_totali + 1):
+        atteso: datetime = get_reference_datetime(giorno, 60 * (ora - 1))
+        orario: datetime = get_datetime_from_ordinal_hour(giorno, ora)
+        assert orario == atteso
+        assert orario.utcoffset() == atteso.utcoffset()
+        assert tabella.chiavi_ore[ora - 1] == str(atteso)
+        assert get_ordinal_hour(atteso) == ora
+
+        # La fascia dipende dall'ora locale (ripetuta o saltata al cambio ora)
+        assert get_fascia_for_xml(giorno, festivo, orario.hour) == get_fascia_for_xml(
+            giorno, festivo, atteso.hour
+        )
+
+    # Le ore oltre la fine del giorno proseguono nel giorno successivo
+    if ore_totali < 25:
+        assert get_datetime_from_ordinal_hour(
+            giorno, ore_totali + 1
+        ) == get_reference_datetime(giorno, 60 * ore_totali)
+
+
+@pytest.mark.parametrize(("giorno", "ore_totali"), GIORNI_DST)
+def test_day_table_15min(giorno: date, ore_totali: int) -> None:
+    """I periodi di 15 minuti della tabella coincidono con il calcolo senza cache."""
+    tabella = get_day_table(giorno)
+    assert len(tabella.periodi_15min) == len(tabella.chiavi_15min) == 4 * ore_totali
+
+    for periodo in range(1, 4 * ore_totali + 1):
+        atteso: datetime = get_reference_datetime(giorno, 15 * (periodo - 1))
+        orario: datetime = get_datetime_from_periodo_15min(giorno, periodo)
+        assert orario == atteso
+        assert orario.utcoffset() == atteso.utcoffset()
+        assert tabella.chiavi_15min[periodo - 1] == str(atteso)
+        assert get_periodo_15min(atteso) == periodo
+        assert (
+            get_periodo_15min(get_reference_datetime(giorno, 15 * periodo - 1))
+            == periodo
+        )
+
+        # Ogni quarto d'ora appartiene all'ora progressiva che lo contiene
+        assert tabella.ore[(periodo - 1) // 4] == get_reference_datetime(
+            giorno, 60 * ((periodo - 1) // 4)
+        )
+
+
+def test_dst_repeated_hour() -> None:
+    """Nel giorno di 25 ore le 2 locali compaiono due volte, con offset diversi."""
+    tabella = get_day_table(date(2025, 10, 26))
+    due = [orario for orario in tabella.ore if orario.hour == 2]
+    assert len(due) == 2
+    assert due[0].utcoffset() == timedelta(hours=2)
+    assert due[1].utcoffset() == timedelta(hours=1)
+    assert len(set(tabella.chiavi_ore)) == 25
+    assert get_fascia_for_xml(date(2025, 10, 26), False, 2) == Fascia.F3
+
+
+def test_dst_missing_hour() -> None:
+    """Nel giorno di 23 ore le 2 locali non esistono."""
+    tabella = get_day_table(date(2025, 3, 30))
+    assert [orario.hour for orario in tabella.ore[0:3]] == [0, 1, 3]
+    assert [orario.minute for orario in tabella.periodi_15min[4:9]] == [
+        0,
+        15,
+        30,
+        45,
+        0,
+    ]
+    assert tabella.periodi_15min[8].hour == 3
+
+
+@pytest.mark.parametrize(("giorno", "ore_totali"), GIORNI_DST)
+@pytest.mark.parametrize("prezzi_15min", [False, True])
+def test_pack_unpack_prices(giorno: date, ore_totali: int, prezzi_15min: bool) -> None:
+    """I prezzi compattati vengono ricostruiti identici, anche nei cambi ora."""
+    giorni: list[date] = [giorno, giorno + timedelta(days=1)]
+    prezzi: dict[str, float | None] = {}
+    for g in giorni:
+        tabella = get_day_table(g)
+        for indice, orario in enumerate(
+            tabella.periodi_15min if prezzi_15min else tabella.ore
+        ):
+            # Un prezzo mancante per giorno
+            prezzi[str(orario)] = None if indice == 2 else g.day + indice / 1000
+
+    compatto = pack_prices(prezzi, prezzi_15min)
+    assert compatto["inizio"] == giorno.isoformat()
+    assert compatto["passo"] == (15 if prezzi_15min else 60)
+    assert len(compatto["valori"]) == len(prezzi)
+    assert len(get_day_table(giorno).ore) == ore_totali
+
+    # I prezzi mancanti non vengono ricostruiti
+    assert unpack_prices(compatto) == {
+        orario: prezzo for orario, prezzo in prezzi.items() if prezzo is not None
+    }
+
+
+def test_pack_prices_empty() -> None:
+    """Senza prezzi il formato compatto non ha un giorno iniziale."""
+    compatto = pack_prices({})
+    assert compatto == {"inizio": None, "passo": 60, "valori": []}
+    assert unpack_prices(compatto) == {}
+
+
+def test_restored_prices_versions() -> None:
+    """I prezzi salvati vengono ripristinati sia dal formato v1 che dal v2."""
+    ora = get_day_table(date(2025, 10, 26)).ore[2]
+    prezzi: dict[str, float | None] = {str(ora): 0.1}
+
+    # Versione 1 (senza numero di versione): dizionario indicizzato per orario
+    assert get_restored_prices({"prezzi": prezzi}, "prezzi") == prezzi
+    assert get_restored_prices({"versione": 1, "prezzi": prezzi}, "prezzi") == prezzi
+
+    # Versione 2: formato compatto
+    dati = {"versione": 2, "prezzi": pack_prices(prezzi)}
+    assert get_restored_prices(dati, "prezzi") == prezzi
+    assert get_restored_prices({"versione": 2}, "prezzi") is None
@@ -0,0 +1,141 @@
+"""Test dei comandi websocket per leggere i prezzi dal frontend."""
+
+import asyncio
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+from custom_components.pun_sensor.const import DOMAIN, SIGNAL_PREZZI_AGGIORNATI
+from custom_components.pun_sensor.coordinator import PUNDataUpdateCoordinator
+from custom_components.pun_sensor.interfaces import Zona
+from custom_components.pun_sensor.utils import get_day_table
+from custom_components.pun_sensor.websocket_api import (
+    build_prices_message,
+    ws_subscribe_prices,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+from .common import build_config_entry
+
+# Giorno con 25 ore (cambio ora) e giorno successivo
+GIORNI: list[date] = [date(2025, 10, 26), date(2025, 10, 27)]
+
+
+def build_coordinator(hass: HomeAssistant) -> PUNDataUpdateCoordinator:
+    """Coordinator con PUN e prezzi zonali orari dei GIORNI (zona NORD)."""
+    coordinator = PUNDataUpdateCoordinator(hass, build_config_entry())
+    for giorno in GIORNI:
+        for indice, orario in enumerate(get_day_table(giorno).ore):
+            coordinator.pun_data.pun_orari[str(orario)] = giorno.day + indice / 1000
+            coordinator.pun_data.prezzi_zonali[str(orario)] = (
+                None if indice == 0 else giorno.day + indice / 100
+            )
+    return coordinator
+
+
+class ConnessioneProva:
+    """Connessione websocket che conserva i messaggi inviati."""
+
+    def __init__(self) -> None:
+        """Inizializza la connessione."""
+        self.subscriptions: dict[int, Any] = {}
+        self.messaggi: list[dict[str, Any]] = []
+        self.risultati: list[int] = []
+
+    def send_result(self, msg_id: int, result: Any = None) -> None:
+        """Conserva la risposta al comando."""
+        self.risultati.append(msg_id)
+
+    def send_message(self, messaggio: dict[str, Any]) -> None:
+        """Conserva il messaggio inviato."""
+        self.messaggi.append(messaggio)
+
+
+def test_prices_message(tmp_path: Path) -> None:
+    """I prezzi vengono inviati come liste allineate a partire dal giorno iniziale."""
+
+    async def async_test() -> None:
+        hass = HomeAssistant(str(tmp_path))
+        coordinator = build_coordinator(hass)
+        assert coordinator.pun_data.zona == Zona.NORD
+
+        messaggio = build_prices_message(coordinator, {"passo": 60})
+        assert messaggio is not None
+        assert messaggio["versione"] == coordinator.versione_prezzi
+        assert messaggio["zona"] == "NORD"
+        assert messaggio["inizio"] == "2025-10-26"
+        assert messaggio["passo"] == 60
+        assert len(messaggio["pun"]) == 25 + 24
+        assert len(messaggio["prezzi_zonali"]) == len(messaggio["pun"])
+        assert messaggio["pun"][24] == 26.024
+        assert messaggio["prezzi_zonali"][0] is None
+        assert messaggio["prezzi_zonali"][25] is None
+        assert messaggio["prezzi_zonali"][26] == 27.01
+
+        # Intervallo limitato ai giorni disponibili
+        messaggio = build_prices_message(
+            coordinator,
+            {"passo": 60, "inizio": date(2025, 10, 27), "fine": date(2025, 12, 31)},
+        )
+        assert messaggio is not None
+        assert messaggio["inizio"] == "2025-10-27"
+        assert len(messaggio["pun"]) == 24
+
+        # Nessun prezzo a 15 minuti
+        messaggio = build_prices_message(coordinator, {"passo": 15})
+        assert messaggio is not None
+        assert messaggio["inizio"] is None
+        assert messaggio["pun"] == messaggio["prezzi_zonali"] == []
+
+        # Zona diversa senza i prezzi di tutte le zone
+        assert build_prices_message(coordinator, {"passo": 60, "zona": "SUD"}) is None
+        await hass.async_stop(force=True)
+
+    asyncio.run(async_test())
+
+
+def test_subscription_resend_on_version(tmp_path: Path) -> None:
+    """La sottoscrizione invia i prezzi subito e poi solo al cambio di versione."""
+
+    async def async_test() -> None:
+        hass = HomeAssistant(str(tmp_path))
+        coordinator = build_coordinator(hass)
+        hass.data[DOMAIN] = {"entry": coordinator}
+        connessione = ConnessioneProva()
+        ws_subscribe_prices(
+            hass,
+            connessione,
+            {"id": 5, "type": f"{DOMAIN}/subscribe_prices", "passo": 60},
+        )
+        assert connessione.risultati == [5]
+        assert len(connessione.messaggi) == 1
+        assert connessione.messaggi[0]["id"] == 5
+        assert connessione.messaggi[0]["event"]["versione"] == 0
+
+        # Segnale senza nuovi prezzi: nessun invio
+        async_dispatcher_send(hass, SIGNAL_PREZZI_AGGIORNATI)
+        assert len(connessione.messaggi) == 1
+
+        # Nuovi prezzi: invio con la nuova versione
+        coordinator.pun_data.pun_orari[str(get_day_table(GIORNI[1]).ore[0])] = 0.5
+        coordinator.notify_prices_updated()
+        assert len(connessione.messaggi) == 2
+        assert connessione.messaggi[1]["event"]["versione"] == 1
+        assert connessione.messaggi[1]["event"]["pun"][25] == 0.5
+
+        # Coordinator ricreato (integrazione ricaricata): invio anche a parità di versione
+        nuovo = build_coordinator(hass)
+        nuovo.versione_prezzi = 1
+        hass.data[DOMAIN] = {"entry": nuovo}
+        async_dispatcher_send(hass, SIGNAL_PREZZI_AGGIORNATI)
+        assert len(connessione.messaggi) == 3
+
+        # Dopo l'annullamento della sottoscrizione non invia più nulla
+        connessione.subscriptions[5]()
+        coordinator.notify_prices_updated()
+        nuovo.notify_prices_updated()
+        assert len(connessione.messaggi) == 3
+        await hass.async_stop(force=True)
+
+    asyncio.run(async_test())